@@ -0,0 +1,125 @@
+"""Binary search as a precomputed decision tree (``POST /api/v1/searching/binary/decision-tree``).
+
+On fixed sorted values, the midpoints binary search checks depend only on
+how the target compares with them, so all searches follow paths of one
+tree. Node i checks sorted position i; its ``lower`` child is the midpoint
+of the positions left of i within its range, its ``higher`` child the one to
+the right. The root is (n - 1) // 2 and there are floor(log2 n) + 1 levels.
+
+The tree is built once per array in O(n) array operations, one per level,
+and cached in the layout cache under the array's content hash (the
+dataset id), together with an int64 copy of the values that the cache's
+byte bound accounts for. After that, a trace is a walk from the root:
+O(log n) steps that carry the node's index, value and range, with no copy
+of the array, and the same midpoints, in the same order, as
+``binary_search_iter``.
+"""
+import sys
+from typing import Generator, Optional
+
+import numpy as np
+
+from algorithms.layouts import key_array, layout_cache
+from models.records import DecisionRecord
+from services.detail import COMPARISON, OPERATION, PASS
+
+
+class BinaryDecisionTree:
+    """Child links and depths of the binary search decision tree over ``keys`` (-1 for no child)"""
+
+    __slots__ = ("keys", "lower", "higher", "depth", "root", "levels")
+
+    def __init__(self, keys: np.ndarray, lower: np.ndarray, higher: np.ndarray, depth: np.ndarray, levels: int):
+        self.keys = keys
+        self.lower = lower
+        self.higher = higher
+        self.depth = depth
+        self.root = (len(keys) - 1) // 2 if len(keys) else None
+        self.levels = levels
+
+    @property
+    def nbytes(self) -> int:
+        nbytes = self.keys.nbytes + self.lower.nbytes + self.higher.nbytes + self.depth.nbytes
+        if self.keys.dtype == object:
+            # Values past int64 are kept as Python ints: the array only holds pointers to them
+            nbytes += sum(map(sys.getsizeof, self.keys))
+        return nbytes
+
+    def export(self) -> dict:
+        """The whole tree as the DecisionTree response model's columns"""
+        return {
+            "values": self.keys.tolist(),
+            "lower": [None if child < 0 else child for child in self.lower.tolist()],
+            "higher": [None if child < 0 else child for child in self.higher.tolist()],
+            "depth": self.depth.tolist(),
+        }
+
+
+def build_decision_tree(values: list[int]) -> BinaryDecisionTree:
+    """The decision tree of binary search over the sorted ``values``"""
+    n = len(values)
+    lower = np.full(n, -1, dtype=np.int64)
+    higher = np.full(n, -1, dtype=np.int64)
+    depth = np.zeros(n, dtype=np.int32)
+    # The ranges of one level's nodes
+    low = np.zeros(1 if n else 0, dtype=np.int64)
+    high = np.full(len(low), n - 1, dtype=np.int64)
+    levels = 0
+    while len(low):
+        mid = (low + high) // 2
+        depth[mid] = levels
+        has_lower, has_higher = low < mid, mid < high
+        lower[mid[has_lower]] = (low[has_lower] + mid[has_lower] - 1) // 2
+        higher[mid[has_higher]] = (mid[has_higher] + 1 + high[has_higher]) // 2
+        low = np.concatenate((low[has_lower], mid[has_higher] + 1))
+        high = np.concatenate((mid[has_lower] - 1, high[has_higher]))
+        levels += 1
+    return BinaryDecisionTree(key_array(values), lower, higher, depth, levels)
+
+
+def decision_tree(values: list[int], tree_id: str) -> BinaryDecisionTree:
+    """The decision tree over ``values``, built on first use of their content hash ``tree_id``"""
+    return layout_cache.get_or_build(("decision_tree", tree_id), lambda: build_decision_tree(values))
+
+
+def decision_path_iter(tree: BinaryDecisionTree, target: int,
+                       detail: int = COMPARISON) -> Generator[DecisionRecord, None, tuple[bool, Optional[int]]]:
+    """Walk ``tree`` from the root for ``target``, yielding visualization steps and returning (found, found_at)"""
+    keys, n = tree.keys, len(tree.keys)
+    if n == 0:
+        if detail >= PASS:
+            yield DecisionRecord(description="Empty array")
+        return False, None
+
+    left, right = 0, n - 1
+    if detail >= PASS:
+        yield DecisionRecord(left=left, right=right,
+                             description=f"Decision tree path for {target}: {tree.levels} levels, "
+                                         f"root checks index {tree.root}")
+
+    node, depth = tree.root, 0
+    while node >= 0:
+        value = keys.item(node)
+        if detail >= COMPARISON:
+            yield DecisionRecord(index=node, value=value, left=left, right=right, depth=depth,
+                                 description=f"Depth {depth}: checking index {node} = {value}")
+        if value == target:
+            if detail >= PASS:
+                yield DecisionRecord(index=node, value=value, left=left, right=right, depth=depth, found=True,
+                                     description=f"Found {target} at index {node}!")
+            return True, node
+
+        child = tree.higher.item(node) if value < target else tree.lower.item(node)
+        if detail >= OPERATION:
+            branch = f"{value} < {target}, higher" if value < target else f"{value} > {target}, lower"
+            yield DecisionRecord(index=node, value=value, left=left, right=right, depth=depth,
+                                 description=f"{branch} branch to " + (f"index {child}" if child >= 0 else "a leaf"))
+        if value < target:
+            left = node + 1
+        else:
+            right = node - 1
+        node, depth = child, depth + 1
+
+    if detail >= PASS:
+        yield DecisionRecord(depth=depth, description=f"{target} not found in array ({depth} levels checked)")
+    return False, None
@@ -1,116 +1,189 @@
-from fastapi import APIRouter
-from models.schemas import DPRequest, DPResponse, DPStep
+from fastapi import APIRouter, Request
+from typing import Generator
+from models.records import DPRecord
+from models.schemas import DPRequest, DPResponse, DPStep, TraceSessionInfo
+from services.cache import cached_response
+from services.detail import COMPARISON, OPERATION, PASS, detail_level
+from services.encoding import JSON_MEDIA_TYPE, encode_trace
+from services.sessions import build_json_pages, open_session
+from services.streaming import as_step_list, collect, stream_trace, wants_sse
 
 router = APIRouter()
 
 
-def fibonacci_steps(n: int) -> tuple[list[DPStep], int]:
-    steps = []
+def fibonacci_iter(n: int, detail: int = COMPARISON) -> Generator[DPRecord, None, int]:
     if n <= 0:
-        return [DPStep(table=[[0]], current_cell=(0, 0), description="n <= 0, result is 0")], 0
+        if detail >= PASS:
+            yield DPRecord(table=[[0]], current_cell=(0, 0), description="n <= 0, result is 0")
+        return 0
     
     dp = [0] * (n + 1)
     dp[0], dp[1] = 0, 1
     
-    steps.append(DPStep(table=[dp.copy()], current_cell=(0, 0), description="Initialize: F(0)=0, F(1)=1"))
+    if detail >= PASS:
+        yield DPRecord(table=[dp.copy()], current_cell=(0, 0), description="Initialize: F(0)=0, F(1)=1")
     
     for i in range(2, n + 1):
         dp[i] = dp[i-1] + dp[i-2]
-        steps.append(DPStep(table=[dp.copy()], current_cell=(0, i),
-            description=f"F({i}) = F({i-1}) + F({i-2}) = {dp[i-1]} + {dp[i-2]} = {dp[i]}"))
+        if detail >= OPERATION:
+            yield DPRecord(table=[dp.copy()], current_cell=(0, i),
+                description=f"F({i}) = F({i-1}) + F({i-2}) = {dp[i-1]} + {dp[i-2]} = {dp[i]}")
     
-    steps.append(DPStep(table=[dp.copy()], current_cell=(0, n),
-        description=f"Fibonacci({n}) = {dp[n]}"))
-    return steps, dp[n]
+    if detail >= PASS:
+        yield DPRecord(table=[dp.copy()], current_cell=(0, n),
+            description=f"Fibonacci({n}) = {dp[n]}")
+    return dp[n]
 
 
-def knapsack_steps(weights: list[int], values: list[int], capacity: int) -> tuple[list[DPStep], int]:
-    steps = []
+def fibonacci_steps(n: int, detail: int = COMPARISON) -> tuple[list[DPStep], int]:
+    return as_step_list(fibonacci_iter(n, detail))
+
+
+def knapsack_iter(weights: list[int], values: list[int], capacity: int, detail: int = COMPARISON) -> Generator[DPRecord, None, int]:
     n = len(weights)
     dp = [[0] * (capacity + 1) for _ in range(n + 1)]
     
-    steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(0, 0),
-        description=f"0/1 Knapsack: {n} items, capacity {capacity}"))
+    if detail >= PASS:
+        yield DPRecord(table=[row.copy() for row in dp], current_cell=(0, 0),
+            description=f"0/1 Knapsack: {n} items, capacity {capacity}")
     
     for i in range(1, n + 1):
         for w in range(1, capacity + 1):
             if weights[i-1] <= w:
                 dp[i][w] = max(dp[i-1][w], values[i-1] + dp[i-1][w-weights[i-1]])
                 if dp[i][w] > dp[i-1][w]:
-                    steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(i, w),
-                        description=f"Take item {i}: value={values[i-1]}, dp[{i}][{w}]={dp[i][w]}"))
+                    if detail >= OPERATION:
+                        yield DPRecord(table=[row.copy() for row in dp], current_cell=(i, w),
+                            description=f"Take item {i}: value={values[i-1]}, dp[{i}][{w}]={dp[i][w]}")
             else:
                 dp[i][w] = dp[i-1][w]
+        if detail == PASS:
+            yield DPRecord(table=[row.copy() for row in dp], current_cell=(i, capacity),
+                description=f"Item {i} considered: best value with capacity {capacity} is {dp[i][capacity]}")
     
-    steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(n, capacity),
-        description=f"Max value: {dp[n][capacity]}"))
-    return steps, dp[n][capacity]
+    if detail >= PASS:
+        yield DPRecord(table=[row.copy() for row in dp], current_cell=(n, capacity),
+            description=f"Max value: {dp[n][capacity]}")
+    return dp[n][capacity]
+
 
+def knapsack_steps(weights: list[int], values: list[int], capacity: int, detail: int = COMPARISON) -> tuple[list[DPStep], int]:
+    return as_step_list(knapsack_iter(weights, values, capacity, detail))
 
-def lcs_steps(s1: str, s2: str) -> tuple[list[DPStep], int]:
-    steps = []
+
+def lcs_iter(s1: str, s2: str, detail: int = COMPARISON) -> Generator[DPRecord, None, int]:
     m, n = len(s1), len(s2)
     dp = [[0] * (n + 1) for _ in range(m + 1)]
     
-    steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(0, 0),
-        description=f"LCS of '{s1}' and '{s2}'"))
+    if detail >= PASS:
+        yield DPRecord(table=[row.copy() for row in dp], current_cell=(0, 0),
+            description=f"LCS of '{s1}' and '{s2}'")
     
     for i in range(1, m + 1):
         for j in range(1, n + 1):
             if s1[i-1] == s2[j-1]:
                 dp[i][j] = dp[i-1][j-1] + 1
-                steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(i, j),
-                    description=f"Match: '{s1[i-1]}' = '{s2[j-1]}', LCS length = {dp[i][j]}"))
+                if detail >= OPERATION:
+                    yield DPRecord(table=[row.copy() for row in dp], current_cell=(i, j),
+                        description=f"Match: '{s1[i-1]}' = '{s2[j-1]}', LCS length = {dp[i][j]}")
             else:
                 dp[i][j] = max(dp[i-1][j], dp[i][j-1])
+        if detail == PASS:
+            yield DPRecord(table=[row.copy() for row in dp], current_cell=(i, n),
+                description=f"Row {i} complete: LCS of '{s1[:i]}' and '{s2}' is {dp[i][n]}")
     
-    steps.append(DPStep(table=[row.copy() for row in dp], current_cell=(m, n),
-        description=f"LCS length: {dp[m][n]}"))
-    return steps, dp[m][n]
+    if detail >= PASS:
+        yield DPRecord(table=[row.copy() for row in dp], current_cell=(m, n),
+            description=f"LCS length: {dp[m][n]}")
+    return dp[m][n]
+
+
+def lcs_steps(s1: str, s2: str, detail: int = COMPARISON) -> tuple[list[DPStep], int]:
+    return as_step_list(lcs_iter(s1, s2, detail))
 
 
-def lis_steps(arr: list[int]) -> tuple[list[DPStep], int]:
-    steps = []
+def lis_iter(arr: list[int], detail: int = COMPARISON) -> Generator[DPRecord, None, int]:
     n = len(arr)
     if n == 0:
-        return [DPStep(table=[[0]], current_cell=(0, 0), description="Empty array")], 0
+        if detail >= PASS:
+            yield DPRecord(table=[[0]], current_cell=(0, 0), description="Empty array")
+        return 0
     
     dp = [1] * n
-    steps.append(DPStep(table=[arr, dp.copy()], current_cell=(0, 0),
-        description="Initialize all LIS lengths to 1"))
+    if detail >= PASS:
+        yield DPRecord(table=[arr, dp.copy()], current_cell=(0, 0),
+            description="Initialize all LIS lengths to 1")
     
     for i in range(1, n):
         for j in range(i):
             if arr[j] < arr[i]:
                 dp[i] = max(dp[i], dp[j] + 1)
-                steps.append(DPStep(table=[arr, dp.copy()], current_cell=(1, i),
-                    description=f"arr[{j}]={arr[j]} < arr[{i}]={arr[i]}: dp[{i}]={dp[i]}"))
+                if detail >= OPERATION:
+                    yield DPRecord(table=[arr, dp.copy()], current_cell=(1, i),
+                        description=f"arr[{j}]={arr[j]} < arr[{i}]={arr[i]}: dp[{i}]={dp[i]}")
     
     result = max(dp)
-    steps.append(DPStep(table=[arr, dp], current_cell=(1, dp.index(result)),
-        description=f"LIS length: {result}"))
-    return steps, result
+    if detail >= PASS:
+        yield DPRecord(table=[arr, dp], current_cell=(1, dp.index(result)),
+            description=f"LIS length: {result}")
+    return result
 
 
-@router.post("/{algorithm}", response_model=DPResponse)
-async def execute_dp_algorithm(algorithm: str, request: DPRequest):
+def lis_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[DPStep], int]:
+    return as_step_list(lis_iter(arr, detail))
+
+
+DP_ALGORITHMS = ["fibonacci", "knapsack", "lcs", "lis"]
+
+
+def dp_trace(algorithm: str, request: DPRequest) -> Generator[DPRecord, None, dict]:
+    """Yield the steps for a DP request and return the response result"""
+    detail = detail_level(request)
     if algorithm == "fibonacci":
         n = request.n or request.input_data
-        steps, result = fibonacci_steps(n)
+        result = yield from fibonacci_iter(n, detail)
     elif algorithm == "knapsack":
         data = request.input_data
-        steps, result = knapsack_steps(data["weights"], data["values"], request.capacity or data["capacity"])
+        result = yield from knapsack_iter(data["weights"], data["values"], request.capacity or data["capacity"],
+                                     detail)
     elif algorithm == "lcs":
         s1, s2 = request.input_data["s1"], request.input_data["s2"]
-        steps, result = lcs_steps(s1, s2)
+        result = yield from lcs_iter(s1, s2, detail)
     elif algorithm == "lis":
-        steps, result = lis_steps(request.input_data)
+        result = yield from lis_iter(request.input_data, detail)
     else:
-        return {"error": f"Unknown algorithm: {algorithm}"}
+        raise ValueError(f"Unknown algorithm: {algorithm}")
     
-    return DPResponse(algorithm=algorithm, steps=steps, result=result)
+    return {"result": result}
+
+
+def render_dp(algorithm: str, request: DPRequest, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Run a DP request and serialize the response body"""
+    steps, summary = collect(dp_trace(algorithm, request))
+    return encode_trace(DPResponse, steps, media_type, algorithm=algorithm, **summary)
+
+
+@router.post("/{algorithm}", response_model=DPResponse)
+async def execute_dp_algorithm(algorithm: str, request: DPRequest, http_request: Request):
+    if algorithm not in DP_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await cached_response("dp", algorithm, request, render_dp, http_request)
+
+
+@router.post("/{algorithm}/stream")
+async def stream_dp_algorithm(algorithm: str, request: DPRequest, http_request: Request):
+    if algorithm not in DP_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return stream_trace(algorithm, dp_trace(algorithm, request), sse=wants_sse(http_request))
+
+
+@router.post("/{algorithm}/session", response_model=TraceSessionInfo)
+async def open_dp_algorithm_session(algorithm: str, request: DPRequest, http_request: Request):
+    if algorithm not in DP_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await open_session("dp", algorithm, request, http_request, build_json_pages, dp_trace)
 
 
 @router.get("/")
 async def list_dp_algorithms():
-    return {"algorithms": ["fibonacci", "knapsack", "lcs", "lis"]}
+    return {"algorithms": DP_ALGORITHMS}
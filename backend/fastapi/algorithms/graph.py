@@ -1,5 +1,11 @@
-from fastapi import APIRouter
-from models.schemas import GraphRequest, GraphResponse, GraphStep
+from fastapi import APIRouter, Request
+from models.records import GraphRecord
+from models.schemas import GraphRequest, GraphResponse, TraceSessionInfo
+from services.cache import cached_response
+from services.detail import COMPARISON, OPERATION, PASS, detail_level
+from services.encoding import JSON_MEDIA_TYPE, encode_trace
+from services.sessions import build_json_pages, open_session
+from services.streaming import as_step_list, collect, stream_trace, wants_sse
 import heapq
 from collections import defaultdict
 
@@ -17,44 +23,50 @@ def build_adjacency_list(nodes, edges, directed=False):
     return adj
 
 
-def bfs_steps(nodes, edges, start_node: str):
-    steps = []
+def bfs_iter(nodes, edges, start_node: str, detail: int = COMPARISON):
     adj = build_adjacency_list(nodes, edges)
     visited = []
     queue = [start_node]
     result = []
     visited_set = {start_node}
     
-    steps.append(GraphStep(visited=[], current=start_node, queue=queue.copy(),
-        description=f"Starting BFS from node {start_node}"))
+    if detail >= PASS:
+        yield GraphRecord(visited=[], current=start_node, queue=queue.copy(),
+            description=f"Starting BFS from node {start_node}")
     
     while queue:
         current = queue.pop(0)
         result.append(current)
         visited.append(current)
-        steps.append(GraphStep(visited=visited.copy(), current=current, queue=queue.copy(),
-            description=f"Visiting node {current}"))
+        if detail >= OPERATION:
+            yield GraphRecord(visited=visited.copy(), current=current, queue=queue.copy(),
+                description=f"Visiting node {current}")
         
         for neighbor, _ in sorted(adj[current]):
             if neighbor not in visited_set:
                 visited_set.add(neighbor)
                 queue.append(neighbor)
     
-    steps.append(GraphStep(visited=visited.copy(), path=result,
-        description=f"BFS complete: {' → '.join(result)}"))
-    return steps, result
+    if detail >= PASS:
+        yield GraphRecord(visited=visited.copy(), path=result,
+            description=f"BFS complete: {' → '.join(result)}")
+    return result
 
 
-def dfs_steps(nodes, edges, start_node: str):
-    steps = []
+def bfs_steps(nodes, edges, start_node: str, detail: int = COMPARISON):
+    return as_step_list(bfs_iter(nodes, edges, start_node, detail))
+
+
+def dfs_iter(nodes, edges, start_node: str, detail: int = COMPARISON):
     adj = build_adjacency_list(nodes, edges)
     visited = []
     stack = [start_node]
     result = []
     visited_set = set()
     
-    steps.append(GraphStep(visited=[], current=start_node, stack=stack.copy(),
-        description=f"Starting DFS from node {start_node}"))
+    if detail >= PASS:
+        yield GraphRecord(visited=[], current=start_node, stack=stack.copy(),
+            description=f"Starting DFS from node {start_node}")
     
     while stack:
         current = stack.pop()
@@ -63,20 +75,25 @@ def dfs_steps(nodes, edges, start_node: str):
         visited_set.add(current)
         result.append(current)
         visited.append(current)
-        steps.append(GraphStep(visited=visited.copy(), current=current, stack=stack.copy(),
-            description=f"Visiting node {current}"))
+        if detail >= OPERATION:
+            yield GraphRecord(visited=visited.copy(), current=current, stack=stack.copy(),
+                description=f"Visiting node {current}")
         
         for neighbor, _ in sorted(adj[current], reverse=True):
             if neighbor not in visited_set:
                 stack.append(neighbor)
     
-    steps.append(GraphStep(visited=visited.copy(), path=result,
-        description=f"DFS complete: {' → '.join(result)}"))
-    return steps, result
+    if detail >= PASS:
+        yield GraphRecord(visited=visited.copy(), path=result,
+            description=f"DFS complete: {' → '.join(result)}")
+    return result
+
 
+def dfs_steps(nodes, edges, start_node: str, detail: int = COMPARISON):
+    return as_step_list(dfs_iter(nodes, edges, start_node, detail))
 
-def dijkstra_steps(nodes, edges, start_node: str, end_node: str = None):
-    steps = []
+
+def dijkstra_iter(nodes, edges, start_node: str, end_node: str = None, detail: int = COMPARISON):
     adj = build_adjacency_list(nodes, edges)
     node_ids = [node.id for node in nodes]
     
@@ -86,16 +103,18 @@ def dijkstra_steps(nodes, edges, start_node: str, end_node: str = None):
     visited = []
     pq = [(0, start_node)]
     
-    steps.append(GraphStep(visited=[], current=start_node, distances=distances.copy(),
-        description=f"Starting Dijkstra from {start_node}"))
+    if detail >= PASS:
+        yield GraphRecord(visited=[], current=start_node, distances=distances.copy(),
+            description=f"Starting Dijkstra from {start_node}")
     
     while pq:
         current_dist, current = heapq.heappop(pq)
         if current in visited:
             continue
         visited.append(current)
-        steps.append(GraphStep(visited=visited.copy(), current=current, distances=distances.copy(),
-            description=f"Processing {current} (dist: {current_dist})"))
+        if detail >= OPERATION:
+            yield GraphRecord(visited=visited.copy(), current=current, distances=distances.copy(),
+                description=f"Processing {current} (dist: {current_dist})")
         
         if current == end_node:
             break
@@ -118,13 +137,17 @@ def dijkstra_steps(nodes, edges, start_node: str, end_node: str = None):
         path.reverse()
         total_cost = distances[end_node]
     
-    steps.append(GraphStep(visited=visited.copy(), distances=distances.copy(), path=path if path else None,
-        description=f"Dijkstra complete" + (f": path cost {total_cost}" if end_node else "")))
-    return steps, path, total_cost
+    if detail >= PASS:
+        yield GraphRecord(visited=visited.copy(), distances=distances.copy(), path=path if path else None,
+            description=f"Dijkstra complete" + (f": path cost {total_cost}" if end_node else ""))
+    return path, total_cost
+
+
+def dijkstra_steps(nodes, edges, start_node: str, end_node: str = None, detail: int = COMPARISON):
+    return as_step_list(dijkstra_iter(nodes, edges, start_node, end_node, detail))
 
 
-def kruskal_steps(nodes, edges):
-    steps = []
+def kruskal_iter(nodes, edges, detail: int = COMPARISON):
     node_ids = [node.id for node in nodes]
     parent = {node: node for node in node_ids}
     
@@ -144,24 +167,30 @@ def kruskal_steps(nodes, edges):
     mst_edges = []
     total_cost = 0
     
-    steps.append(GraphStep(visited=[], mst_edges=[], description="Starting Kruskal's algorithm"))
+    if detail >= PASS:
+        yield GraphRecord(visited=[], mst_edges=[], description="Starting Kruskal's algorithm")
     
     for edge in sorted_edges:
         if union(edge.source, edge.target):
             mst_edges.append({"source": edge.source, "target": edge.target, "weight": edge.weight or 1})
             total_cost += edge.weight or 1
-            steps.append(GraphStep(visited=[edge.source, edge.target], mst_edges=mst_edges.copy(),
-                description=f"Added edge {edge.source}→{edge.target}. Cost: {total_cost}"))
+            if detail >= OPERATION:
+                yield GraphRecord(visited=[edge.source, edge.target], mst_edges=mst_edges.copy(),
+                    description=f"Added edge {edge.source}→{edge.target}. Cost: {total_cost}")
         if len(mst_edges) == len(nodes) - 1:
             break
     
-    steps.append(GraphStep(visited=node_ids, mst_edges=mst_edges,
-        description=f"MST complete! Total cost: {total_cost}"))
-    return steps, mst_edges, total_cost
+    if detail >= PASS:
+        yield GraphRecord(visited=node_ids, mst_edges=mst_edges,
+            description=f"MST complete! Total cost: {total_cost}")
+    return mst_edges, total_cost
 
 
-def prim_steps(nodes, edges, start_node: str = None):
-    steps = []
+def kruskal_steps(nodes, edges, detail: int = COMPARISON):
+    return as_step_list(kruskal_iter(nodes, edges, detail))
+
+
+def prim_iter(nodes, edges, start_node: str = None, detail: int = COMPARISON):
     adj = build_adjacency_list(nodes, edges)
     node_ids = [node.id for node in nodes]
     if not start_node:
@@ -172,7 +201,8 @@ def prim_steps(nodes, edges, start_node: str = None):
     total_cost = 0
     pq = [(0, start_node, None)]
     
-    steps.append(GraphStep(visited=[], mst_edges=[], description=f"Starting Prim's from {start_node}"))
+    if detail >= PASS:
+        yield GraphRecord(visited=[], mst_edges=[], description=f"Starting Prim's from {start_node}")
     
     while pq and len(visited) < len(nodes):
         weight, current, parent = heapq.heappop(pq)
@@ -184,40 +214,77 @@ def prim_steps(nodes, edges, start_node: str = None):
             mst_edges.append({"source": parent, "target": current, "weight": weight})
             total_cost += weight
         
-        steps.append(GraphStep(visited=list(visited), current=current, mst_edges=mst_edges.copy(),
-            description=f"Added {parent}→{current}" if parent else f"Starting from {current}"))
+        if detail >= OPERATION:
+            yield GraphRecord(visited=list(visited), current=current, mst_edges=mst_edges.copy(),
+                description=f"Added {parent}→{current}" if parent else f"Starting from {current}")
         
         for neighbor, edge_weight in adj[current]:
             if neighbor not in visited:
                 heapq.heappush(pq, (edge_weight, neighbor, current))
     
-    steps.append(GraphStep(visited=list(visited), mst_edges=mst_edges,
-        description=f"MST complete! Total cost: {total_cost}"))
-    return steps, mst_edges, total_cost
+    if detail >= PASS:
+        yield GraphRecord(visited=list(visited), mst_edges=mst_edges,
+            description=f"MST complete! Total cost: {total_cost}")
+    return mst_edges, total_cost
 
 
-@router.post("/{algorithm}", response_model=GraphResponse)
-async def execute_graph_algorithm(algorithm: str, request: GraphRequest):
+def prim_steps(nodes, edges, start_node: str = None, detail: int = COMPARISON):
+    return as_step_list(prim_iter(nodes, edges, start_node, detail))
+
+
+GRAPH_ALGORITHMS = ["bfs", "dfs", "dijkstra", "kruskal", "prim"]
+
+
+def graph_trace(algorithm: str, request: GraphRequest):
+    """Yield the steps for a graph request and return the response result fields"""
     start = request.start_node or (request.nodes[0].id if request.nodes else None)
+    detail = detail_level(request)
     
     if algorithm == "bfs":
-        steps, result = bfs_steps(request.nodes, request.edges, start)
-        return GraphResponse(algorithm=algorithm, steps=steps, result=result)
+        result = yield from bfs_iter(request.nodes, request.edges, start, detail)
+        return {"result": result}
     elif algorithm == "dfs":
-        steps, result = dfs_steps(request.nodes, request.edges, start)
-        return GraphResponse(algorithm=algorithm, steps=steps, result=result)
+        result = yield from dfs_iter(request.nodes, request.edges, start, detail)
+        return {"result": result}
     elif algorithm == "dijkstra":
-        steps, path, cost = dijkstra_steps(request.nodes, request.edges, start, request.end_node)
-        return GraphResponse(algorithm=algorithm, steps=steps, result=path, total_cost=cost)
+        path, cost = yield from dijkstra_iter(request.nodes, request.edges, start, request.end_node, detail)
+        return {"result": path, "total_cost": cost}
     elif algorithm == "kruskal":
-        steps, _, cost = kruskal_steps(request.nodes, request.edges)
-        return GraphResponse(algorithm=algorithm, steps=steps, total_cost=cost)
+        _, cost = yield from kruskal_iter(request.nodes, request.edges, detail)
+        return {"total_cost": cost}
     elif algorithm == "prim":
-        steps, _, cost = prim_steps(request.nodes, request.edges, start)
-        return GraphResponse(algorithm=algorithm, steps=steps, total_cost=cost)
-    return {"error": f"Unknown algorithm: {algorithm}"}
+        _, cost = yield from prim_iter(request.nodes, request.edges, start, detail)
+        return {"total_cost": cost}
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+def render_graph(algorithm: str, request: GraphRequest, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Run a graph request and serialize the response body"""
+    steps, summary = collect(graph_trace(algorithm, request))
+    return encode_trace(GraphResponse, steps, media_type, algorithm=algorithm, **summary)
+
+
+@router.post("/{algorithm}", response_model=GraphResponse)
+async def execute_graph_algorithm(algorithm: str, request: GraphRequest, http_request: Request):
+    if algorithm not in GRAPH_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await cached_response("graph", algorithm, request, render_graph, http_request)
+
+
+@router.post("/{algorithm}/stream")
+async def stream_graph_algorithm(algorithm: str, request: GraphRequest, http_request: Request):
+    if algorithm not in GRAPH_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return stream_trace(algorithm, graph_trace(algorithm, request), sse=wants_sse(http_request))
+
+
+@router.post("/{algorithm}/session", response_model=TraceSessionInfo)
+async def open_graph_algorithm_session(algorithm: str, request: GraphRequest, http_request: Request):
+    if algorithm not in GRAPH_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await open_session("graph", algorithm, request, http_request, build_json_pages, graph_trace)
 
 
 @router.get("/")
 async def list_graph_algorithms():
-    return {"algorithms": ["bfs", "dfs", "dijkstra", "kruskal", "prim"]}
+    return {"algorithms": GRAPH_ALGORITHMS}
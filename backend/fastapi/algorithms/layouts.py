@@ -0,0 +1,173 @@
+"""Cache-friendly layouts of sorted values for the ``eytzinger`` and ``btree`` searches.
+
+Binary search over a sorted array probes positions n/2, n/4 or 3n/4, ...:
+past the first few levels every probe lands on a different cache line, far
+from the last one. These layouts store the same values in the order the
+search visits them:
+
+    eytzinger  the implicit binary search tree in BFS order: node k's
+               children are 2k + 1 and 2k + 2, so the top levels share a
+               few cache lines and each level is contiguous
+    btree      an implicit B-tree (S-tree) of ``BTREE_KEYS`` keys per node,
+               one 64-byte block of int64 keys: node k's children are
+               k·(B + 1) + i + 1, so a search reads one block per level
+               and log_(B+1)(n) blocks in all
+
+Both are built from the sorted values in O(n) array operations, one per
+tree level. ``ranks`` maps each slot back to its position in the sorted
+values; the B-tree's last node is padded with the largest value (ranked as
+the last position), which keeps every node sorted. Layouts of a registered
+dataset are built once per worker process and kept in an LRU bounded by
+``LAYOUT_CACHE_MAX_BYTES``.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+import numpy as np
+
+# int64 keys per 64-byte cache line
+BLOCK_KEYS = 8
+BTREE_KEYS = BLOCK_KEYS
+
+EntryT = TypeVar("EntryT")
+
+LAYOUT_CACHE_MAX_BYTES = int(os.getenv("LAYOUT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+
+class Layout:
+    """Sorted values rearranged for search: ``keys[slot]`` is the value ranked ``ranks[slot]``"""
+
+    __slots__ = ("name", "keys", "ranks")
+
+    def __init__(self, name: str, keys: np.ndarray, ranks: np.ndarray):
+        self.name = name
+        self.keys = keys
+        self.ranks = ranks
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.ranks.nbytes
+
+
+def eytzinger_layout(values: np.ndarray) -> Layout:
+    """BFS order of the implicit binary search tree over ``values``"""
+    n = len(values)
+    size = np.zeros(n, dtype=np.int64)
+    levels = [(first, min(2 * first + 1, n)) for first in (2 ** d - 1 for d in range(n.bit_length()))]
+    # Subtree sizes, deepest level first
+    for first, end in reversed(levels):
+        nodes = np.arange(first, end)
+        size[first:end] = 1
+        for child in (2 * nodes + 1, 2 * nodes + 2):
+            inside = child < n
+            size[first:end][inside] += size[child[inside]]
+    # In-order rank: the nodes before a subtree's first position, then its left subtree
+    ranks = np.zeros(n, dtype=np.int64)
+    start = np.zeros(n, dtype=np.int64)
+    for first, end in levels:
+        nodes = np.arange(first, end)
+        left, right = 2 * nodes + 1, 2 * nodes + 2
+        left_size = np.where(left < n, size[np.minimum(left, n - 1)], 0)
+        ranks[first:end] = start[first:end] + left_size
+        start[left[left < n]] = start[first:end][left < n]
+        start[right[right < n]] = ranks[first:end][right < n] + 1
+    return Layout("eytzinger", values[ranks], ranks)
+
+
+def btree_layout(values: np.ndarray) -> Layout:
+    """Slots of the implicit B-tree over ``values``, ``BTREE_KEYS`` per node (padding after the last value)"""
+    n, keys_per_node = len(values), BTREE_KEYS
+    fanout = keys_per_node + 1
+    nodes = -(-n // keys_per_node)
+    levels = []
+    first = 0
+    while first < nodes:
+        levels.append((first, min(first * fanout + 1, nodes)))
+        first = first * fanout + 1
+    # Slots per subtree, deepest level first
+    size = np.zeros(nodes, dtype=np.int64)
+    for first, end in reversed(levels):
+        children = np.arange(first, end)[:, None] * fanout + np.arange(1, fanout + 1)
+        inside = children < nodes
+        size[first:end] = keys_per_node + np.where(inside, size[np.minimum(children, nodes - 1)], 0).sum(axis=1)
+    # Slot i of a node comes after its children 0..i and keys 0..i-1 in order
+    ranks = np.zeros((nodes, keys_per_node), dtype=np.int64)
+    start = np.zeros(nodes, dtype=np.int64)
+    for first, end in levels:
+        children = np.arange(first, end)[:, None] * fanout + np.arange(fanout)
+        children += 1
+        inside = children < nodes
+        child_size = np.where(inside, size[np.minimum(children, nodes - 1)], 0)
+        before = np.cumsum(child_size, axis=1) + np.arange(fanout)
+        ranks[first:end] = start[first:end, None] + before[:, :keys_per_node]
+        child_start = start[first:end, None] + before - child_size
+        start[children[inside]] = child_start[inside]
+    ranks = np.minimum(ranks.reshape(-1), n - 1)
+    return Layout("btree", values[ranks], ranks)
+
+
+LAYOUT_BUILDERS: dict[str, Callable[[np.ndarray], Layout]] = {
+    "eytzinger": eytzinger_layout,
+    "btree": btree_layout,
+}
+
+
+class LayoutCache:
+    """Byte-bounded LRU of structures built from a dataset's sorted values, keyed on (kind, dataset id).
+
+    Entries are Layouts, or anything else with an ``nbytes`` (the binary
+    search decision trees of ``algorithms/decision_tree.py``).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+    def get(self, key: tuple[str, str]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple[str, str], entry: Any) -> None:
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._entries[key] = entry
+            self.bytes += entry.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+
+    def get_or_build(self, key: tuple[str, str], build: Callable[[], EntryT]) -> EntryT:
+        entry = self.get(key)
+        if entry is None:
+            entry = build()
+            self.put(key, entry)
+        return entry
+
+
+layout_cache = LayoutCache(LAYOUT_CACHE_MAX_BYTES)
+
+
+def key_array(values: Sequence[int]) -> np.ndarray:
+    """``values`` as int64, or as Python ints in an object array when they do not fit"""
+    try:
+        return np.asarray(values, dtype=np.int64)
+    except OverflowError:
+        return np.asarray(values, dtype=object)
+
+
+def search_layout(name: str, values: Sequence[int], dataset_id: Optional[str] = None) -> Layout:
+    """The ``name`` layout of the sorted ``values``, cached when they are a registered dataset's"""
+    if dataset_id is None:
+        return LAYOUT_BUILDERS[name](key_array(values))
+    return layout_cache.get_or_build((name, dataset_id), lambda: LAYOUT_BUILDERS[name](key_array(values)))
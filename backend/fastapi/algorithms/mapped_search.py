@@ -0,0 +1,209 @@
+"""Searching a memory-mapped sorted file (``POST /api/v1/searching/{algorithm}/mapped``).
+
+The step generators of ``algorithms/searching.py`` snapshot the whole
+array in every step, which a mapped file of 100M values rules out. These
+run the same probe sequences of binary, jump, interpolation and
+exponential search directly on the map (``services/mapped.py``) and yield
+``ProbeRecord`` steps that carry only the index and value read, the search
+range and the page the read fell in. A ``PageReader`` does every read, so
+``reads`` and ``pages`` also count the reads no step shows (interpolation's
+range-end checks, the jumps below the step's detail level).
+"""
+import math
+from typing import Callable, Generator, Optional
+
+import numpy as np
+
+from models.records import ProbeRecord
+from services.detail import COMPARISON, OPERATION, PASS
+from services.mapped import PAGE_SIZE
+
+
+class PageReader:
+    """Reads values from a mapped array, tracking the pages they fall in"""
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self.offset = getattr(array, "offset", 0)
+        self.itemsize = array.dtype.itemsize
+        self.reads = 0
+        self.pages: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def page(self, index: int) -> int:
+        return (self.offset + index * self.itemsize) // PAGE_SIZE
+
+    def read(self, index: int) -> int:
+        self.reads += 1
+        self.pages.add(self.page(index))
+        return int(self.array[index])
+
+    def probe(self, index: int, value: int, left: Optional[int], right: Optional[int], description: str,
+              found: bool = False) -> ProbeRecord:
+        """The step for a read of ``index``"""
+        return ProbeRecord(index=index, value=value, left=left, right=right, page=self.page(index),
+                           pages=len(self.pages), found=found, description=description)
+
+    def status(self, description: str, left: Optional[int] = None, right: Optional[int] = None) -> ProbeRecord:
+        """A step that reads nothing"""
+        return ProbeRecord(left=left, right=right, pages=len(self.pages), description=description)
+
+
+def mapped_binary_iter(reader: PageReader, target: int,
+                       detail: int = COMPARISON) -> Generator[ProbeRecord, None, tuple[bool, Optional[int]]]:
+    left, right = 0, len(reader) - 1
+    if detail >= PASS:
+        yield reader.status(f"Binary search over {len(reader)} mapped values for {target}", left, right)
+
+    while left <= right:
+        mid = (left + right) // 2
+        value = reader.read(mid)
+        if detail >= COMPARISON:
+            yield reader.probe(mid, value, left, right, f"Checking middle: index {mid} = {value}")
+        if value == target:
+            if detail >= PASS:
+                yield reader.probe(mid, value, left, right, f"Found {target} at index {mid}!", found=True)
+            return True, mid
+        if detail >= OPERATION:
+            half = "right" if value < target else "left"
+            yield reader.probe(mid, value, left, right,
+                               f"{value} {'<' if value < target else '>'} {target}, searching {half} half")
+        if value < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+    return False, None
+
+
+def mapped_jump_iter(reader: PageReader, target: int,
+                     detail: int = COMPARISON) -> Generator[ProbeRecord, None, tuple[bool, Optional[int]]]:
+    n = len(reader)
+    step_size = int(math.sqrt(n))
+    if detail >= PASS:
+        yield reader.status(f"Jump search over {n} mapped values with step size {step_size} for {target}", 0, n - 1)
+
+    prev, step = 0, step_size
+    while True:
+        end = min(step, n) - 1
+        value = reader.read(end)
+        if value >= target:
+            break
+        if detail >= OPERATION:
+            yield reader.probe(end, value, prev, end, f"Jumping: {value} < {target}")
+        prev = step
+        step += step_size
+        if prev >= n:
+            return False, None
+
+    block_end = min(step, n) - 1
+    if detail >= OPERATION:
+        yield reader.status(f"Linear search in block [{prev}:{block_end}]", prev, block_end)
+    for index in range(prev, block_end + 1):
+        value = reader.read(index)
+        if detail >= COMPARISON:
+            yield reader.probe(index, value, prev, block_end, f"Checking index {index}: {value}")
+        if value == target:
+            if detail >= PASS:
+                yield reader.probe(index, value, prev, block_end, f"Found {target} at index {index}!", found=True)
+            return True, index
+    return False, None
+
+
+def mapped_interpolation_iter(reader: PageReader, target: int,
+                              detail: int = COMPARISON) -> Generator[ProbeRecord, None, tuple[bool, Optional[int]]]:
+    low, high = 0, len(reader) - 1
+    if detail >= PASS:
+        yield reader.status(f"Interpolation search over {len(reader)} mapped values for {target}", low, high)
+
+    while low <= high:
+        low_value = reader.read(low)
+        if target < low_value:
+            break
+        high_value = reader.read(high)
+        if target > high_value:
+            break
+        if low == high or low_value == high_value:
+            if low_value == target:
+                if detail >= PASS:
+                    yield reader.probe(low, low_value, low, high, f"Found {target} at index {low}!", found=True)
+                return True, low
+            break
+
+        pos = low + (target - low_value) * (high - low) // (high_value - low_value)
+        value = reader.read(pos)
+        if detail >= COMPARISON:
+            yield reader.probe(pos, value, low, high, f"Interpolated position: {pos}, value: {value}")
+        if value == target:
+            if detail >= PASS:
+                yield reader.probe(pos, value, low, high, f"Found {target} at index {pos}!", found=True)
+            return True, pos
+        if value < target:
+            low = pos + 1
+        else:
+            high = pos - 1
+    return False, None
+
+
+def mapped_exponential_iter(reader: PageReader, target: int,
+                            detail: int = COMPARISON) -> Generator[ProbeRecord, None, tuple[bool, Optional[int]]]:
+    n = len(reader)
+    value = reader.read(0)
+    if value == target:
+        if detail >= PASS:
+            yield reader.probe(0, value, 0, 0, f"Found {target} at index 0!", found=True)
+        return True, 0
+    if detail >= PASS:
+        yield reader.status(f"Exponential search over {n} mapped values: finding range for {target}", 0, n - 1)
+
+    i = 1
+    while i < n:
+        value = reader.read(i)
+        if value > target:
+            break
+        if detail >= OPERATION:
+            yield reader.probe(i, value, i // 2, i, f"Exponential jump to index {i}: {value}")
+        i *= 2
+
+    left, right = i // 2, min(i, n - 1)
+    if detail >= OPERATION:
+        yield reader.status(f"Binary search in range [{left}:{right}]", left, right)
+    while left <= right:
+        mid = (left + right) // 2
+        value = reader.read(mid)
+        if detail >= COMPARISON:
+            yield reader.probe(mid, value, left, right, f"Checking middle: index {mid} = {value}")
+        if value == target:
+            if detail >= PASS:
+                yield reader.probe(mid, value, left, right, f"Found {target} at index {mid}!", found=True)
+            return True, mid
+        if value < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+    return False, None
+
+
+MAPPED_SEARCH_ITERATORS: dict[str, Callable[[PageReader, int, int], Generator[ProbeRecord, None, tuple]]] = {
+    "binary": mapped_binary_iter,
+    "jump": mapped_jump_iter,
+    "interpolation": mapped_interpolation_iter,
+    "exponential": mapped_exponential_iter,
+}
+
+
+def mapped_trace(algorithm: str, array: np.ndarray, target: int,
+                 detail: int = COMPARISON) -> Generator[ProbeRecord, None, dict]:
+    """Yield the probe steps of ``algorithm`` on a mapped array and return the response result"""
+    reader = PageReader(array)
+    found, found_at = False, None
+    if len(reader) == 0:
+        if detail >= PASS:
+            yield reader.status("Empty file")
+    else:
+        found, found_at = yield from MAPPED_SEARCH_ITERATORS[algorithm](reader, target, detail)
+        if not found and detail >= PASS:
+            yield reader.status(f"{target} not found in file ({reader.reads} reads on "
+                                    f"{len(reader.pages)} page{'s' if len(reader.pages) != 1 else ''})")
+    return {"found": found, "found_at": found_at, "reads": reader.reads, "pages": len(reader.pages)}
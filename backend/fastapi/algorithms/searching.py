@@ -1,276 +1,341 @@
-from fastapi import APIRouter
-from typing import Optional
-from models.schemas import SearchingRequest, SearchingResponse, SearchingStep
+import json
+from functools import partial
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Any, Callable, Generator, Optional
+from algorithms.decision_tree import build_decision_tree, decision_path_iter, decision_tree
+from algorithms.layouts import BLOCK_KEYS, BTREE_KEYS, LAYOUT_BUILDERS, Layout, layout_cache, search_layout
+from algorithms.mapped_search import MAPPED_SEARCH_ITERATORS, mapped_trace
+from algorithms.vectorized_search import BATCH_PROBES, LAYOUT_PROBES, batch_positions, search_arrays
+from models.records import SearchingRecord
+from models.schemas import (
+    MAX_DECISION_TREE_NODES, DatasetInfo, DatasetInput, DecisionTreeRequest, DecisionTreeResponse, GeneratedInput,
+    MappedFileInfo, MappedSearchRequest, MappedSearchResponse,
+    SearchingBatchRequest, SearchingBatchResponse, SearchingBatchTrace,
+    SearchingRequest, SearchingResponse, SearchingStep, TraceSessionInfo
+)
+from services.cache import cached_response
+from services.datasets import Dataset, build_dataset, dataset_store
+from services.detail import COMPARISON, DETAIL_LEVELS, OPERATION, PASS, detail_level
+from services.encoding import JSON_MEDIA_TYPE, PACKED_MEDIA_TYPE, TRACE_MEDIA_TYPES, encode_trace, negotiate
+from services.executor import step_executor
+from services.generators import request_array
+from services.mapped import list_mapped_files, open_mapped
+from services.metrics import label_request, phase
+from services.packed import pack_searching_trace
+from services.sessions import build_packed_pages, open_session
+from services.streaming import as_step_list, collect, stream_trace, wants_sse
 
 router = APIRouter()
 
 
-def linear_search_steps(arr: list[int], target: int) -> tuple[list[SearchingStep], bool, Optional[int]]:
-    """Linear Search with step-by-step visualization data"""
-    steps = []
+def linear_search_iter(arr: list[int], target: int, detail: int = COMPARISON) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Linear Search, yielding visualization steps and returning (found, found_at)"""
     found = False
     found_at = None
     
-    steps.append(SearchingStep(
-        array=arr.copy(),
-        description=f"Searching for {target} in array"
-    ))
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=arr.copy(),
+            description=f"Searching for {target} in array"
+        )
     
     for i, num in enumerate(arr):
-        steps.append(SearchingStep(
-            array=arr.copy(),
-            current=i,
-            description=f"Checking index {i}: {num}"
-        ))
+        if detail >= COMPARISON:
+            yield SearchingRecord(
+                array=arr.copy(),
+                current=i,
+                description=f"Checking index {i}: {num}"
+            )
         
         if num == target:
             found = True
             found_at = i
-            steps.append(SearchingStep(
-                array=arr.copy(),
-                current=i,
-                found=True,
-                description=f"Found {target} at index {i}!"
-            ))
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=arr.copy(),
+                    current=i,
+                    found=True,
+                    description=f"Found {target} at index {i}!"
+                )
             break
     
     if not found:
-        steps.append(SearchingStep(
-            array=arr.copy(),
-            found=False,
-            description=f"{target} not found in array"
-        ))
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=arr.copy(),
+                found=False,
+                description=f"{target} not found in array"
+            )
     
-    return steps, found, found_at
+    return found, found_at
 
 
-def binary_search_steps(arr: list[int], target: int) -> tuple[list[SearchingStep], bool, Optional[int]]:
-    """Binary Search with step-by-step visualization data"""
-    steps = []
+def linear_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Linear Search with step-by-step visualization data"""
+    return as_step_list(linear_search_iter(arr, target, detail))
+
+
+def binary_search_iter(arr: list[int], target: int, detail: int = COMPARISON,
+                       presorted: bool = False) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Binary Search, yielding visualization steps and returning (found, found_at)"""
     found = False
     found_at = None
     
     # Sort array first for binary search
-    sorted_arr = sorted(arr)
+    sorted_arr = arr if presorted else sorted(arr)
     n = len(sorted_arr)
     
     if n == 0:
-        return [SearchingStep(array=[], description="Empty array")], False, None
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
     
     left, right = 0, n - 1
     
     # Initial step showing full range
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=left,
-        right=right,
-        description=f"Binary search: left={left}, right={right}. Searching for {target}"
-    ))
-    
-    while left <= right:
-        mid = (left + right) // 2
-        
-        steps.append(SearchingStep(
+    if detail >= PASS:
+        yield SearchingRecord(
             array=sorted_arr.copy(),
             left=left,
             right=right,
-            mid=mid,
-            description=f"Checking middle: index {mid} = {sorted_arr[mid]}"
-        ))
+            description=f"Binary search: left={left}, right={right}. Searching for {target}"
+        )
+    
+    while left <= right:
+        mid = (left + right) // 2
         
-        if sorted_arr[mid] == target:
-            found = True
-            found_at = mid
-            steps.append(SearchingStep(
+        if detail >= COMPARISON:
+            yield SearchingRecord(
                 array=sorted_arr.copy(),
                 left=left,
                 right=right,
                 mid=mid,
-                found=True,
-                description=f"Found {target} at index {mid}!"
-            ))
+                description=f"Checking middle: index {mid} = {sorted_arr[mid]}"
+            )
+        
+        if sorted_arr[mid] == target:
+            found = True
+            found_at = mid
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=left,
+                    right=right,
+                    mid=mid,
+                    found=True,
+                    description=f"Found {target} at index {mid}!"
+                )
             break
         elif sorted_arr[mid] < target:
-            steps.append(SearchingStep(
-                array=sorted_arr.copy(),
-                left=left,
-                right=right,
-                mid=mid,
-                description=f"{sorted_arr[mid]} < {target}, searching right half"
-            ))
+            if detail >= OPERATION:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=left,
+                    right=right,
+                    mid=mid,
+                    description=f"{sorted_arr[mid]} < {target}, searching right half"
+                )
             left = mid + 1
         else:
-            steps.append(SearchingStep(
-                array=sorted_arr.copy(),
-                left=left,
-                right=right,
-                mid=mid,
-                description=f"{sorted_arr[mid]} > {target}, searching left half"
-            ))
+            if detail >= OPERATION:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=left,
+                    right=right,
+                    mid=mid,
+                    description=f"{sorted_arr[mid]} > {target}, searching left half"
+                )
             right = mid - 1
     
     if not found:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            found=False,
-            description=f"{target} not found in array"
-        ))
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                found=False,
+                description=f"{target} not found in array"
+            )
     
-    return steps, found, found_at
+    return found, found_at
 
 
-def jump_search_steps(arr: list[int], target: int) -> tuple[list[SearchingStep], bool, Optional[int]]:
-    """Jump Search with step-by-step visualization data"""
-    steps = []
+def binary_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Binary Search with step-by-step visualization data"""
+    return as_step_list(binary_search_iter(arr, target, detail))
+
+
+def jump_search_iter(arr: list[int], target: int, detail: int = COMPARISON,
+                     presorted: bool = False) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Jump Search, yielding visualization steps and returning (found, found_at)"""
     found = False
     found_at = None
     
-    sorted_arr = sorted(arr)
+    sorted_arr = arr if presorted else sorted(arr)
     n = len(sorted_arr)
     
     if n == 0:
-        return [SearchingStep(array=[], description="Empty array")], False, None
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
     
     import math
     step_size = int(math.sqrt(n))
     
     # Initial step showing range
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=0,
-        right=n - 1,
-        description=f"Jump search with step size {step_size}. Searching for {target}"
-    ))
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=sorted_arr.copy(),
+            left=0,
+            right=n - 1,
+            description=f"Jump search with step size {step_size}. Searching for {target}"
+        )
     
     prev = 0
     step = step_size
     
     while sorted_arr[min(step, n) - 1] < target:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            left=prev,
-            right=min(step, n) - 1,
-            current=min(step, n) - 1,
-            description=f"Jumping: {sorted_arr[min(step, n) - 1]} < {target}"
-        ))
+        if detail >= OPERATION:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                left=prev,
+                right=min(step, n) - 1,
+                current=min(step, n) - 1,
+                description=f"Jumping: {sorted_arr[min(step, n) - 1]} < {target}"
+            )
         prev = step
         step += step_size
         if prev >= n:
-            steps.append(SearchingStep(
-                array=sorted_arr.copy(),
-                found=False,
-                description=f"{target} not found in array"
-            ))
-            return steps, False, None
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    found=False,
+                    description=f"{target} not found in array"
+                )
+            return False, None
     
     # Found the block
     block_start = prev
     block_end = min(step, n) - 1
     
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=block_start,
-        right=block_end,
-        description=f"Linear search in block [{block_start}:{block_end}]"
-    ))
+    if detail >= OPERATION:
+        yield SearchingRecord(
+            array=sorted_arr.copy(),
+            left=block_start,
+            right=block_end,
+            description=f"Linear search in block [{block_start}:{block_end}]"
+        )
     
     # Linear search in block
     current_pos = block_start
     while current_pos <= block_end:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            left=block_start,
-            right=block_end,
-            current=current_pos,
-            description=f"Checking index {current_pos}: {sorted_arr[current_pos]}"
-        ))
-        
-        if sorted_arr[current_pos] == target:
-            found = True
-            found_at = current_pos
-            steps.append(SearchingStep(
+        if detail >= COMPARISON:
+            yield SearchingRecord(
                 array=sorted_arr.copy(),
                 left=block_start,
                 right=block_end,
                 current=current_pos,
-                found=True,
-                description=f"Found {target} at index {current_pos}!"
-            ))
+                description=f"Checking index {current_pos}: {sorted_arr[current_pos]}"
+            )
+        
+        if sorted_arr[current_pos] == target:
+            found = True
+            found_at = current_pos
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=block_start,
+                    right=block_end,
+                    current=current_pos,
+                    found=True,
+                    description=f"Found {target} at index {current_pos}!"
+                )
             break
         current_pos += 1
     
     if not found:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            found=False,
-            description=f"{target} not found in array"
-        ))
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                found=False,
+                description=f"{target} not found in array"
+            )
     
-    return steps, found, found_at
+    return found, found_at
 
 
-def interpolation_search_steps(arr: list[int], target: int) -> tuple[list[SearchingStep], bool, Optional[int]]:
-    """Interpolation Search with step-by-step visualization data"""
-    steps = []
+def jump_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Jump Search with step-by-step visualization data"""
+    return as_step_list(jump_search_iter(arr, target, detail))
+
+
+def interpolation_search_iter(arr: list[int], target: int, detail: int = COMPARISON,
+                              presorted: bool = False) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Interpolation Search, yielding visualization steps and returning (found, found_at)"""
     found = False
     found_at = None
     
-    sorted_arr = sorted(arr)
+    sorted_arr = arr if presorted else sorted(arr)
     n = len(sorted_arr)
     
     if n == 0:
-        return [SearchingStep(array=[], description="Empty array")], False, None
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
     
     low, high = 0, n - 1
     
     # Initial step showing range
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=low,
-        right=high,
-        description=f"Interpolation search: low={low}, high={high}. Searching for {target}"
-    ))
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=sorted_arr.copy(),
+            left=low,
+            right=high,
+            description=f"Interpolation search: low={low}, high={high}. Searching for {target}"
+        )
     
     while low <= high and target >= sorted_arr[low] and target <= sorted_arr[high]:
-        if low == high:
+        # Equal ends (a single position, or a run of the target) would divide by zero below
+        if low == high or sorted_arr[low] == sorted_arr[high]:
             if sorted_arr[low] == target:
                 found = True
                 found_at = low
-                steps.append(SearchingStep(
-                    array=sorted_arr.copy(),
-                    left=low,
-                    right=high,
-                    current=low,
-                    found=True,
-                    description=f"Found {target} at index {low}!"
-                ))
+                if detail >= PASS:
+                    yield SearchingRecord(
+                        array=sorted_arr.copy(),
+                        left=low,
+                        right=high,
+                        current=low,
+                        found=True,
+                        description=f"Found {target} at index {low}!"
+                    )
             break
         
         # Interpolation formula
         pos = low + ((target - sorted_arr[low]) * (high - low) // 
                      (sorted_arr[high] - sorted_arr[low]))
         
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            left=low,
-            right=high,
-            mid=pos,
-            current=pos,
-            description=f"Interpolated position: {pos}, value: {sorted_arr[pos]}"
-        ))
-        
-        if sorted_arr[pos] == target:
-            found = True
-            found_at = pos
-            steps.append(SearchingStep(
+        if detail >= COMPARISON:
+            yield SearchingRecord(
                 array=sorted_arr.copy(),
                 left=low,
                 right=high,
                 mid=pos,
                 current=pos,
-                found=True,
-                description=f"Found {target} at index {pos}!"
-            ))
+                description=f"Interpolated position: {pos}, value: {sorted_arr[pos]}"
+            )
+        
+        if sorted_arr[pos] == target:
+            found = True
+            found_at = pos
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=low,
+                    right=high,
+                    mid=pos,
+                    current=pos,
+                    found=True,
+                    description=f"Found {target} at index {pos}!"
+                )
             break
         elif sorted_arr[pos] < target:
             low = pos + 1
@@ -278,91 +343,107 @@ def interpolation_search_steps(arr: list[int], target: int) -> tuple[list[Search
             high = pos - 1
     
     if not found:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            found=False,
-            description=f"{target} not found in array"
-        ))
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                found=False,
+                description=f"{target} not found in array"
+            )
     
-    return steps, found, found_at
+    return found, found_at
 
 
-def exponential_search_steps(arr: list[int], target: int) -> tuple[list[SearchingStep], bool, Optional[int]]:
-    """Exponential Search with step-by-step visualization data"""
-    steps = []
+def interpolation_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Interpolation Search with step-by-step visualization data"""
+    return as_step_list(interpolation_search_iter(arr, target, detail))
+
+
+def exponential_search_iter(arr: list[int], target: int, detail: int = COMPARISON,
+                            presorted: bool = False) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Exponential Search, yielding visualization steps and returning (found, found_at)"""
     found = False
     found_at = None
     
-    sorted_arr = sorted(arr)
+    sorted_arr = arr if presorted else sorted(arr)
     n = len(sorted_arr)
     
     if n == 0:
-        return [SearchingStep(array=[], description="Empty array")], False, None
-    
-    # Initial step
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=0,
-        right=n - 1,
-        description=f"Exponential search: finding range for {target}"
-    ))
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
     
+    # A hit at index 0 is reported on its own, without the range-finding intro
     if sorted_arr[0] == target:
-        return [SearchingStep(
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                left=0,
+                right=0,
+                mid=0,
+                current=0,
+                found=True,
+                description=f"Found {target} at index 0!"
+            )
+        return True, 0
+    
+    # Initial step
+    if detail >= PASS:
+        yield SearchingRecord(
             array=sorted_arr.copy(),
             left=0,
-            right=0,
-            mid=0,
-            current=0,
-            found=True,
-            description=f"Found {target} at index 0!"
-        )], True, 0
+            right=n - 1,
+            description=f"Exponential search: finding range for {target}"
+        )
     
     # Find range for binary search
     i = 1
     while i < n and sorted_arr[i] <= target:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            left=i // 2,
-            right=min(i, n - 1),
-            current=i,
-            description=f"Exponential jump to index {i}: {sorted_arr[i]}"
-        ))
+        if detail >= OPERATION:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                left=i // 2,
+                right=min(i, n - 1),
+                current=i,
+                description=f"Exponential jump to index {i}: {sorted_arr[i]}"
+            )
         i *= 2
     
     # Binary search in range
     left = i // 2
     right = min(i, n - 1)
     
-    steps.append(SearchingStep(
-        array=sorted_arr.copy(),
-        left=left,
-        right=right,
-        description=f"Binary search in range [{left}:{right}]"
-    ))
-    
-    while left <= right:
-        mid = (left + right) // 2
-        
-        steps.append(SearchingStep(
+    if detail >= OPERATION:
+        yield SearchingRecord(
             array=sorted_arr.copy(),
             left=left,
             right=right,
-            mid=mid,
-            description=f"Checking middle: index {mid} = {sorted_arr[mid]}"
-        ))
+            description=f"Binary search in range [{left}:{right}]"
+        )
+    
+    while left <= right:
+        mid = (left + right) // 2
         
-        if sorted_arr[mid] == target:
-            found = True
-            found_at = mid
-            steps.append(SearchingStep(
+        if detail >= COMPARISON:
+            yield SearchingRecord(
                 array=sorted_arr.copy(),
                 left=left,
                 right=right,
                 mid=mid,
-                found=True,
-                description=f"Found {target} at index {mid}!"
-            ))
+                description=f"Checking middle: index {mid} = {sorted_arr[mid]}"
+            )
+        
+        if sorted_arr[mid] == target:
+            found = True
+            found_at = mid
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=sorted_arr.copy(),
+                    left=left,
+                    right=right,
+                    mid=mid,
+                    found=True,
+                    description=f"Found {target} at index {mid}!"
+                )
             break
         elif sorted_arr[mid] < target:
             left = mid + 1
@@ -370,13 +451,201 @@ def exponential_search_steps(arr: list[int], target: int) -> tuple[list[Searchin
             right = mid - 1
     
     if not found:
-        steps.append(SearchingStep(
-            array=sorted_arr.copy(),
-            found=False,
-            description=f"{target} not found in array"
-        ))
+        if detail >= PASS:
+            yield SearchingRecord(
+                array=sorted_arr.copy(),
+                found=False,
+                description=f"{target} not found in array"
+            )
+    
+    return found, found_at
+
+
+def exponential_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Exponential Search with step-by-step visualization data"""
+    return as_step_list(exponential_search_iter(arr, target, detail))
+
+
+def eytzinger_search_iter(arr: list[int], target: int, detail: int = COMPARISON, presorted: bool = False,
+                          layout: Optional[Layout] = None) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """Eytzinger Search, yielding visualization steps and returning (found, found_at).
+    
+    Steps show the Eytzinger layout (``layout``, or one built from the
+    sorted ``arr``); ``current``/``mid`` is the probed slot, ``left``/``right``
+    the cache line it sits in, and found_at is the position in sorted order.
+    """
+    if layout is None:
+        layout = search_layout("eytzinger", arr if presorted else sorted(arr))
+    keys, n = layout.keys, len(layout.keys)
     
-    return steps, found, found_at
+    if n == 0:
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
+    
+    # The layout is never modified, so every step shares one copy
+    shown = keys.tolist() if detail >= PASS else None
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=shown,
+            left=0,
+            right=n - 1,
+            description=f"Eytzinger search for {target}: slot k has children 2k+1 and 2k+2, "
+                        f"{BLOCK_KEYS} slots per cache line"
+        )
+    
+    k, blocks, last_block = 0, 0, None
+    while k < n:
+        value = keys.item(k)
+        block = k // BLOCK_KEYS
+        new_block = block != last_block
+        if new_block:
+            blocks += 1
+            last_block = block
+        if detail >= PASS:
+            first, last = block * BLOCK_KEYS, min(block * BLOCK_KEYS + BLOCK_KEYS, n) - 1
+        
+        if detail >= COMPARISON:
+            touched = f"reads block {block}" if new_block else f"block {block} already read"
+            yield SearchingRecord(
+                array=shown,
+                current=k,
+                left=first,
+                right=last,
+                mid=k,
+                description=f"Checking slot {k} = {value} ({touched}, slots {first}-{last})"
+            )
+        
+        if value == target:
+            found_at = int(layout.ranks[k])
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=shown,
+                    current=k,
+                    left=first,
+                    right=last,
+                    mid=k,
+                    found=True,
+                    description=f"Found {target} at slot {k}, index {found_at} in sorted order, "
+                                f"after {blocks} block{'s' if blocks != 1 else ''}"
+                )
+            return True, found_at
+        child = 2 * k + 2 if value < target else 2 * k + 1
+        if detail >= OPERATION:
+            yield SearchingRecord(
+                array=shown,
+                current=k,
+                left=first,
+                right=last,
+                mid=k,
+                description=f"{value} {'<' if value < target else '>'} {target}, "
+                            f"going to {'right' if value < target else 'left'} child slot {child}"
+            )
+        k = child
+    
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=shown,
+            found=False,
+            description=f"{target} not found in array ({blocks} block{'s' if blocks != 1 else ''} read)"
+        )
+    return False, None
+
+
+def eytzinger_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """Eytzinger Search with step-by-step visualization data"""
+    return as_step_list(eytzinger_search_iter(arr, target, detail))
+
+
+def btree_search_iter(arr: list[int], target: int, detail: int = COMPARISON, presorted: bool = False,
+                      layout: Optional[Layout] = None) -> Generator[SearchingRecord, None, tuple[bool, Optional[int]]]:
+    """B-tree (S-tree) Search, yielding visualization steps and returning (found, found_at).
+    
+    Steps show the B-tree layout, one node of ``BTREE_KEYS`` keys per cache
+    line; ``left``/``right`` is the node read and ``mid`` its first key not
+    below the target. found_at is the position in sorted order.
+    """
+    if layout is None:
+        layout = search_layout("btree", arr if presorted else sorted(arr))
+    keys, size = layout.keys, len(layout.keys)
+    nodes = size // BTREE_KEYS
+    
+    if size == 0:
+        if detail >= PASS:
+            yield SearchingRecord(array=[], description="Empty array")
+        return False, None
+    
+    shown = keys.tolist() if detail >= PASS else None
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=shown,
+            left=0,
+            right=size - 1,
+            description=f"B-tree search for {target}: {nodes} nodes of {BTREE_KEYS} keys, "
+                        f"node k has children k·{BTREE_KEYS + 1}+1 to k·{BTREE_KEYS + 1}+{BTREE_KEYS + 1}"
+        )
+    
+    k, blocks = 0, 0
+    while k < nodes:
+        first, last = k * BTREE_KEYS, k * BTREE_KEYS + BTREE_KEYS - 1
+        node = keys[first:last + 1].tolist()
+        blocks += 1
+        i = 0
+        while i < BTREE_KEYS and node[i] < target:
+            i += 1
+        slot = first + i if i < BTREE_KEYS else None
+        
+        if detail >= COMPARISON:
+            yield SearchingRecord(
+                array=shown,
+                current=slot,
+                left=first,
+                right=last,
+                mid=slot,
+                description=f"Reading block {k} (slots {first}-{last}): "
+                            + (f"first key ≥ {target} is slot {slot} = {node[i]}" if slot is not None
+                               else f"every key < {target}")
+            )
+        
+        if slot is not None and node[i] == target:
+            found_at = int(layout.ranks[slot])
+            if detail >= PASS:
+                yield SearchingRecord(
+                    array=shown,
+                    current=slot,
+                    left=first,
+                    right=last,
+                    mid=slot,
+                    found=True,
+                    description=f"Found {target} at slot {slot}, index {found_at} in sorted order, "
+                                f"after {blocks} block{'s' if blocks != 1 else ''}"
+                )
+            return True, found_at
+        child = k * (BTREE_KEYS + 1) + i + 1
+        if detail >= OPERATION:
+            yield SearchingRecord(
+                array=shown,
+                current=slot,
+                left=first,
+                right=last,
+                mid=slot,
+                description=f"Descending to child {i} of block {k}: block {child}"
+                            + ("" if child < nodes else " (past the last block)")
+            )
+        k = child
+    
+    if detail >= PASS:
+        yield SearchingRecord(
+            array=shown,
+            found=False,
+            description=f"{target} not found in array ({blocks} block{'s' if blocks != 1 else ''} read)"
+        )
+    return False, None
+
+
+def btree_search_steps(arr: list[int], target: int, detail: int = COMPARISON) -> tuple[list[SearchingStep], bool, Optional[int]]:
+    """B-tree Search with step-by-step visualization data"""
+    return as_step_list(btree_search_iter(arr, target, detail))
 
 
 SEARCHING_ALGORITHMS = {
@@ -385,25 +654,273 @@ SEARCHING_ALGORITHMS = {
     "jump": jump_search_steps,
     "interpolation": interpolation_search_steps,
     "exponential": exponential_search_steps,
+    "eytzinger": eytzinger_search_steps,
+    "btree": btree_search_steps,
+}
+
+
+SEARCHING_ITERATORS = {
+    "linear": linear_search_iter,
+    "binary": binary_search_iter,
+    "jump": jump_search_iter,
+    "interpolation": interpolation_search_iter,
+    "exponential": exponential_search_iter,
+    "eytzinger": eytzinger_search_iter,
+    "btree": btree_search_iter,
 }
 
 
+# Searches that sort their input first, and skip that on a dataset's already sorted values
+SORTED_INPUT_ALGORITHMS = ("binary", "jump", "interpolation", "exponential", "eytzinger", "btree")
+
+# Searches over a layout of the sorted values, built once per dataset (algorithms/layouts.py)
+LAYOUT_ALGORITHMS = tuple(LAYOUT_BUILDERS)
+
+
+def dataset_options(algorithm: str, dataset: Dataset) -> dict:
+    """Iterator options for searching a dataset: skip the sort, reuse its cached layout"""
+    options = {"presorted": True} if algorithm in SORTED_INPUT_ALGORITHMS else {}
+    if algorithm in LAYOUT_ALGORITHMS:
+        options["layout"] = search_layout(algorithm, dataset.values, dataset.info.dataset_id)
+    return options
+
+
+def searching_trace(algorithm: str, request: SearchingRequest,
+                    dataset: Optional[Dataset] = None) -> Generator[SearchingRecord, None, dict]:
+    """Yield the steps for a searching request and return the response result.
+    
+    ``dataset`` is the registered dataset a ``dataset_id`` request names.
+    """
+    if dataset is not None:
+        arr, options = dataset.values, dataset_options(algorithm, dataset)
+    else:
+        arr, options = request_array(request), {}
+    found, found_at = yield from SEARCHING_ITERATORS[algorithm](arr, request.target, detail_level(request), **options)
+    return {"found": found, "found_at": found_at}
+
+
+def render_searching(algorithm: str, request: SearchingRequest, media_type: str = JSON_MEDIA_TYPE,
+                     dataset: Optional[Dataset] = None) -> bytes:
+    """Run a searching request and serialize the response body"""
+    trace = searching_trace(algorithm, request, dataset)
+    if media_type == PACKED_MEDIA_TYPE:
+        with phase("generation"):
+            return pack_searching_trace(algorithm, trace)
+    steps, summary = collect(trace)
+    return encode_trace(SearchingResponse, steps, media_type, algorithm=algorithm, **summary)
+
+
+def render_batch(algorithm: str, request: SearchingBatchRequest, media_type: str = JSON_MEDIA_TYPE,
+                 dataset: Optional[Dataset] = None) -> bytes:
+    """Worker-side: answer every target of a batch and serialize the SearchingBatchResponse.
+    
+    Results and probe counts come from one vectorized pass over the sorted
+    values; only the traced targets run the step generators. ``algorithm``
+    and ``media_type`` only match the render signature (the body is JSON).
+    """
+    values = dataset.values if dataset is not None else sorted(request_array(request))
+    algorithms = request.algorithms or list(SEARCHING_ALGORITHMS)
+    dataset_id = dataset.info.dataset_id if dataset is not None else None
+    with phase("generation"):
+        sorted_values, targets = search_arrays(values, request.targets)
+        found, first = batch_positions(sorted_values, targets)
+        layouts = {name: search_layout(name, sorted_values, dataset_id) for name in algorithms if name in LAYOUT_ALGORITHMS}
+        probes = {name: (LAYOUT_PROBES[name](layouts[name], targets) if name in layouts
+                         else BATCH_PROBES[name](sorted_values, targets)).tolist() for name in algorithms}
+    
+    traces = []
+    detail = DETAIL_LEVELS[request.detail]
+    for index in request.traced:
+        for name in algorithms:
+            options = {"presorted": True} if name in SORTED_INPUT_ALGORITHMS else {}
+            if name in layouts:
+                options["layout"] = layouts[name]
+            steps, (hit, hit_at) = collect(SEARCHING_ITERATORS[name](values, request.targets[index], detail, **options))
+            traces.append(encode_trace(SearchingBatchTrace, steps, JSON_MEDIA_TYPE, target_index=index,
+                                       algorithm=name, found=hit, found_at=hit_at))
+    
+    with phase("encoding"):
+        found_at = [int(position) if hit else None for hit, position in zip(found.tolist(), first.tolist())]
+        head = json.dumps({"size": len(values), "found": found.tolist(), "found_at": found_at, "probes": probes},
+                          separators=(",", ":"))
+        return b'%s,"traces":[%s]}' % (head[:-1].encode(), b",".join(traces))
+
+
+def render_mapped(algorithm: str, request: MappedSearchRequest, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Worker-side: search the request's mapped file and serialize the MappedSearchResponse"""
+    array = open_mapped(request.file, request.dtype)
+    steps, summary = collect(mapped_trace(algorithm, array, request.target, detail_level(request)))
+    return encode_trace(MappedSearchResponse, steps, media_type, algorithm=algorithm, file=request.file,
+                        size=len(array), **summary)
+
+
+def render_decision_tree(request: DecisionTreeRequest, media_type: str = JSON_MEDIA_TYPE,
+                         dataset: Optional[Dataset] = None) -> bytes:
+    """Walk the request's binary search decision tree for its target and serialize the DecisionTreeResponse.
+    
+    Without ``dataset`` the request's array is sorted and hashed first, so
+    only dataset requests get the O(log n) walk alone.
+    """
+    if dataset is None:
+        dataset = build_dataset(request)
+    tree = decision_tree(dataset.values, dataset.info.dataset_id)
+    steps, (found, found_at) = collect(decision_path_iter(tree, request.target, detail_level(request)))
+    return encode_trace(DecisionTreeResponse, steps, media_type, algorithm="binary", tree_id=dataset.info.dataset_id,
+                        size=len(dataset.values), depth=tree.levels, root=tree.root, found=found, found_at=found_at,
+                        tree=tree.export() if request.include_tree else None)
+
+
+async def cache_in_worker(http_request: Request, key: tuple[str, str], build: Callable[..., Any], *args) -> bool:
+    """Build a missing layout_cache entry (an O(n) layout or tree) in the worker pool; whether it is cached now"""
+    if layout_cache.get(key) is None:
+        layout_cache.put(key, await step_executor.run(http_request, build, *args))
+    return layout_cache.get(key) is not None
+
+
+def request_dataset(request: DatasetInput) -> Optional[Dataset]:
+    """The dataset a request names (None for array and generator requests)"""
+    if request.dataset_id is None:
+        return None
+    dataset = dataset_store.get(request.dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail=f"Dataset not found or evicted: {request.dataset_id}")
+    return dataset
+
+
+# Declared before /{algorithm} so "datasets" and "batch" are not taken for algorithm names
+@router.post("/datasets", response_model=DatasetInfo)
+async def register_dataset(request: GeneratedInput, http_request: Request):
+    """Sort an array (or generated input) once and keep it for searches that name its dataset_id"""
+    label_request(http_request, "searching", "datasets")
+    dataset = await step_executor.run(http_request, build_dataset, request)
+    if dataset.info.nbytes > dataset_store.max_bytes:
+        raise HTTPException(status_code=413, detail=f"Dataset takes {dataset.info.nbytes} bytes, "
+                                                    f"the dataset store holds at most {dataset_store.max_bytes}")
+    return dataset_store.put(dataset).info
+
+
+@router.post("/batch", response_model=SearchingBatchResponse)
+async def search_batch(request: SearchingBatchRequest, http_request: Request):
+    """Search one array for many targets: results and per-algorithm probe counts for all, steps for the traced ones"""
+    unknown = [name for name in request.algorithms or () if name not in SEARCHING_ALGORITHMS]
+    if unknown:
+        available = ", ".join(SEARCHING_ALGORITHMS.keys())
+        raise HTTPException(status_code=422, detail=f"Algorithm not found: {', '.join(unknown)}. Available: {available}")
+    
+    render = partial(render_batch, dataset=request_dataset(request))
+    return await cached_response("searching", "batch", request, render, http_request, (JSON_MEDIA_TYPE,))
+
+
+@router.post("/binary/decision-tree", response_model=DecisionTreeResponse)
+async def search_decision_tree(request: DecisionTreeRequest, http_request: Request):
+    """Binary search as a path through the array's decision tree, built once per content hash"""
+    dataset = request_dataset(request)
+    size = dataset.info.size if dataset is not None else len(request.array) if request.array is not None else request.n
+    if request.include_tree and size > MAX_DECISION_TREE_NODES:
+        raise HTTPException(status_code=422, detail=f"include_tree is limited to {MAX_DECISION_TREE_NODES} values, "
+                                                    f"the array has {size}")
+    
+    label_request(http_request, "searching", "decision-tree")
+    media_type = negotiate(http_request)
+    if dataset is None:
+        content = await step_executor.run(http_request, render_decision_tree, request, media_type)
+    elif await cache_in_worker(http_request, ("decision_tree", dataset.info.dataset_id), build_decision_tree,
+                               dataset.values):
+        # The walk of the cached tree is O(log n): cheaper here than handing the values to a worker
+        content = render_decision_tree(request, media_type, dataset)
+    else:
+        # A tree too large for the layout cache is rebuilt in a worker on every request
+        content = await step_executor.run(http_request, render_decision_tree, request, media_type, dataset)
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+
+@router.get("/files", response_model=list[MappedFileInfo])
+async def list_files():
+    """Sorted files in MAPPED_DATASET_DIR that /{algorithm}/mapped can search"""
+    return list_mapped_files()
+
+
+@router.get("/datasets/{dataset_id}", response_model=DatasetInfo)
+async def get_dataset(dataset_id: str):
+    """Summary of a registered dataset"""
+    dataset = dataset_store.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail=f"Dataset not found or evicted: {dataset_id}")
+    return dataset.info
+
+
+@router.delete("/datasets/{dataset_id}")
+async def delete_dataset(dataset_id: str):
+    """Drop a registered dataset"""
+    if not dataset_store.delete(dataset_id):
+        raise HTTPException(status_code=404, detail=f"Dataset not found or evicted: {dataset_id}")
+    return {"deleted": dataset_id}
+
+
 @router.post("/{algorithm}", response_model=SearchingResponse)
-async def execute_searching(algorithm: str, request: SearchingRequest):
+async def execute_searching(algorithm: str, request: SearchingRequest, http_request: Request):
     """Execute a searching algorithm and return visualization steps"""
     if algorithm not in SEARCHING_ALGORITHMS:
         available = ", ".join(SEARCHING_ALGORITHMS.keys())
         return {"error": f"Algorithm not found. Available: {available}"}
     
-    search_func = SEARCHING_ALGORITHMS[algorithm]
-    steps, found, found_at = search_func(request.array, request.target)
+    dataset = request_dataset(request)
+    if dataset is None:
+        return await cached_response("searching", algorithm, request, render_searching, http_request, TRACE_MEDIA_TYPES)
+    inline = request.trace == "none" and algorithm in SORTED_INPUT_ALGORITHMS
+    if inline and algorithm in LAYOUT_ALGORITHMS:
+        label_request(http_request, "searching", algorithm)
+        # A layout too large for the layout cache is left to a worker like any other search
+        inline = await cache_in_worker(http_request, (algorithm, dataset.info.dataset_id), search_layout, algorithm,
+                                       dataset.values)
+    if inline:
+        # A result-only search of sorted values (or of their cached layout) takes O(log n) probes: cheaper
+        # here than handing the values to a worker
+        label_request(http_request, "searching", algorithm)
+        media_type = negotiate(http_request, TRACE_MEDIA_TYPES)
+        return Response(content=render_searching(algorithm, request, media_type, dataset), media_type=media_type,
+                        headers={"Vary": "Accept"})
+    return await cached_response("searching", algorithm, request, partial(render_searching, dataset=dataset),
+                                 http_request, TRACE_MEDIA_TYPES)
+
+
+@router.post("/{algorithm}/stream")
+async def stream_searching(algorithm: str, request: SearchingRequest, http_request: Request):
+    """Stream searching steps as NDJSON (or SSE) while they are generated, ending with the result"""
+    if algorithm not in SEARCHING_ALGORITHMS:
+        available = ", ".join(SEARCHING_ALGORITHMS.keys())
+        return {"error": f"Algorithm not found. Available: {available}"}
+    
+    return stream_trace(algorithm, searching_trace(algorithm, request, request_dataset(request)),
+                        sse=wants_sse(http_request))
+
+
+@router.post("/{algorithm}/mapped", response_model=MappedSearchResponse)
+async def search_mapped(algorithm: str, request: MappedSearchRequest, http_request: Request):
+    """Search a server-side sorted file through a read-only memory map; steps hold only the probes"""
+    if algorithm not in MAPPED_SEARCH_ITERATORS:
+        available = ", ".join(MAPPED_SEARCH_ITERATORS.keys())
+        raise HTTPException(status_code=422, detail=f"Algorithm not found: {algorithm}. Available: {available}")
+    
+    # Opening the map reads only the file header: bad names and formats fail here rather than in a worker
+    open_mapped(request.file, request.dtype)
+    label_request(http_request, "searching", algorithm)
+    media_type = negotiate(http_request)
+    content = await step_executor.run(http_request, render_mapped, algorithm, request, media_type)
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+
+@router.post("/{algorithm}/session", response_model=TraceSessionInfo)
+async def open_searching_session(algorithm: str, request: SearchingRequest, http_request: Request):
+    """Generate the trace once and keep it server-side for paged reads from /api/v1/traces/{id}/steps"""
+    if algorithm not in SEARCHING_ALGORITHMS:
+        available = ", ".join(SEARCHING_ALGORITHMS.keys())
+        return {"error": f"Algorithm not found. Available: {available}"}
     
-    return SearchingResponse(
-        algorithm=algorithm,
-        steps=steps,
-        found=found,
-        found_at=found_at
-    )
+    dataset = request_dataset(request)
+    render = partial(render_searching, dataset=dataset)
+    build = partial(build_packed_pages, trace=partial(searching_trace, dataset=dataset))
+    return await open_session("searching", algorithm, request, http_request, build, render)
 
 
 @router.get("/")
@@ -417,5 +934,7 @@ async def list_searching_algorithms():
             "jump": "Block-based search, O(√n)",
             "interpolation": "Improved binary for uniform distribution, O(log log n)",
             "exponential": "Exponential range finding + binary search, O(log n)",
+            "eytzinger": "Binary search over a BFS-ordered (Eytzinger) copy, O(log n) with fewer cache misses",
+            "btree": "Search over an implicit B-tree of cache-line nodes, O(log n) in log_9(n) blocks",
         }
     }
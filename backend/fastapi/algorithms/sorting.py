@@ -1,78 +1,121 @@
-from fastapi import APIRouter
-from models.schemas import SortingRequest, SortingResponse, SortingStep
+import asyncio
+import random
+import time
+from functools import partial
+from typing import Generator, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from algorithms.vectorized import VECTORIZED_ITERATORS
+from models.records import SortingRecord
+from models.schemas import (
+    ComplexityProfile, SortingDeltaResponse, SortingRaceEntry, SortingRaceRequest, SortingRaceResponse, SortingRequest,
+    SortingResponse, SortingResultResponse, SortingStep, TraceSessionInfo
+)
+from services.cache import cached_response
+from services.complexity import profile_cache, profile_sizes, profile_sorting, source_version
+from services.delta import encode_sorting_trace
+from services.detail import COMPARISON, OPERATION, PASS, detail_level
+from services.encoding import JSON_MEDIA_TYPE, PACKED_MEDIA_TYPE, TRACE_MEDIA_TYPES, encode_model, encode_trace
+from services.highlights import INDICES, IndexEncoding, highlight_encoding
+from services.executor import step_executor, subtask_pool, subtask_result
+from services.generators import request_array
+from services.metrics import label_request, phase
+from services.packed import pack_sorting_trace
+from services.sessions import build_json_pages, build_packed_pages, open_session
+from services.streaming import as_step_list, collect, stream_trace, wants_sse, with_summary
 
 router = APIRouter()
 
 
-def bubble_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Bubble Sort with step-by-step visualization data"""
-    steps = []
+def _without_result(trace: Generator[SortingRecord, None, tuple[list[int], int, int]]) -> tuple[list[SortingStep], int, int]:
+    """Collect a sorting generator into the (steps, comparisons, swaps) tuple of the *_steps functions"""
+    steps, _, comparisons, swaps = as_step_list(trace)
+    return steps, comparisons, swaps
+
+
+def bubble_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Bubble Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     comparisons = 0
     swaps = 0
     arr = arr.copy()
     n = len(arr)
-    sorted_indices = []
+    sorted_indices = highlights.set()
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
     for i in range(n):
         for j in range(0, n - i - 1):
             comparisons += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[j, j + 1],
-                sorted=sorted_indices.copy(),
-                description=f"Comparing {arr[j]} and {arr[j + 1]}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(j, j + 1),
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Comparing {arr[j]} and {arr[j + 1]}"
+                )
             
             if arr[j] > arr[j + 1]:
                 arr[j], arr[j + 1] = arr[j + 1], arr[j]
                 swaps += 1
-                steps.append(SortingStep(
-                    array=arr.copy(),
-                    swapping=[j, j + 1],
-                    sorted=sorted_indices.copy(),
-                    description=f"Swapping {arr[j + 1]} and {arr[j]}"
-                ))
+                if detail >= OPERATION:
+                    yield SortingRecord(
+                        array=arr.copy(),
+                        swapping=[j, j + 1],
+                        sorted=sorted_indices.snapshot(),
+                        description=f"Swapping {arr[j + 1]} and {arr[j]}"
+                    )
         
-        sorted_indices.append(n - i - 1)
+        sorted_indices.add(n - i - 1)
+        if detail == PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                sorted=sorted_indices.snapshot(),
+                description=f"Pass {i + 1} complete: {arr[n - i - 1]} settled at position {n - i - 1}"
+            )
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(n)),
-        description="Array sorted!"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
     
-    return steps, comparisons, swaps
+    return arr, comparisons, swaps
 
 
-def selection_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Selection Sort with step-by-step visualization data"""
-    steps = []
+def bubble_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Bubble Sort with step-by-step visualization data"""
+    return _without_result(bubble_sort_iter(arr, detail))
+
+
+def selection_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Selection Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     comparisons = 0
     swaps = 0
     arr = arr.copy()
     n = len(arr)
-    sorted_indices = []
+    sorted_indices = highlights.set()
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
     for i in range(n):
         min_idx = i
         for j in range(i + 1, n):
             comparisons += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[min_idx, j],
-                sorted=sorted_indices.copy(),
-                description=f"Finding minimum: comparing {arr[min_idx]} with {arr[j]}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(min_idx, j),
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Finding minimum: comparing {arr[min_idx]} with {arr[j]}"
+                )
             
             if arr[j] < arr[min_idx]:
                 min_idx = j
@@ -80,118 +123,143 @@ def selection_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
         if min_idx != i:
             arr[i], arr[min_idx] = arr[min_idx], arr[i]
             swaps += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                swapping=[i, min_idx],
-                sorted=sorted_indices.copy(),
-                description=f"Swapping minimum {arr[min_idx]} to position {i}"
-            ))
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[i, min_idx],
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Swapping minimum {arr[min_idx]} to position {i}"
+                )
         
-        sorted_indices.append(i)
+        sorted_indices.add(i)
+        if detail == PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                sorted=sorted_indices.snapshot(),
+                description=f"Pass {i + 1} complete: {arr[i]} placed at position {i}"
+            )
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(n)),
-        description="Array sorted!"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
     
-    return steps, comparisons, swaps
+    return arr, comparisons, swaps
 
 
-def insertion_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Insertion Sort with step-by-step visualization data"""
-    steps = []
+def selection_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Selection Sort with step-by-step visualization data"""
+    return _without_result(selection_sort_iter(arr, detail))
+
+
+def insertion_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Insertion Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     comparisons = 0
     swaps = 0
     arr = arr.copy()
     n = len(arr)
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=[0],
-        description="Initial array - first element is trivially sorted"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.indices(0),
+            description="Initial array - first element is trivially sorted"
+        )
     
     for i in range(1, n):
         key = arr[i]
         j = i - 1
+        sorted_prefix = highlights.span(0, i - 1) if detail >= PASS else None
         
-        steps.append(SortingStep(
-            array=arr.copy(),
-            comparing=[i],
-            sorted=list(range(i)),
-            description=f"Inserting {key} into sorted portion"
-        ))
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(i),
+                sorted=sorted_prefix,
+                description=f"Inserting {key} into sorted portion"
+            )
         
         while j >= 0:
             comparisons += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[j, j + 1],
-                sorted=list(range(i)),
-                description=f"Comparing {arr[j]} with {key}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(j, j + 1),
+                    sorted=sorted_prefix,
+                    description=f"Comparing {arr[j]} with {key}"
+                )
             
             if arr[j] > key:
                 arr[j + 1] = arr[j]
                 swaps += 1
-                steps.append(SortingStep(
-                    array=arr.copy(),
-                    swapping=[j, j + 1],
-                    sorted=list(range(i)),
-                    description=f"Shifting {arr[j + 1]} to the right"
-                ))
+                if detail >= OPERATION:
+                    yield SortingRecord(
+                        array=arr.copy(),
+                        swapping=[j, j + 1],
+                        sorted=sorted_prefix,
+                        description=f"Shifting {arr[j + 1]} to the right"
+                    )
                 j -= 1
             else:
                 break
         
         arr[j + 1] = key
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(n)),
-        description="Array sorted!"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
     
-    return steps, comparisons, swaps
+    return arr, comparisons, swaps
 
 
-def merge_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Merge Sort with step-by-step visualization data"""
-    steps = []
+def insertion_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Insertion Sort with step-by-step visualization data"""
+    return _without_result(insertion_sort_iter(arr, detail))
+
+
+def merge_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Merge Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     comparisons = [0]
     swaps = [0]
     arr = arr.copy()
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
-    def merge_sort_recursive(arr, left, right, steps, comparisons, swaps):
+    def merge_sort_recursive(arr, left, right, comparisons, swaps):
         if left < right:
             mid = (left + right) // 2
             
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=list(range(left, mid + 1)),
-                description=f"Dividing: left half [{left}:{mid + 1}]"
-            ))
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.span(left, mid),
+                    description=f"Dividing: left half [{left}:{mid + 1}]"
+                )
             
-            merge_sort_recursive(arr, left, mid, steps, comparisons, swaps)
+            yield from merge_sort_recursive(arr, left, mid, comparisons, swaps)
             
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=list(range(mid + 1, right + 1)),
-                description=f"Dividing: right half [{mid + 1}:{right + 1}]"
-            ))
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.span(mid + 1, right),
+                    description=f"Dividing: right half [{mid + 1}:{right + 1}]"
+                )
             
-            merge_sort_recursive(arr, mid + 1, right, steps, comparisons, swaps)
+            yield from merge_sort_recursive(arr, mid + 1, right, comparisons, swaps)
             
             # Merge
-            merge(arr, left, mid, right, steps, comparisons, swaps)
+            yield from merge(arr, left, mid, right, comparisons, swaps)
     
-    def merge(arr, left, mid, right, steps, comparisons, swaps):
+    def merge(arr, left, mid, right, comparisons, swaps):
         left_arr = arr[left:mid + 1]
         right_arr = arr[mid + 1:right + 1]
         
@@ -200,11 +268,12 @@ def merge_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
         
         while i < len(left_arr) and j < len(right_arr):
             comparisons[0] += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[left + i, mid + 1 + j],
-                description=f"Merging: comparing {left_arr[i]} with {right_arr[j]}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(left + i, mid + 1 + j),
+                    description=f"Merging: comparing {left_arr[i]} with {right_arr[j]}"
+                )
             
             if left_arr[i] <= right_arr[j]:
                 arr[k] = left_arr[i]
@@ -225,209 +294,926 @@ def merge_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
             j += 1
             k += 1
         
-        steps.append(SortingStep(
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                sorted=highlights.span(left, right),
+                description=f"Merged [{left}:{right + 1}]"
+            )
+    
+    yield from merge_sort_recursive(arr, 0, len(arr) - 1, comparisons, swaps)
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, len(arr) - 1),
+            description="Array sorted!"
+        )
+    
+    return arr, comparisons[0], swaps[0]
+
+
+def merge_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Merge Sort with step-by-step visualization data"""
+    return _without_result(merge_sort_iter(arr, detail))
+
+
+# Consecutive wins by one run after which a merge gallops (Timsort's MIN_GALLOP)
+MIN_GALLOP = 7
+
+
+def _gallop(key: int, run: list[int], start: int, end: int, inclusive: bool) -> tuple[int, int]:
+    """How many elements of the sorted run[start:end] go before ``key`` (those <= key if ``inclusive``,
+    else those < key), by exponential then binary search; also returns the comparisons it took"""
+    comparisons = 0
+    known, bound = 0, 1
+    while start + bound - 1 < end:
+        comparisons += 1
+        value = run[start + bound - 1]
+        if not (value <= key if inclusive else value < key):
+            break
+        known, bound = bound, bound * 2
+    lo, hi = start + known, min(start + bound - 1, end)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        comparisons += 1
+        if run[mid] <= key if inclusive else run[mid] < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - start, comparisons
+
+
+def _merge_runs(arr: list[int], aux: list[int], lo: int, mid: int, hi: int, detail: int, highlights: IndexEncoding,
+                gallop: bool, comparisons: list[int], swaps: list[int]) -> Generator[SortingRecord, None, None]:
+    """Stably merge the sorted runs arr[lo:mid] and arr[mid:hi] through the buffer ``aux``.
+
+    Only the left run is copied out; the right run is read where it is and
+    whatever is left of it at the end is already in place. Runs that are
+    already in order cost one comparison and no writes.
+    """
+    comparisons[0] += 1
+    if arr[mid - 1] <= arr[mid]:
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(mid - 1, mid),
+                description=f"Runs [{lo}:{mid}] and [{mid}:{hi}] already in order"
+            )
+        return
+    
+    left_size = mid - lo
+    for t in range(left_size):
+        aux[t] = arr[lo + t]
+    writes = left_size
+    i, j, k = 0, mid, lo
+    left_wins = right_wins = 0
+    
+    while i < left_size and j < hi:
+        comparisons[0] += 1
+        if detail >= COMPARISON:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(lo + i, j),
+                description=f"Merging: comparing {aux[i]} with {arr[j]}"
+            )
+        
+        if aux[i] <= arr[j]:
+            arr[k] = aux[i]
+            i += 1
+            left_wins, right_wins = left_wins + 1, 0
+        else:
+            arr[k] = arr[j]
+            j += 1
+            swaps[0] += 1
+            left_wins, right_wins = 0, right_wins + 1
+        k += 1
+        writes += 1
+        
+        if not gallop or (left_wins < MIN_GALLOP and right_wins < MIN_GALLOP) or i == left_size or j == hi:
+            continue
+        if left_wins:
+            count, probes = _gallop(arr[j], aux, i, left_size, inclusive=True)
+            arr[k:k + count] = aux[i:i + count]
+            i += count
+            side = "left"
+        else:
+            count, probes = _gallop(aux[i], arr, j, hi, inclusive=False)
+            arr[k:k + count] = arr[j:j + count]
+            j += count
+            swaps[0] += count
+            side = "right"
+        comparisons[0] += probes
+        if detail >= OPERATION and count:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.span(k, k + count - 1),
+                description=f"Galloping: {count} elements from the {side} run copied at once ({probes} comparisons)"
+            )
+        k += count
+        writes += count
+        left_wins = right_wins = 0
+    
+    # The rest of the right run is already in place
+    while i < left_size:
+        arr[k] = aux[i]
+        i += 1
+        k += 1
+        writes += 1
+    
+    if detail >= PASS:
+        yield SortingRecord(
             array=arr.copy(),
-            sorted=list(range(left, right + 1)),
-            description=f"Merged [{left}:{right + 1}]"
-        ))
+            sorted=highlights.span(lo, hi - 1),
+            description=f"Merged [{lo}:{mid}] and [{mid}:{hi}] ({writes} writes)"
+        )
+
+
+def merge_bottom_up_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                              gallop: bool = True) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Bottom-up Merge Sort: merges runs of width 1, 2, 4, ... through one preallocated buffer"""
+    comparisons = [0]
+    swaps = [0]
+    arr = arr.copy()
+    n = len(arr)
+    aux = [0] * n
     
-    merge_sort_recursive(arr, 0, len(arr) - 1, steps, comparisons, swaps)
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(len(arr))),
-        description="Array sorted!"
-    ))
+    width = 1
+    while width < n:
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                description=f"Merging runs of width {width}"
+            )
+        for lo in range(0, n - width, 2 * width):
+            yield from _merge_runs(arr, aux, lo, lo + width, min(lo + 2 * width, n), detail, highlights, gallop,
+                                   comparisons, swaps)
+        width *= 2
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
     
-    return steps, comparisons[0], swaps[0]
+    return arr, comparisons[0], swaps[0]
 
 
-def quick_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Quick Sort with step-by-step visualization data"""
-    steps = []
+def merge_bottom_up_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Bottom-up Merge Sort with step-by-step visualization data"""
+    return _without_result(merge_bottom_up_sort_iter(arr, detail))
+
+
+def merge_natural_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                            gallop: bool = True) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Natural Merge Sort: finds the ascending and strictly descending runs already in the input (reversing
+    the descending ones, as Timsort does) and merges neighbouring runs pairwise through one buffer"""
     comparisons = [0]
     swaps = [0]
     arr = arr.copy()
     n = len(arr)
+    aux = [0] * n
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
+    
+    # Start of every run, then n
+    bounds = [0]
+    start = 0
+    while start < n:
+        end = start + 1
+        descending = False
+        if end < n:
+            comparisons[0] += 1
+            descending = arr[end] < arr[end - 1]
+            end += 1
+            while end < n:
+                comparisons[0] += 1
+                if (arr[end] < arr[end - 1]) != descending:
+                    break
+                end += 1
+        if descending:
+            # Strictly descending, so reversing it keeps equal keys in order
+            left, right = start, end - 1
+            while left < right:
+                arr[left], arr[right] = arr[right], arr[left]
+                swaps[0] += 1
+                left += 1
+                right -= 1
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.span(start, end - 1),
+                description=f"Run [{start}:{end}]" + (" was descending, reversed" if descending else "")
+            )
+        bounds.append(end)
+        start = end
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description=f"Found {len(bounds) - 1} natural runs"
+        )
     
-    def partition(arr, low, high, steps, comparisons, swaps):
-        pivot = arr[high]
-        steps.append(SortingStep(
+    while len(bounds) > 2:
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                description=f"Merging {len(bounds) - 1} runs pairwise"
+            )
+        merged = [0]
+        for r in range(0, len(bounds) - 2, 2):
+            yield from _merge_runs(arr, aux, bounds[r], bounds[r + 1], bounds[r + 2], detail, highlights, gallop,
+                                   comparisons, swaps)
+            merged.append(bounds[r + 2])
+        if merged[-1] != n:
+            merged.append(n)
+        bounds = merged
+    
+    if detail >= PASS:
+        yield SortingRecord(
             array=arr.copy(),
-            pivot=high,
-            description=f"Pivot selected: {pivot}"
-        ))
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
+    
+    return arr, comparisons[0], swaps[0]
+
+
+def merge_natural_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Natural Merge Sort with step-by-step visualization data"""
+    return _without_result(merge_natural_sort_iter(arr, detail))
+
+
+# Ranges at least this long take the ninther's nine samples, shorter ones the median of three
+NINTHER_MIN_SIZE = 40
+
+
+def _median_of_three(arr: list[int], i: int, j: int, k: int) -> tuple[int, int]:
+    """Index of the median of arr[i], arr[j], arr[k] and the comparisons it took"""
+    a, b, c = arr[i], arr[j], arr[k]
+    if a < b:
+        if b < c:
+            return j, 2
+        return (k, 3) if a < c else (i, 3)
+    if a < c:
+        return i, 2
+    return (k, 3) if b < c else (j, 3)
+
+
+def _sift_down(arr: list[int], low: int, root: int, end: int, detail: int, highlights: IndexEncoding,
+               comparisons: list[int], swaps: list[int]) -> Generator[SortingRecord, None, None]:
+    """Sift ``root`` down the max-heap stored at arr[low..]; positions are relative to low, end is exclusive"""
+    while 2 * root + 1 < end:
+        largest = root
+        for child in (2 * root + 1, 2 * root + 2):
+            if child < end:
+                comparisons[0] += 1
+                if detail >= COMPARISON:
+                    yield SortingRecord(
+                        array=arr.copy(),
+                        comparing=highlights.indices(low + largest, low + child),
+                        description=f"Comparing {arr[low + largest]} with child {arr[low + child]}"
+                    )
+                if arr[low + child] > arr[low + largest]:
+                    largest = child
+        if largest == root:
+            return
+        arr[low + root], arr[low + largest] = arr[low + largest], arr[low + root]
+        swaps[0] += 1
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                swapping=[low + root, low + largest],
+                description=f"Swapping {arr[low + largest]} and {arr[low + root]}"
+            )
+        root = largest
+
+
+def _heap_sort_range(arr: list[int], low: int, high: int, detail: int, highlights: IndexEncoding,
+                     comparisons: list[int], swaps: list[int]) -> Generator[SortingRecord, None, None]:
+    """Heap sort arr[low..high] in place (quick sort's fallback past its depth limit)"""
+    size = high - low + 1
+    for root in range(size // 2 - 1, -1, -1):
+        yield from _sift_down(arr, low, root, size, detail, highlights, comparisons, swaps)
+    
+    for end in range(size - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        swaps[0] += 1
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                swapping=[low, low + end],
+                description=f"Moving max element {arr[low + end]} to position {low + end}"
+            )
+        yield from _sift_down(arr, low, 0, end, detail, highlights, comparisons, swaps)
+
+
+def _partition_three_way(arr: list[int], low: int, high: int, detail: int, highlights: IndexEncoding,
+                         comparisons: list[int], swaps: list[int],
+                         final: bool = True) -> Generator[SortingRecord, None, tuple[int, int]]:
+    """Dutch national flag partition of arr[low..high] around arr[low]; returns the range equal to it.
+    
+    ``final`` marks that range sorted in a pass step (the pivots of a
+    median of medians search do not land in their final positions).
+    """
+    pivot_value = arr[low]
+    lt, i, gt = low, low + 1, high
+    
+    # arr[low..lt-1] < pivot, arr[lt..i-1] == pivot, arr[gt+1..high] > pivot
+    while i <= gt:
+        comparisons[0] += 1
+        if detail >= COMPARISON:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(i, lt),
+                pivot=lt,
+                description=f"Comparing {arr[i]} with pivot {pivot_value}"
+            )
         
+        if arr[i] < pivot_value:
+            swap = [lt, i]
+            lt += 1
+            i += 1
+        elif arr[i] > pivot_value:
+            swap = [i, gt]
+            gt -= 1
+        else:
+            i += 1
+            continue
+        
+        if swap[0] != swap[1]:
+            arr[swap[0]], arr[swap[1]] = arr[swap[1]], arr[swap[0]]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=swap,
+                    pivot=lt,
+                    description=f"Swapping {arr[swap[1]]} and {arr[swap[0]]}"
+                )
+    
+    if final and detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(lt, gt),
+            description=(f"Pivot {pivot_value} is in final position" if lt == gt else
+                         f"All {gt - lt + 1} copies of pivot {pivot_value} are in final position")
+        )
+    return lt, gt
+
+
+def quick_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                    pivot: str = "last", partition: str = "lomuto",
+                    seed: int = 0) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Quick Sort, yielding visualization steps and returning (sorted array, comparisons, swaps).
+    
+    Ranges wait on an explicit stack, so sorted or all-equal inputs cannot
+    exhaust the recursion limit. ``pivot`` is "last", "median3", "ninther" or
+    "random" (drawn from a generator seeded with ``seed``); ``partition`` is
+    Lomuto's or a three-way split that settles every key equal to the pivot
+    at once. A range more than 2*log2(n) partitions deep is heap sorted
+    instead (introsort), which keeps the worst case at O(n log n).
+    """
+    comparisons = [0]
+    swaps = [0]
+    arr = arr.copy()
+    n = len(arr)
+    rng = random.Random(seed)
+    depth_limit = 2 * (n.bit_length() - 1) if n > 1 else 0
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
+    
+    def choose_pivot(low, high):
+        """Index of the pivot of arr[low..high] with the indices sampled and how they were combined"""
+        if pivot == "random":
+            index = rng.randint(low, high)
+            return index, [], f"random index {index}"
+        if pivot == "ninther" and high - low + 1 >= NINTHER_MIN_SIZE:
+            step = (high - low + 1) // 8
+            mid = (low + high) // 2
+            samples = [low, low + step, low + 2 * step, mid - step, mid, mid + step, high - 2 * step, high - step, high]
+            medians = []
+            for i in range(0, 9, 3):
+                median, count = _median_of_three(arr, *samples[i:i + 3])
+                comparisons[0] += count
+                medians.append(median)
+            index, count = _median_of_three(arr, *medians)
+            comparisons[0] += count
+            return index, samples, "ninther of 9 samples"
+        if pivot in ("median3", "ninther"):
+            samples = [low, (low + high) // 2, high]
+            index, count = _median_of_three(arr, *samples)
+            comparisons[0] += count
+            return index, samples, f"median of {', '.join(str(arr[i]) for i in samples)}"
+        return high, [], ""
+    
+    def select_pivot(low, high, position):
+        """Choose the pivot of arr[low..high] and move it to ``position``"""
+        index, samples, how = choose_pivot(low, high)
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(*samples) if samples else None,
+                pivot=index,
+                description=f"Pivot selected: {arr[index]} ({how})" if how else f"Pivot selected: {arr[index]}"
+            )
+        if index != position:
+            arr[index], arr[position] = arr[position], arr[index]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[index, position],
+                    pivot=position,
+                    description=f"Moving pivot {arr[position]} to position {position}"
+                )
+    
+    def lomuto(low, high):
+        """Partition around a pivot moved to ``high``; returns the pivot's final position"""
+        yield from select_pivot(low, high, high)
+        pivot_value = arr[high]
         i = low - 1
         
         for j in range(low, high):
             comparisons[0] += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[j, high],
-                pivot=high,
-                description=f"Comparing {arr[j]} with pivot {pivot}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(j, high),
+                    pivot=high,
+                    description=f"Comparing {arr[j]} with pivot {pivot_value}"
+                )
             
-            if arr[j] <= pivot:
+            if arr[j] <= pivot_value:
                 i += 1
                 if i != j:
                     arr[i], arr[j] = arr[j], arr[i]
                     swaps[0] += 1
-                    steps.append(SortingStep(
-                        array=arr.copy(),
-                        swapping=[i, j],
-                        pivot=high,
-                        description=f"Swapping {arr[j]} and {arr[i]}"
-                    ))
+                    if detail >= OPERATION:
+                        yield SortingRecord(
+                            array=arr.copy(),
+                            swapping=[i, j],
+                            pivot=high,
+                            description=f"Swapping {arr[j]} and {arr[i]}"
+                        )
         
         arr[i + 1], arr[high] = arr[high], arr[i + 1]
         swaps[0] += 1
-        steps.append(SortingStep(
-            array=arr.copy(),
-            swapping=[i + 1, high],
-            description=f"Placing pivot at position {i + 1}"
-        ))
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                swapping=[i + 1, high],
+                description=f"Placing pivot at position {i + 1}"
+            )
         
-        return i + 1
-    
-    def quick_sort_recursive(arr, low, high, steps, comparisons, swaps):
-        if low < high:
-            pi = partition(arr, low, high, steps, comparisons, swaps)
-            steps.append(SortingStep(
+        if detail >= PASS:
+            yield SortingRecord(
                 array=arr.copy(),
-                sorted=[pi],
-                description=f"Pivot {arr[pi]} is in final position"
-            ))
-            quick_sort_recursive(arr, low, pi - 1, steps, comparisons, swaps)
-            quick_sort_recursive(arr, pi + 1, high, steps, comparisons, swaps)
-    
-    quick_sort_recursive(arr, 0, n - 1, steps, comparisons, swaps)
-    
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(n)),
-        description="Array sorted!"
-    ))
+                sorted=highlights.indices(i + 1),
+                description=f"Pivot {arr[i + 1]} is in final position"
+            )
+        return i + 1, i + 1
+    
+    def three_way(low, high):
+        """Dutch national flag partition around a pivot moved to ``low``; returns the equal range"""
+        yield from select_pivot(low, high, low)
+        return (yield from _partition_three_way(arr, low, high, detail, highlights, comparisons, swaps))
+    
+    partition_range = three_way if partition == "three_way" else lomuto
+    # (low, high, partitions left before the heap sort fallback); the left part is popped first
+    stack = [(0, n - 1, depth_limit)]
+    while stack:
+        low, high, depth = stack.pop()
+        if low >= high:
+            continue
+        if depth == 0:
+            if detail >= PASS:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.span(low, high),
+                    description=f"Depth limit reached: heap sorting positions {low}-{high}"
+                )
+            yield from _heap_sort_range(arr, low, high, detail, highlights, comparisons, swaps)
+            if detail >= PASS:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    sorted=highlights.span(low, high),
+                    description=f"Positions {low}-{high} heap sorted"
+                )
+            continue
+        first_equal, last_equal = yield from partition_range(low, high)
+        stack.append((last_equal + 1, high, depth - 1))
+        stack.append((low, first_equal - 1, depth - 1))
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
     
-    return steps, comparisons[0], swaps[0]
+    return arr, comparisons[0], swaps[0]
 
 
-def heap_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Heap Sort with step-by-step visualization data"""
-    steps = []
+def quick_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Quick Sort with step-by-step visualization data"""
+    return _without_result(quick_sort_iter(arr, detail))
+
+
+def heap_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Heap Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     comparisons = [0]
     swaps = [0]
     arr = arr.copy()
     n = len(arr)
-    sorted_indices = []
+    sorted_indices = highlights.set()
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
-    def heapify(arr, n, i, steps, comparisons, swaps, sorted_indices):
+    def heapify(arr, n, i, comparisons, swaps, sorted_indices):
         largest = i
         left = 2 * i + 1
         right = 2 * i + 2
         
         if left < n:
             comparisons[0] += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[largest, left],
-                sorted=sorted_indices.copy(),
-                description=f"Comparing {arr[largest]} with left child {arr[left]}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(largest, left),
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Comparing {arr[largest]} with left child {arr[left]}"
+                )
             if arr[left] > arr[largest]:
                 largest = left
         
         if right < n:
             comparisons[0] += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                comparing=[largest, right],
-                sorted=sorted_indices.copy(),
-                description=f"Comparing {arr[largest]} with right child {arr[right]}"
-            ))
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(largest, right),
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Comparing {arr[largest]} with right child {arr[right]}"
+                )
             if arr[right] > arr[largest]:
                 largest = right
         
         if largest != i:
             arr[i], arr[largest] = arr[largest], arr[i]
             swaps[0] += 1
-            steps.append(SortingStep(
-                array=arr.copy(),
-                swapping=[i, largest],
-                sorted=sorted_indices.copy(),
-                description=f"Swapping {arr[largest]} and {arr[i]}"
-            ))
-            heapify(arr, n, largest, steps, comparisons, swaps, sorted_indices)
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[i, largest],
+                    sorted=sorted_indices.snapshot(),
+                    description=f"Swapping {arr[largest]} and {arr[i]}"
+                )
+            yield from heapify(arr, n, largest, comparisons, swaps, sorted_indices)
     
     # Build max heap
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Building max heap..."
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Building max heap..."
+        )
     
     for i in range(n // 2 - 1, -1, -1):
-        heapify(arr, n, i, steps, comparisons, swaps, sorted_indices)
+        yield from heapify(arr, n, i, comparisons, swaps, sorted_indices)
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Max heap built"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Max heap built"
+        )
     
     # Extract elements
     for i in range(n - 1, 0, -1):
         arr[0], arr[i] = arr[i], arr[0]
         swaps[0] += 1
-        sorted_indices.append(i)
-        steps.append(SortingStep(
+        sorted_indices.add(i)
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                swapping=[0, i],
+                sorted=sorted_indices.snapshot(),
+                description=f"Moving max element {arr[i]} to end"
+            )
+        yield from heapify(arr, i, 0, comparisons, swaps, sorted_indices)
+    
+    sorted_indices.add(0)
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, n - 1),
+            description="Array sorted!"
+        )
+    
+    return arr, comparisons[0], swaps[0]
+
+
+def heap_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Heap Sort with step-by-step visualization data"""
+    return _without_result(heap_sort_iter(arr, detail))
+
+
+def _sort_group(arr: list[int], low: int, high: int, detail: int, highlights: IndexEncoding,
+                comparisons: list[int], swaps: list[int]) -> Generator[SortingRecord, None, None]:
+    """Insertion sort arr[low..high], a group of at most five"""
+    for i in range(low + 1, high + 1):
+        j = i
+        while j > low:
+            comparisons[0] += 1
+            if detail >= COMPARISON:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.indices(j - 1, j),
+                    description=f"Comparing {arr[j - 1]} and {arr[j]}"
+                )
+            if arr[j - 1] <= arr[j]:
+                break
+            arr[j - 1], arr[j] = arr[j], arr[j - 1]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[j - 1, j],
+                    description=f"Swapping {arr[j]} and {arr[j - 1]}"
+                )
+            j -= 1
+
+
+def _median_of_medians(arr: list[int], low: int, high: int, detail: int, highlights: IndexEncoding,
+                       comparisons: list[int], swaps: list[int]) -> Generator[SortingRecord, None, int]:
+    """Index of the median of the medians of arr[low..high]'s groups of five.
+
+    Each group is sorted and its median moved to the front of the range,
+    then the medians' own median is selected there.
+    """
+    front = low
+    for start in range(low, high + 1, 5):
+        end = min(start + 4, high)
+        yield from _sort_group(arr, start, end, detail, highlights, comparisons, swaps)
+        median = (start + end) // 2
+        if median != front:
+            arr[median], arr[front] = arr[front], arr[median]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[median, front],
+                    description=f"Moving group median {arr[front]} to position {front}"
+                )
+        front += 1
+    
+    middle = (low + front - 1) // 2
+    if front - low > 1:
+        yield from _select_range(arr, low, front - 1, middle, 0, detail, highlights, comparisons, swaps, final=False)
+    return middle
+
+
+def _select_range(arr: list[int], low: int, high: int, target: int, depth: int, detail: int,
+                  highlights: IndexEncoding, comparisons: list[int], swaps: list[int],
+                  final: bool = True) -> Generator[SortingRecord, None, None]:
+    """Partition arr[low..high] until position ``target`` holds its element in sorted order.
+
+    Pivots are medians of three for ``depth`` partitions and medians of
+    medians after that (from the start when ``depth`` is 0). ``final`` is
+    False while selecting a median of medians, whose pivots do not land in
+    their final positions.
+    """
+    medians_of_medians = depth == 0
+    while low < high:
+        if not medians_of_medians and depth == 0:
+            medians_of_medians = True
+            if final and detail >= PASS:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    comparing=highlights.span(low, high),
+                    description=f"Depth limit reached: median of medians pivots for positions {low}-{high}"
+                )
+        if medians_of_medians:
+            index = yield from _median_of_medians(arr, low, high, detail, highlights, comparisons, swaps)
+            how = "median of medians"
+        else:
+            depth -= 1
+            index, count = _median_of_three(arr, low, (low + high) // 2, high)
+            comparisons[0] += count
+            how = "median of three"
+        
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                pivot=index,
+                description=f"Pivot selected: {arr[index]} ({how})"
+            )
+        if index != low:
+            arr[index], arr[low] = arr[low], arr[index]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[index, low],
+                    pivot=low,
+                    description=f"Moving pivot {arr[low]} to position {low}"
+                )
+        
+        lt, gt = yield from _partition_three_way(arr, low, high, detail, highlights, comparisons, swaps, final)
+        if target < lt:
+            high = lt - 1
+        elif target > gt:
+            low = gt + 1
+        else:
+            return
+
+
+def _selection_size(n: int, k: Optional[int]) -> int:
+    """The k of a selection request: the lower median by default, at most n"""
+    return (n + 1) // 2 if k is None else min(k, n)
+
+
+def _ordinal(k: int) -> str:
+    suffix = "th" if 10 <= k % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(k % 10, "th")
+    return f"{k}{suffix}"
+
+
+def _select_iter(arr: list[int], detail: int, highlights: IndexEncoding, k: Optional[int],
+                 introselect: bool) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    comparisons = [0]
+    swaps = [0]
+    arr = arr.copy()
+    n = len(arr)
+    k = _selection_size(n, k)
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
+    
+    if k > 0:
+        depth = 2 * (n.bit_length() - 1) if introselect else 0
+        yield from _select_range(arr, 0, n - 1, k - 1, depth, detail, highlights, comparisons, swaps)
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                sorted=highlights.span(0, k - 1),
+                description=f"{_ordinal(k)} smallest is {arr[k - 1]}; the {k} smallest fill positions 0-{k - 1}"
+            )
+    
+    return arr, comparisons[0], swaps[0]
+
+
+def quickselect_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                     k: Optional[int] = None) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Quickselect, yielding visualization steps and returning (array, comparisons, swaps).
+    
+    The returned array holds the k-th smallest element at position k - 1,
+    with the k smallest before it in no particular order. Each three-way
+    partition around a median of three keeps only the side holding
+    position k - 1, O(n) on average; past 2*log2(n) partitions the pivots
+    become medians of medians (introselect), which keeps the worst case
+    at O(n). ``k`` defaults to the lower median.
+    """
+    return (yield from _select_iter(arr, detail, highlights, k, introselect=True))
+
+
+def quickselect_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Quickselect with step-by-step visualization data"""
+    return _without_result(quickselect_iter(arr, detail))
+
+
+def median_of_medians_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                           k: Optional[int] = None) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Median of Medians selection, returning the array quickselect does, in O(n) worst case.
+    
+    Every pivot is the median of the medians of groups of five, which
+    always leaves at least 3/10 of the range on each side.
+    """
+    return (yield from _select_iter(arr, detail, highlights, k, introselect=False))
+
+
+def median_of_medians_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Median of Medians selection with step-by-step visualization data"""
+    return _without_result(median_of_medians_iter(arr, detail))
+
+
+def heap_top_k_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                    k: Optional[int] = None) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Bounded-heap Top-k, returning (array with its k smallest first in ascending order, comparisons, swaps).
+    
+    arr[0..k-1] is a max-heap of the k smallest elements seen so far: each
+    later element is compared with its root and replaces it when smaller,
+    O(n log k). The heap is then sorted in place, O(k log k). ``k``
+    defaults to the lower median.
+    """
+    comparisons = [0]
+    swaps = [0]
+    arr = arr.copy()
+    n = len(arr)
+    k = _selection_size(n, k)
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
+    if k == 0:
+        return arr, 0, 0
+    
+    for root in range(k // 2 - 1, -1, -1):
+        yield from _sift_down(arr, 0, root, k, detail, highlights, comparisons, swaps)
+    if detail >= PASS:
+        yield SortingRecord(
             array=arr.copy(),
-            swapping=[0, i],
-            sorted=sorted_indices.copy(),
-            description=f"Moving max element {arr[i]} to end"
-        ))
-        heapify(arr, i, 0, steps, comparisons, swaps, sorted_indices)
+            comparing=highlights.span(0, k - 1),
+            description=f"Max heap of the first {k} elements built"
+        )
+    
+    for i in range(k, n):
+        comparisons[0] += 1
+        if detail >= COMPARISON:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(i, 0),
+                description=f"Comparing {arr[i]} with heap maximum {arr[0]}"
+            )
+        if arr[i] < arr[0]:
+            arr[0], arr[i] = arr[i], arr[0]
+            swaps[0] += 1
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=arr.copy(),
+                    swapping=[0, i],
+                    description=f"{arr[0]} replaces heap maximum {arr[i]}"
+                )
+            yield from _sift_down(arr, 0, 0, k, detail, highlights, comparisons, swaps)
     
-    sorted_indices.append(0)
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(n)),
-        description="Array sorted!"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            comparing=highlights.span(0, k - 1),
+            description=f"The {k} smallest are in the heap; sorting it"
+        )
+    yield from _heap_sort_range(arr, 0, k - 1, detail, highlights, comparisons, swaps)
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, k - 1),
+            description=f"The {k} smallest fill positions 0-{k - 1} in order"
+        )
     
-    return steps, comparisons[0], swaps[0]
+    return arr, comparisons[0], swaps[0]
 
 
-def counting_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Counting Sort with step-by-step visualization data"""
-    steps = []
+def heap_top_k_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Bounded-heap Top-k with step-by-step visualization data"""
+    return _without_result(heap_top_k_iter(arr, detail))
+
+
+def counting_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Counting Sort, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     arr = arr.copy()
     
     if not arr:
-        return [SortingStep(array=[], description="Empty array")], 0, 0
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return arr, 0, 0
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
     max_val = max(arr)
     min_val = min(arr)
     range_val = max_val - min_val + 1
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description=f"Range: {min_val} to {max_val}"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description=f"Range: {min_val} to {max_val}"
+        )
     
     count = [0] * range_val
     output = [0] * len(arr)
@@ -436,10 +1222,11 @@ def counting_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
     for num in arr:
         count[num - min_val] += 1
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description=f"Counted occurrences"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description=f"Counted occurrences"
+        )
     
     # Cumulative count
     for i in range(1, len(count)):
@@ -449,89 +1236,143 @@ def counting_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
     for i in range(len(arr) - 1, -1, -1):
         output[count[arr[i] - min_val] - 1] = arr[i]
         count[arr[i] - min_val] -= 1
-        steps.append(SortingStep(
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=output.copy(),
+                comparing=highlights.indices(count[arr[i] - min_val]),
+                description=f"Placing {arr[i]} at position {count[arr[i] - min_val]}"
+            )
+    
+    if detail >= PASS:
+        yield SortingRecord(
             array=output.copy(),
-            comparing=[count[arr[i] - min_val]],
-            description=f"Placing {arr[i]} at position {count[arr[i] - min_val]}"
-        ))
+            sorted=highlights.span(0, len(output) - 1),
+            description="Array sorted!"
+        )
     
-    steps.append(SortingStep(
-        array=output.copy(),
-        sorted=list(range(len(output))),
-        description="Array sorted!"
-    ))
-    
-    return steps, len(arr), 0
+    return output, len(arr), 0
 
 
-def radix_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Radix Sort with step-by-step visualization data"""
-    steps = []
+def counting_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Counting Sort with step-by-step visualization data"""
+    return _without_result(counting_sort_iter(arr, detail))
+
+
+def radix_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                    base: int = 10) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """LSD Radix Sort in ``base``, yielding visualization steps and returning (sorted array, comparisons, swaps)"""
     arr = arr.copy()
     
     if not arr:
-        return [SortingStep(array=[], description="Empty array")], 0, 0
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return arr, 0, 0
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
-    max_val = max(arr)
+    # Digits are taken from the offset to the minimum when there are negative values
+    offset = min(min(arr), 0)
+    max_key = max(arr) - offset
     exp = 1
     
-    while max_val // exp > 0:
-        steps.append(SortingStep(
-            array=arr.copy(),
-            description=f"Sorting by digit at position {exp}"
-        ))
+    while max_key // exp > 0:
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                description=f"Sorting by digit at position {exp}"
+            )
         
         # Counting sort for this digit
-        count = [0] * 10
+        count = [0] * base
         output = [0] * len(arr)
         
         for num in arr:
-            index = (num // exp) % 10
+            index = ((num - offset) // exp) % base
             count[index] += 1
         
-        for i in range(1, 10):
+        for i in range(1, base):
             count[i] += count[i - 1]
         
         for i in range(len(arr) - 1, -1, -1):
-            index = (arr[i] // exp) % 10
+            index = ((arr[i] - offset) // exp) % base
             output[count[index] - 1] = arr[i]
             count[index] -= 1
         
-        arr = output.copy()
-        steps.append(SortingStep(
-            array=arr.copy(),
-            description=f"After sorting by digit at position {exp}"
-        ))
+        arr[:] = output
+        if detail >= PASS:
+            yield SortingRecord(
+                array=arr.copy(),
+                description=f"After sorting by digit at position {exp}"
+            )
         
-        exp *= 10
+        exp *= base
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        sorted=list(range(len(arr))),
-        description="Array sorted!"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            sorted=highlights.span(0, len(arr) - 1),
+            description="Array sorted!"
+        )
     
-    return steps, 0, 0
+    return arr, 0, 0
 
 
-def bucket_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
-    """Bucket Sort with step-by-step visualization data"""
+def radix_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Radix Sort with step-by-step visualization data"""
+    return _without_result(radix_sort_iter(arr, detail))
+
+
+def _shift_indices(indices: Optional[list], offset: int) -> Optional[list]:
+    """Plain indices or [lo, hi] ranges moved by ``offset``"""
+    if indices is None:
+        return None
+    return [[index[0] + offset, index[1] + offset] if isinstance(index, list) else index + offset
+            for index in indices]
+
+
+def bucket_subtrace(algorithm: str, bucket: list[int], detail: int,
+                    highlights: IndexEncoding) -> tuple[list[SortingRecord], list[int], int, int]:
+    """Sort one bucket with ``algorithm``, returning (steps, sorted bucket, comparisons, swaps).
+
+    Runs in a subtask worker for parallel bucket sort.
+    """
+    trace = SORTING_ITERATORS[algorithm](bucket, detail, highlights)
     steps = []
+    while True:
+        try:
+            steps.append(next(trace))
+        except StopIteration as stop:
+            return (steps, *stop.value)
+
+
+def bucket_sort_iter(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                     count: Optional[int] = None, algorithm: str = "insertion",
+                     parallel: bool = False) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Bucket Sort, yielding visualization steps and returning (sorted array, comparisons, swaps).
+    
+    ``count`` buckets (by default 5 to 10 depending on n) are each sorted
+    with ``algorithm``; the default insertion sort runs inline, any other
+    algorithm, or ``parallel`` (one subtask worker process per bucket), runs
+    the bucket's own trace and splices it in, bucket by bucket, with indices
+    into the buckets laid end to end.
+    """
     arr = arr.copy()
     n = len(arr)
     
     if not arr:
-        return [SortingStep(array=[], description="Empty array")], 0, 0
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return arr, 0, 0
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description="Initial array"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description="Initial array"
+        )
     
     # Find range
     min_val = min(arr)
@@ -539,13 +1380,14 @@ def bucket_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
     range_val = max_val - min_val + 1
     
     # Create buckets (use 5 or 10 buckets depending on range)
-    num_buckets = min(10, max(5, n // 2))
+    num_buckets = count or min(10, max(5, n // 2))
     bucket_size = range_val / num_buckets
     
-    steps.append(SortingStep(
-        array=arr.copy(),
-        description=f"Creating {num_buckets} buckets for range {min_val}-{max_val}"
-    ))
+    if detail >= PASS:
+        yield SortingRecord(
+            array=arr.copy(),
+            description=f"Creating {num_buckets} buckets for range {min_val}-{max_val}"
+        )
     
     # Initialize empty buckets
     buckets = [[] for _ in range(num_buckets)]
@@ -555,64 +1397,109 @@ def bucket_sort_steps(arr: list[int]) -> tuple[list[SortingStep], int, int]:
         bucket_index = min(int((num - min_val) / bucket_size), num_buckets - 1)
         buckets[bucket_index].append(num)
         
-        steps.append(SortingStep(
+        if detail >= OPERATION:
+            yield SortingRecord(
+                array=arr.copy(),
+                comparing=highlights.indices(i),
+                buckets=[b.copy() for b in buckets],
+                description=f"Placing {num} into bucket {bucket_index + 1}"
+            )
+    
+    if detail >= PASS:
+        yield SortingRecord(
             array=arr.copy(),
-            comparing=[i],
             buckets=[b.copy() for b in buckets],
-            description=f"Placing {num} into bucket {bucket_index + 1}"
-        ))
-    
-    steps.append(SortingStep(
-        array=arr.copy(),
-        buckets=[b.copy() for b in buckets],
-        description="All elements distributed into buckets"
-    ))
+            description="All elements distributed into buckets"
+        )
     
-    # Sort each bucket using insertion sort
+    # Sort each bucket: inline insertion sort by default, otherwise the bucket's own trace spliced in
     comparisons = 0
     swaps = 0
-    
-    for i, bucket in enumerate(buckets):
-        if len(bucket) > 1:
-            # Insertion sort for this bucket
-            for j in range(1, len(bucket)):
-                key = bucket[j]
-                k = j - 1
-                while k >= 0 and bucket[k] > key:
-                    comparisons += 1
-                    bucket[k + 1] = bucket[k]
-                    swaps += 1
-                    k -= 1
-                bucket[k + 1] = key
-                if k >= 0:
-                    comparisons += 1
+    spliced = algorithm != "insertion" or parallel
+    jobs = {}
+    if parallel:
+        pool = subtask_pool()
+        jobs = {i: pool.submit(bucket_subtrace, algorithm, bucket, detail, highlights)
+                for i, bucket in enumerate(buckets) if len(bucket) > 1}
+    
+    try:
+        for i, bucket in enumerate(buckets):
+            if len(bucket) > 1:
+                if not spliced:
+                    # Insertion sort for this bucket
+                    for j in range(1, len(bucket)):
+                        key = bucket[j]
+                        k = j - 1
+                        while k >= 0 and bucket[k] > key:
+                            comparisons += 1
+                            bucket[k + 1] = bucket[k]
+                            swaps += 1
+                            k -= 1
+                        bucket[k + 1] = key
+                        if k >= 0:
+                            comparisons += 1
+                else:
+                    if parallel:
+                        # Sub-traces are taken in bucket order, whatever order the workers finish in
+                        sub_steps, sorted_bucket, bucket_comparisons, bucket_swaps = subtask_result(jobs[i])
+                    else:
+                        sub_steps, sorted_bucket, bucket_comparisons, bucket_swaps = bucket_subtrace(
+                            algorithm, bucket, detail, highlights)
+                    comparisons += bucket_comparisons
+                    swaps += bucket_swaps
+                
+                    offset = sum(len(b) for b in buckets[:i])
+                    for step in sub_steps:
+                        layout = buckets[:i] + [step.array] + buckets[i + 1:]
+                        yield SortingRecord(
+                            array=[value for b in layout for value in b],
+                            comparing=_shift_indices(step.comparing, offset),
+                            swapping=_shift_indices(step.swapping, offset),
+                            sorted=_shift_indices(step.sorted, offset),
+                            pivot=None if step.pivot is None else step.pivot + offset,
+                            buckets=[b.copy() for b in layout],
+                            description=f"Bucket {i + 1}: {step.description}"
+                        )
+                    bucket[:] = sorted_bucket
             
-            steps.append(SortingStep(
-                array=arr.copy(),
-                buckets=[b.copy() for b in buckets],
-                description=f"Bucket {i + 1} sorted: {bucket}"
-            ))
+                if detail >= PASS:
+                    yield SortingRecord(
+                        array=arr.copy(),
+                        buckets=[b.copy() for b in buckets],
+                        description=f"Bucket {i + 1} sorted: {bucket}"
+                    )
+    finally:
+        # A timed out, cancelled or closed trace drops the buckets no worker has started
+        for job in jobs.values():
+            job.cancel()
     
     # Concatenate buckets
     result = []
     for i, bucket in enumerate(buckets):
         for num in bucket:
             result.append(num)
-            steps.append(SortingStep(
-                array=result.copy() + [0] * (n - len(result)),
-                sorted=list(range(len(result) - 1)),
-                comparing=[len(result) - 1],
-                buckets=[b.copy() for b in buckets],
-                description=f"Adding {num} from bucket {i + 1} to result"
-            ))
-    
-    steps.append(SortingStep(
-        array=result.copy(),
-        sorted=list(range(len(result))),
-        description="Array sorted!"
-    ))
-    
-    return steps, comparisons, swaps
+            if detail >= OPERATION:
+                yield SortingRecord(
+                    array=result.copy() + [0] * (n - len(result)),
+                    sorted=highlights.span(0, len(result) - 2),
+                    comparing=highlights.indices(len(result) - 1),
+                    buckets=[b.copy() for b in buckets],
+                    description=f"Adding {num} from bucket {i + 1} to result"
+                )
+    
+    if detail >= PASS:
+        yield SortingRecord(
+            array=result.copy(),
+            sorted=highlights.span(0, len(result) - 1),
+            description="Array sorted!"
+        )
+    
+    return result, comparisons, swaps
+
+
+def bucket_sort_steps(arr: list[int], detail: int = COMPARISON) -> tuple[list[SortingStep], int, int]:
+    """Bucket Sort with step-by-step visualization data"""
+    return _without_result(bucket_sort_iter(arr, detail))
 
 
 SORTING_ALGORITHMS = {
@@ -620,29 +1507,230 @@ SORTING_ALGORITHMS = {
     "selection": selection_sort_steps,
     "insertion": insertion_sort_steps,
     "merge": merge_sort_steps,
+    "merge_bottom_up": merge_bottom_up_sort_steps,
+    "merge_natural": merge_natural_sort_steps,
     "quick": quick_sort_steps,
     "heap": heap_sort_steps,
+    "quickselect": quickselect_steps,
+    "median_of_medians": median_of_medians_steps,
+    "heap_top_k": heap_top_k_steps,
     "counting": counting_sort_steps,
     "radix": radix_sort_steps,
+    "bucket": bucket_sort_steps,
 }
 
 
-@router.post("/{algorithm}", response_model=SortingResponse)
-async def execute_sorting(algorithm: str, request: SortingRequest):
+SORTING_ITERATORS = {
+    "bubble": bubble_sort_iter,
+    "selection": selection_sort_iter,
+    "insertion": insertion_sort_iter,
+    "merge": merge_sort_iter,
+    "merge_bottom_up": merge_bottom_up_sort_iter,
+    "merge_natural": merge_natural_sort_iter,
+    "quick": quick_sort_iter,
+    "heap": heap_sort_iter,
+    "quickselect": quickselect_iter,
+    "median_of_medians": median_of_medians_iter,
+    "heap_top_k": heap_top_k_iter,
+    "counting": counting_sort_iter,
+    "radix": radix_sort_iter,
+    "bucket": bucket_sort_iter,
+}
+
+
+# Selection algorithms: only the k smallest elements end up in place, so they cannot sort buckets
+SELECTION_ALGORITHMS = ("quickselect", "median_of_medians", "heap_top_k")
+
+# Widest value range counting sort takes: it allocates a counter for every value in the range
+MAX_COUNTING_RANGE = 1 << 24
+
+
+# Iterator keyword arguments taken from request fields, per algorithm
+SORTING_OPTIONS = {
+    "merge_bottom_up": {"gallop": "gallop"},
+    "merge_natural": {"gallop": "gallop"},
+    "quick": {"pivot": "pivot", "partition": "partition", "seed": "pivot_seed"},
+    "quickselect": {"k": "k"},
+    "median_of_medians": {"k": "k"},
+    "heap_top_k": {"k": "k"},
+    "radix": {"base": "radix_base"},
+    "bucket": {"count": "bucket_count", "algorithm": "bucket_algorithm", "parallel": "parallel"},
+}
+
+
+def check_counting_range(values: list[int]) -> None:
+    """422 when counting sort would need more than MAX_COUNTING_RANGE counters for ``values``"""
+    if values and max(values) - min(values) >= MAX_COUNTING_RANGE:
+        raise HTTPException(status_code=422, detail=f"Counting sort takes values spanning less than "
+                                                    f"{MAX_COUNTING_RANGE}, got {min(values)} to {max(values)}")
+
+
+def check_options(algorithm: str, request: SortingRequest) -> None:
+    """Reject engines and per-algorithm options the algorithm does not offer"""
+    if algorithm == "counting" and request.array is not None:
+        check_counting_range(request.array)
+    if request.engine == "numpy":
+        if algorithm not in VECTORIZED_ITERATORS:
+            available = ", ".join(name for name in SORTING_ALGORITHMS if name in VECTORIZED_ITERATORS)
+            raise HTTPException(status_code=422, detail=f'engine="numpy" is not available for {algorithm}. Available: {available}')
+        if algorithm == "bucket" and (request.bucket_algorithm != "insertion" or request.parallel):
+            raise HTTPException(status_code=422, detail='engine="numpy" sorts buckets itself; bucket_algorithm and parallel are not available')
+    if algorithm == "bucket" and (request.bucket_algorithm not in SORTING_ITERATORS or request.bucket_algorithm == "bucket"
+                                  or request.bucket_algorithm in SELECTION_ALGORITHMS):
+        available = ", ".join(name for name in SORTING_ALGORITHMS if name != "bucket" and name not in SELECTION_ALGORITHMS)
+        raise HTTPException(status_code=422, detail=f"Unknown bucket_algorithm: {request.bucket_algorithm}. Available: {available}")
+    if algorithm in SELECTION_ALGORITHMS and request.k is not None:
+        n = len(request.array) if request.array is not None else request.n
+        if request.k > n:
+            raise HTTPException(status_code=422, detail=f"k must be at most the array length ({n})")
+
+
+def sorting_trace(algorithm: str, request: SortingRequest) -> Generator[SortingRecord, None, dict]:
+    """Yield the steps for a sorting request and return the response totals"""
+    iterator = (VECTORIZED_ITERATORS if request.engine == "numpy" else SORTING_ITERATORS)[algorithm]
+    options = {name: getattr(request, field) for name, field in SORTING_OPTIONS.get(algorithm, {}).items()}
+    arr = request_array(request)
+    if algorithm == "counting":
+        # Generated input is only known here, in the worker
+        check_counting_range(arr)
+    result, comparisons, swaps = yield from iterator(arr, detail_level(request), highlight_encoding(request),
+                                                     **options)
+    if request.trace == "none":
+        return {"result": result, "total_comparisons": comparisons, "total_swaps": swaps}
+    return {"total_comparisons": comparisons, "total_swaps": swaps}
+
+
+def render_sorting(algorithm: str, request: SortingRequest, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Run a sorting request and serialize the response body"""
+    if media_type == PACKED_MEDIA_TYPE:
+        # The packed columns already store only what changed, so they replace the delta format and
+        # the range-encoded highlights (their sorted/comparing columns hold plain indices)
+        trace = sorting_trace(algorithm, request.model_copy(update={"highlights": "indices"}))
+        with phase("generation"):
+            return pack_sorting_trace(algorithm, trace)
+    
+    trace = sorting_trace(algorithm, request)
+    
+    if request.trace == "none":
+        _, summary = collect(trace)
+        with phase("response_validation"):
+            response = SortingResultResponse(algorithm=algorithm, **summary)
+        return encode_model(response, media_type)
+    
+    if request.format == "delta":
+        # Encode while generating so only the operations are ever held in memory
+        summary = {}
+        with phase("generation"):
+            steps = encode_sorting_trace(with_summary(trace, summary), request.keyframe_interval)
+        with phase("response_validation"):
+            response = SortingDeltaResponse(
+                algorithm=algorithm,
+                keyframe_interval=request.keyframe_interval,
+                steps=steps,
+                **summary
+            )
+        # Absent fields mean "none" (or "unchanged" for sorted), so drop nulls from the wire
+        return encode_model(response, media_type, exclude_none=True)
+    
+    steps, summary = collect(trace)
+    return encode_trace(SortingResponse, steps, media_type, algorithm=algorithm, **summary)
+
+
+def race_entry(algorithm: str, request: SortingRaceRequest) -> tuple[int, bytes]:
+    """Worker-side: run one algorithm of a race and return (step count, serialized SortingRaceEntry)"""
+    # Each worker generates its own copy of a generator spec's input
+    trace_request = SortingRequest(array=request.array, generator=request.generator, n=request.n, seed=request.seed,
+                                   params=request.params, detail=request.detail, trace=request.trace,
+                                   highlights=request.highlights)
+    start = time.perf_counter()
+    steps, summary = collect(sorting_trace(algorithm, trace_request))
+    wall_seconds = time.perf_counter() - start
+    summary.pop("result", None)
+    entry = encode_trace(SortingRaceEntry, steps, JSON_MEDIA_TYPE, algorithm=algorithm,
+                         wall_seconds=wall_seconds, total_steps=len(steps), **summary)
+    return len(steps), entry
+
+
+# Declared before /{algorithm} so "race" is not taken for an algorithm name
+@router.post("/race", response_model=SortingRaceResponse)
+async def race_sorting(request: SortingRaceRequest, http_request: Request):
+    """Run several sorting algorithms on one array side by side, each in its own worker"""
+    algorithms = request.algorithms or list(SORTING_ALGORITHMS)
+    unknown = [name for name in algorithms if name not in SORTING_ALGORITHMS]
+    if unknown:
+        available = ", ".join(SORTING_ALGORITHMS.keys())
+        raise HTTPException(status_code=422, detail=f"Algorithm not found: {', '.join(unknown)}. Available: {available}")
+    
+    label_request(http_request, "sorting", "race")
+    jobs = [asyncio.ensure_future(step_executor.run(http_request, race_entry, name, request)) for name in algorithms]
+    try:
+        entries = await asyncio.gather(*jobs)
+    except BaseException:
+        for job in jobs:
+            job.cancel()
+        # Let the cancelled jobs unwind so their workers are abandoned and their errors retrieved
+        await asyncio.gather(*jobs, return_exceptions=True)
+        raise
+    
+    total_ticks = max(count for count, _ in entries)
+    results = b",".join(entry for _, entry in entries)
+    return Response(content=b'{"total_ticks":%d,"results":[%s]}' % (total_ticks, results),
+                    media_type="application/json")
+
+
+@router.post("/{algorithm}", response_model=Union[SortingResponse, SortingDeltaResponse, SortingResultResponse])
+async def execute_sorting(algorithm: str, request: SortingRequest, http_request: Request):
     """Execute a sorting algorithm and return visualization steps"""
     if algorithm not in SORTING_ALGORITHMS:
         available = ", ".join(SORTING_ALGORITHMS.keys())
         return {"error": f"Algorithm not found. Available: {available}"}
     
-    sort_func = SORTING_ALGORITHMS[algorithm]
-    steps, comparisons, swaps = sort_func(request.array)
+    check_options(algorithm, request)
+    return await cached_response("sorting", algorithm, request, render_sorting, http_request, TRACE_MEDIA_TYPES)
+
+
+@router.post("/{algorithm}/stream")
+async def stream_sorting(algorithm: str, request: SortingRequest, http_request: Request):
+    """Stream sorting steps as NDJSON (or SSE) while they are generated, ending with the totals"""
+    if algorithm not in SORTING_ALGORITHMS:
+        available = ", ".join(SORTING_ALGORITHMS.keys())
+        return {"error": f"Algorithm not found. Available: {available}"}
+    
+    check_options(algorithm, request)
+    return stream_trace(algorithm, sorting_trace(algorithm, request), sse=wants_sse(http_request))
+
+
+@router.post("/{algorithm}/session", response_model=TraceSessionInfo)
+async def open_sorting_session(algorithm: str, request: SortingRequest, http_request: Request):
+    """Generate the trace once and keep it server-side for paged reads from /api/v1/traces/{id}/steps"""
+    if algorithm not in SORTING_ALGORITHMS:
+        available = ", ".join(SORTING_ALGORITHMS.keys())
+        return {"error": f"Algorithm not found. Available: {available}"}
     
-    return SortingResponse(
-        algorithm=algorithm,
-        steps=steps,
-        total_comparisons=comparisons,
-        total_swaps=swaps
-    )
+    check_options(algorithm, request)
+    if request.highlights == "ranges":
+        # Packed pages would rebuild plain indices, so range-encoded traces are kept as JSON steps
+        return await open_session("sorting", algorithm, request, http_request, build_json_pages, sorting_trace)
+    build = partial(build_packed_pages, trace=sorting_trace)
+    return await open_session("sorting", algorithm, request, http_request, build, render_sorting)
+
+
+@router.get("/{algorithm}/complexity", response_model=ComplexityProfile)
+async def get_sorting_complexity(algorithm: str, http_request: Request,
+                                 max_size: int = Query(8192, ge=64, le=65536)):
+    """Measure the algorithm's counters over doubling input sizes and fit them to growth curves"""
+    if algorithm not in SORTING_ALGORITHMS:
+        available = ", ".join(SORTING_ALGORITHMS.keys())
+        raise HTTPException(status_code=404, detail=f"Algorithm not found. Available: {available}")
+    
+    label_request(http_request, "sorting", algorithm)
+    iterator = SORTING_ITERATORS[algorithm]
+    key = (algorithm, source_version(iterator), profile_sizes(max_size)[-1])
+    payload = profile_cache.get(key)
+    if payload is None:
+        payload = await step_executor.run(http_request, profile_sorting, algorithm, iterator, max_size)
+        profile_cache.put(key, payload)
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/")
@@ -655,9 +1743,15 @@ async def list_sorting_algorithms():
             "selection": "Selects minimum element each pass, O(n²)",
             "insertion": "Builds sorted array one element at a time, O(n²)",
             "merge": "Divide and conquer, O(n log n)",
-            "quick": "Divide and conquer with pivot, O(n log n) average",
+            "merge_bottom_up": "Iterative merges of doubling run widths, O(n log n)",
+            "merge_natural": "Merges the runs already in the input, O(n) to O(n log n)",
+            "quick": "Divide and conquer with pivot, O(n log n) (heap sort past the depth limit)",
             "heap": "Uses heap data structure, O(n log n)",
+            "quickselect": "Partitions toward the k-th smallest only, O(n) average (median-of-medians pivots past the depth limit)",
+            "median_of_medians": "Selects the k-th smallest with median-of-medians pivots, O(n) worst case",
+            "heap_top_k": "Keeps the k smallest in a bounded max-heap, O(n log k)",
             "counting": "Non-comparison based, O(n+k)",
             "radix": "Sorts by digits, O(nk)",
+            "bucket": "Distributes into value-range buckets and sorts each (optionally in parallel), O(n+k) average",
         }
     }
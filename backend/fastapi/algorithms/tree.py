@@ -1,5 +1,12 @@
-from fastapi import APIRouter
-from models.schemas import TreeRequest, TreeResponse, TreeStep
+from fastapi import APIRouter, Request
+from typing import Generator
+from models.records import TreeRecord
+from models.schemas import TreeRequest, TreeResponse, TreeStep, TraceSessionInfo
+from services.cache import cached_response
+from services.detail import COMPARISON, OPERATION, PASS, detail_level
+from services.encoding import JSON_MEDIA_TYPE, encode_trace
+from services.sessions import build_json_pages, open_session
+from services.streaming import as_step_list, collect, stream_trace, wants_sse
 
 router = APIRouter()
 
@@ -24,30 +31,36 @@ def build_tree_dict(values: list[int]) -> dict:
     return root
 
 
-def inorder_steps(tree: dict) -> tuple[list[TreeStep], list[int]]:
-    steps = []
+def inorder_iter(tree: dict, detail: int = COMPARISON) -> Generator[TreeRecord, None, list[int]]:
     result = []
     
     def inorder(node, visited):
         if node is None:
             return
-        steps.append(TreeStep(tree=tree, current=node["value"], visited=visited.copy(),
-            description=f"Going left from {node['value']}"))
-        inorder(node["left"], visited)
+        if detail >= COMPARISON:
+            yield TreeRecord(tree=tree, current=node["value"], visited=visited.copy(),
+                description=f"Going left from {node['value']}")
+        yield from inorder(node["left"], visited)
         visited.append(node["value"])
         result.append(node["value"])
-        steps.append(TreeStep(tree=tree, current=node["value"], visited=visited.copy(),
-            description=f"Visited {node['value']}"))
-        inorder(node["right"], visited)
+        if detail >= OPERATION:
+            yield TreeRecord(tree=tree, current=node["value"], visited=visited.copy(),
+                description=f"Visited {node['value']}")
+        yield from inorder(node["right"], visited)
     
-    steps.append(TreeStep(tree=tree, visited=[], description="Starting inorder traversal (Left-Root-Right)"))
-    inorder(tree, [])
-    steps.append(TreeStep(tree=tree, visited=result, description=f"Inorder: {result}"))
-    return steps, result
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=[], description="Starting inorder traversal (Left-Root-Right)")
+    yield from inorder(tree, [])
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=result, description=f"Inorder: {result}")
+    return result
 
 
-def preorder_steps(tree: dict) -> tuple[list[TreeStep], list[int]]:
-    steps = []
+def inorder_steps(tree: dict, detail: int = COMPARISON) -> tuple[list[TreeStep], list[int]]:
+    return as_step_list(inorder_iter(tree, detail))
+
+
+def preorder_iter(tree: dict, detail: int = COMPARISON) -> Generator[TreeRecord, None, list[int]]:
     result = []
     
     def preorder(node, visited):
@@ -55,143 +68,211 @@ def preorder_steps(tree: dict) -> tuple[list[TreeStep], list[int]]:
             return
         visited.append(node["value"])
         result.append(node["value"])
-        steps.append(TreeStep(tree=tree, current=node["value"], visited=visited.copy(),
-            description=f"Visited {node['value']}"))
-        preorder(node["left"], visited)
-        preorder(node["right"], visited)
+        if detail >= OPERATION:
+            yield TreeRecord(tree=tree, current=node["value"], visited=visited.copy(),
+                description=f"Visited {node['value']}")
+        yield from preorder(node["left"], visited)
+        yield from preorder(node["right"], visited)
     
-    steps.append(TreeStep(tree=tree, visited=[], description="Starting preorder traversal (Root-Left-Right)"))
-    preorder(tree, [])
-    steps.append(TreeStep(tree=tree, visited=result, description=f"Preorder: {result}"))
-    return steps, result
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=[], description="Starting preorder traversal (Root-Left-Right)")
+    yield from preorder(tree, [])
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=result, description=f"Preorder: {result}")
+    return result
+
+
+def preorder_steps(tree: dict, detail: int = COMPARISON) -> tuple[list[TreeStep], list[int]]:
+    return as_step_list(preorder_iter(tree, detail))
 
 
-def postorder_steps(tree: dict) -> tuple[list[TreeStep], list[int]]:
-    steps = []
+def postorder_iter(tree: dict, detail: int = COMPARISON) -> Generator[TreeRecord, None, list[int]]:
     result = []
     
     def postorder(node, visited):
         if node is None:
             return
-        postorder(node["left"], visited)
-        postorder(node["right"], visited)
+        yield from postorder(node["left"], visited)
+        yield from postorder(node["right"], visited)
         visited.append(node["value"])
         result.append(node["value"])
-        steps.append(TreeStep(tree=tree, current=node["value"], visited=visited.copy(),
-            description=f"Visited {node['value']}"))
+        if detail >= OPERATION:
+            yield TreeRecord(tree=tree, current=node["value"], visited=visited.copy(),
+                description=f"Visited {node['value']}")
     
-    steps.append(TreeStep(tree=tree, visited=[], description="Starting postorder traversal (Left-Right-Root)"))
-    postorder(tree, [])
-    steps.append(TreeStep(tree=tree, visited=result, description=f"Postorder: {result}"))
-    return steps, result
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=[], description="Starting postorder traversal (Left-Right-Root)")
+    yield from postorder(tree, [])
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=result, description=f"Postorder: {result}")
+    return result
 
 
-def levelorder_steps(tree: dict) -> tuple[list[TreeStep], list[int]]:
-    steps = []
+def postorder_steps(tree: dict, detail: int = COMPARISON) -> tuple[list[TreeStep], list[int]]:
+    return as_step_list(postorder_iter(tree, detail))
+
+
+def levelorder_iter(tree: dict, detail: int = COMPARISON) -> Generator[TreeRecord, None, list[int]]:
     result = []
     
     if not tree:
-        return [TreeStep(tree={}, visited=[], description="Empty tree")], []
+        if detail >= PASS:
+            yield TreeRecord(tree={}, visited=[], description="Empty tree")
+        return []
     
     queue = [tree]
-    steps.append(TreeStep(tree=tree, visited=[], description="Starting level-order traversal (BFS)"))
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=[], description="Starting level-order traversal (BFS)")
     
     while queue:
         node = queue.pop(0)
         result.append(node["value"])
-        steps.append(TreeStep(tree=tree, current=node["value"], visited=result.copy(),
-            description=f"Visited {node['value']}"))
+        if detail >= OPERATION:
+            yield TreeRecord(tree=tree, current=node["value"], visited=result.copy(),
+                description=f"Visited {node['value']}")
         if node["left"]:
             queue.append(node["left"])
         if node["right"]:
             queue.append(node["right"])
     
-    steps.append(TreeStep(tree=tree, visited=result, description=f"Level-order: {result}"))
-    return steps, result
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=result, description=f"Level-order: {result}")
+    return result
+
 
+def levelorder_steps(tree: dict, detail: int = COMPARISON) -> tuple[list[TreeStep], list[int]]:
+    return as_step_list(levelorder_iter(tree, detail))
 
-def bst_insert_steps(tree: dict, value: int) -> tuple[list[TreeStep], dict]:
-    steps = []
+
+def bst_insert_iter(tree: dict, value: int, detail: int = COMPARISON) -> Generator[TreeRecord, None, dict]:
     import copy
     new_tree = copy.deepcopy(tree) if tree else None
     
-    steps.append(TreeStep(tree=new_tree or {}, visited=[], description=f"Inserting {value}"))
+    if detail >= PASS:
+        yield TreeRecord(tree=new_tree or {}, visited=[], description=f"Inserting {value}")
     
     def insert(node, val, path):
         if node is None:
-            steps.append(TreeStep(tree=new_tree or {}, current=val, visited=path,
-                description=f"Inserted {val} here"))
+            if detail >= OPERATION:
+                yield TreeRecord(tree=new_tree or {}, current=val, visited=path,
+                    description=f"Inserted {val} here")
             return {"value": val, "left": None, "right": None}
         
         path.append(node["value"])
         if val < node["value"]:
-            steps.append(TreeStep(tree=new_tree or {}, current=node["value"], comparing=val,
-                visited=path.copy(), description=f"{val} < {node['value']}, go left"))
-            node["left"] = insert(node["left"], val, path)
+            if detail >= COMPARISON:
+                yield TreeRecord(tree=new_tree or {}, current=node["value"], comparing=val,
+                    visited=path.copy(), description=f"{val} < {node['value']}, go left")
+            node["left"] = yield from insert(node["left"], val, path)
         else:
-            steps.append(TreeStep(tree=new_tree or {}, current=node["value"], comparing=val,
-                visited=path.copy(), description=f"{val} >= {node['value']}, go right"))
-            node["right"] = insert(node["right"], val, path)
+            if detail >= COMPARISON:
+                yield TreeRecord(tree=new_tree or {}, current=node["value"], comparing=val,
+                    visited=path.copy(), description=f"{val} >= {node['value']}, go right")
+            node["right"] = yield from insert(node["right"], val, path)
         return node
     
-    new_tree = insert(new_tree, value, [])
-    steps.append(TreeStep(tree=new_tree, visited=[], description=f"Inserted {value} successfully"))
-    return steps, new_tree
+    new_tree = yield from insert(new_tree, value, [])
+    if detail >= PASS:
+        yield TreeRecord(tree=new_tree, visited=[], description=f"Inserted {value} successfully")
+    return new_tree
+
 
+def bst_insert_steps(tree: dict, value: int, detail: int = COMPARISON) -> tuple[list[TreeStep], dict]:
+    return as_step_list(bst_insert_iter(tree, value, detail))
 
-def bst_search_steps(tree: dict, value: int) -> tuple[list[TreeStep], bool]:
-    steps = []
+
+def bst_search_iter(tree: dict, value: int, detail: int = COMPARISON) -> Generator[TreeRecord, None, bool]:
     found = False
     path = []
     
-    steps.append(TreeStep(tree=tree, visited=[], description=f"Searching for {value}"))
+    if detail >= PASS:
+        yield TreeRecord(tree=tree, visited=[], description=f"Searching for {value}")
     
     node = tree
     while node:
         path.append(node["value"])
         if node["value"] == value:
             found = True
-            steps.append(TreeStep(tree=tree, current=node["value"], visited=path.copy(),
-                description=f"Found {value}!"))
+            if detail >= PASS:
+                yield TreeRecord(tree=tree, current=node["value"], visited=path.copy(),
+                    description=f"Found {value}!")
             break
         elif value < node["value"]:
-            steps.append(TreeStep(tree=tree, current=node["value"], comparing=value,
-                visited=path.copy(), description=f"{value} < {node['value']}, go left"))
+            if detail >= COMPARISON:
+                yield TreeRecord(tree=tree, current=node["value"], comparing=value,
+                    visited=path.copy(), description=f"{value} < {node['value']}, go left")
             node = node["left"]
         else:
-            steps.append(TreeStep(tree=tree, current=node["value"], comparing=value,
-                visited=path.copy(), description=f"{value} > {node['value']}, go right"))
+            if detail >= COMPARISON:
+                yield TreeRecord(tree=tree, current=node["value"], comparing=value,
+                    visited=path.copy(), description=f"{value} > {node['value']}, go right")
             node = node["right"]
     
     if not found:
-        steps.append(TreeStep(tree=tree, visited=path, description=f"{value} not found"))
-    return steps, found
+        if detail >= PASS:
+            yield TreeRecord(tree=tree, visited=path, description=f"{value} not found")
+    return found
 
 
-@router.post("/{algorithm}", response_model=TreeResponse)
-async def execute_tree_algorithm(algorithm: str, request: TreeRequest):
+def bst_search_steps(tree: dict, value: int, detail: int = COMPARISON) -> tuple[list[TreeStep], bool]:
+    return as_step_list(bst_search_iter(tree, value, detail))
+
+
+TREE_ALGORITHMS = ["inorder", "preorder", "postorder", "levelorder", "insert", "search"]
+
+
+def tree_trace(algorithm: str, request: TreeRequest) -> Generator[TreeRecord, None, dict]:
+    """Yield the steps for a tree request and return the response result"""
     tree = request.tree or build_tree_dict(request.values or [])
+    detail = detail_level(request)
     
     if algorithm == "inorder":
-        steps, result = inorder_steps(tree)
+        result = yield from inorder_iter(tree, detail)
     elif algorithm == "preorder":
-        steps, result = preorder_steps(tree)
+        result = yield from preorder_iter(tree, detail)
     elif algorithm == "postorder":
-        steps, result = postorder_steps(tree)
+        result = yield from postorder_iter(tree, detail)
     elif algorithm == "levelorder":
-        steps, result = levelorder_steps(tree)
+        result = yield from levelorder_iter(tree, detail)
     elif algorithm == "insert":
-        steps, tree = bst_insert_steps(tree, request.value)
-        return TreeResponse(algorithm=algorithm, steps=steps, result=[request.value])
+        yield from bst_insert_iter(tree, request.value, detail)
+        result = [request.value]
     elif algorithm == "search":
-        steps, found = bst_search_steps(tree, request.value)
-        return TreeResponse(algorithm=algorithm, steps=steps, result=[request.value] if found else [])
+        found = yield from bst_search_iter(tree, request.value, detail)
+        result = [request.value] if found else []
     else:
-        return {"error": f"Unknown algorithm: {algorithm}"}
+        raise ValueError(f"Unknown algorithm: {algorithm}")
     
-    return TreeResponse(algorithm=algorithm, steps=steps, result=result)
+    return {"result": result}
+
+
+def render_tree(algorithm: str, request: TreeRequest, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Run a tree request and serialize the response body"""
+    steps, summary = collect(tree_trace(algorithm, request))
+    return encode_trace(TreeResponse, steps, media_type, algorithm=algorithm, **summary)
+
+
+@router.post("/{algorithm}", response_model=TreeResponse)
+async def execute_tree_algorithm(algorithm: str, request: TreeRequest, http_request: Request):
+    if algorithm not in TREE_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await cached_response("tree", algorithm, request, render_tree, http_request)
+
+
+@router.post("/{algorithm}/stream")
+async def stream_tree_algorithm(algorithm: str, request: TreeRequest, http_request: Request):
+    if algorithm not in TREE_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return stream_trace(algorithm, tree_trace(algorithm, request), sse=wants_sse(http_request))
+
+
+@router.post("/{algorithm}/session", response_model=TraceSessionInfo)
+async def open_tree_algorithm_session(algorithm: str, request: TreeRequest, http_request: Request):
+    if algorithm not in TREE_ALGORITHMS:
+        return {"error": f"Unknown algorithm: {algorithm}"}
+    return await open_session("tree", algorithm, request, http_request, build_json_pages, tree_trace)
 
 
 @router.get("/")
 async def list_tree_algorithms():
-    return {"algorithms": ["inorder", "preorder", "postorder", "levelorder", "insert", "search"]}
+    return {"algorithms": TREE_ALGORITHMS}
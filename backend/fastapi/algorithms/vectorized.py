@@ -0,0 +1,223 @@
+"""NumPy large-input mode of the non-comparison sorts (``"engine": "numpy"``).
+
+The step generators in ``algorithms/sorting.py`` loop over the elements in
+Python and snapshot the array for each one they place, which caps counting,
+radix and bucket sort at a few thousand elements. These versions run every
+phase as whole-array operations instead:
+
+    histogram    np.bincount of the keys / bucket ids
+    prefix sum   np.cumsum of the histogram (bucket bounds)
+    scatter      np.repeat of the key range (counting sort), or a stable
+                 argsort of the digits / bucket ids, which numpy runs as a
+                 counting sort on the uint8 / uint16 columns used here
+
+They record pass-level steps only, whatever the requested detail, and those
+steps, the result and the counters are the ones the step generators
+produce at ``detail="pass"``. Keys are offset by the minimum, so negative
+integers are accepted; values must fit in int64.
+"""
+from typing import Generator, Optional
+
+import numpy as np
+
+from models.records import SortingRecord
+from services.detail import COMPARISON, PASS
+from services.highlights import INDICES, IndexEncoding
+
+
+def _keys(values: np.ndarray, min_val: int) -> np.ndarray:
+    """Offsets from the minimum as uint64 (int64 wraps, but the unsigned view of the difference is exact)"""
+    return (values - np.int64(min_val)).view(np.uint64)
+
+
+def _digit_dtype(base: int) -> type:
+    return np.uint8 if base <= 1 << 8 else np.uint16 if base <= 1 << 16 else np.uint64
+
+
+def _insertion_sort_counts(keys: np.ndarray, groups: np.ndarray) -> tuple[int, int]:
+    """(comparisons, shifts) of insertion-sorting each group of the uint64 ``keys`` in arrival order.
+
+    Shifts are the inversions inside each group. Every inserted element also
+    costs the comparison that stops its scan, unless it is smaller than
+    everything before it in its group and the scan runs off the front.
+    """
+    n = len(keys)
+    if int(keys.max()) < n:
+        ranks = keys.astype(np.int32)
+    else:
+        # Fewer bits to walk through below once the keys are ranked
+        ranks = np.unique(keys, return_inverse=True)[1].reshape(-1).astype(np.int32)
+    order = np.argsort(groups, kind="stable")
+    ranks, groups = ranks[order], groups[order]
+    first = np.empty(n, dtype=bool)
+    first[0] = True
+    np.not_equal(groups[1:], groups[:-1], out=first[1:])
+
+    # Running minimum of each group; later groups are shifted below every earlier one so a single
+    # running minimum over the whole array never carries a value across groups
+    shifted = ranks - groups.astype(np.int64) * (int(ranks.max()) + 1)
+    runs_off = np.zeros(n, dtype=bool)
+    runs_off[1:] = shifted[1:] < np.minimum.accumulate(shifted)[:-1]
+    stops = int(np.count_nonzero(~first & ~runs_off))
+
+    # Inversions bit by bit from the top: a pair whose ranks first differ at ``bit`` is inverted when
+    # the 1 comes first. Segments (same group and higher bits) are then split stably on the bit.
+    shifts = 0
+    for bit in reversed(range(int(ranks.max()).bit_length())):
+        starts = np.flatnonzero(first)
+        lengths = np.diff(np.append(starts, len(ranks)))
+        if len(starts) == len(ranks):
+            break
+        if 2 * np.count_nonzero(lengths == 1) > len(starts):
+            # Drop the elements that already sit alone in their segment
+            keep = np.repeat(lengths > 1, lengths)
+            ranks, first = ranks[keep], first[keep]
+            starts = np.flatnonzero(first)
+            lengths = np.diff(np.append(starts, len(ranks)))
+
+        ones = (ranks >> bit) & 1
+        seg_ones = np.add.reduceat(ones, starts, dtype=np.int64)
+        ones_before = np.cumsum(ones, dtype=np.int32) - ones
+        ones_before -= np.repeat(ones_before[starts], lengths)
+        # Summed over the 0s: all ones_before, less the k(k - 1)/2 the k 1s of a segment see
+        shifts += int(ones_before.sum(dtype=np.int64)) - int((seg_ones * (seg_ones - 1) // 2).sum())
+
+        split = starts + lengths - seg_ones
+        target = np.where(ones == 0, np.arange(len(ranks), dtype=np.int32) - ones_before,
+                          np.repeat(split, lengths).astype(np.int32) + ones_before)
+        moved = np.empty_like(ranks)
+        moved[target] = ranks
+        ranks = moved
+        first[:] = False
+        first[starts] = True
+        first[split[(seg_ones > 0) & (seg_ones < lengths)]] = True
+    return shifts + stops, shifts
+
+
+def counting_sort_vectorized(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Counting Sort as histogram / prefix sum / scatter array operations"""
+    if not arr:
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return [], 0, 0
+
+    values = np.asarray(arr, dtype=np.int64)
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), description="Initial array")
+
+    min_val, max_val = int(values.min()), int(values.max())
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), description=f"Range: {min_val} to {max_val}")
+
+    # The range is below MAX_COUNTING_RANGE (see check_counting_range), so the uint64 offsets fit in intp
+    count = np.bincount(_keys(values, min_val).astype(np.intp), minlength=max_val - min_val + 1)
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), description="Counted occurrences")
+
+    # Value k fills [cumsum(count)[k] - count[k], cumsum(count)[k]) of the output: equal values are
+    # interchangeable, so the scatter is every value repeated count times (np.repeat takes the prefix sum)
+    result = np.repeat(np.arange(min_val, max_val + 1, dtype=np.int64), count).tolist()
+    if detail >= PASS:
+        yield SortingRecord(array=result, sorted=highlights.span(0, len(result) - 1), description="Array sorted!")
+
+    return result, len(arr), 0
+
+
+def radix_sort_vectorized(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                          base: int = 10) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """LSD Radix Sort in ``base``, one stable counting-sort scatter of the whole array per digit"""
+    if not arr:
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return [], 0, 0
+
+    values = np.asarray(arr, dtype=np.int64)
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), description="Initial array")
+
+    min_val = int(values.min())
+    offset = min(min_val, 0)
+    keys = _keys(values, offset)
+    max_key = int(keys.max())
+    digit_dtype = _digit_dtype(base)
+    exp = 1
+
+    while max_key // exp > 0:
+        if detail >= PASS:
+            yield SortingRecord(array=values.tolist(), description=f"Sorting by digit at position {exp}")
+
+        digits = ((keys // np.uint64(exp)) % np.uint64(base)).astype(digit_dtype)
+        order = np.argsort(digits, kind="stable")
+        values, keys = values[order], keys[order]
+        if detail >= PASS:
+            yield SortingRecord(array=values.tolist(), description=f"After sorting by digit at position {exp}")
+
+        exp *= base
+
+    result = values.tolist()
+    if detail >= PASS:
+        yield SortingRecord(array=result, sorted=highlights.span(0, len(result) - 1), description="Array sorted!")
+
+    return result, 0, 0
+
+
+def bucket_sort_vectorized(arr: list[int], detail: int = COMPARISON, highlights: IndexEncoding = INDICES,
+                           count: Optional[int] = None, algorithm: str = "insertion",
+                           parallel: bool = False) -> Generator[SortingRecord, None, tuple[list[int], int, int]]:
+    """Bucket Sort with the distribution and the per-bucket sorts done as array operations.
+
+    The counters are those of the insertion sorts the step generator runs
+    on each bucket, computed without running them. ``algorithm`` and
+    ``parallel`` only exist to match the step generator (the routes only
+    accept their defaults here).
+    """
+    if not arr:
+        if detail >= PASS:
+            yield SortingRecord(array=[], description="Empty array")
+        return [], 0, 0
+
+    values = np.asarray(arr, dtype=np.int64)
+    n = len(values)
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), description="Initial array")
+
+    min_val, max_val = int(values.min()), int(values.max())
+    num_buckets = count or min(10, max(5, n // 2))
+    bucket_size = (max_val - min_val + 1) / num_buckets
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(),
+                            description=f"Creating {num_buckets} buckets for range {min_val}-{max_val}")
+
+    keys = _keys(values, min_val)
+    bucket_ids = np.minimum((keys / bucket_size).astype(np.int64), num_buckets - 1)
+    sizes = np.bincount(bucket_ids, minlength=num_buckets)
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+    distributed = values[np.argsort(bucket_ids.astype(_digit_dtype(num_buckets)), kind="stable")]
+    # Buckets cover increasing value ranges, so sorting each bucket sorts the whole array
+    result = np.sort(distributed, kind="stable")
+
+    def buckets(sorted_through: int) -> list[list[int]]:
+        return [(result if i <= sorted_through else distributed)[bounds[i]:bounds[i + 1]].tolist()
+                for i in range(num_buckets)]
+
+    if detail >= PASS:
+        yield SortingRecord(array=values.tolist(), buckets=buckets(-1),
+                            description="All elements distributed into buckets")
+        for i in range(num_buckets):
+            if sizes[i] > 1:
+                yield SortingRecord(array=values.tolist(), buckets=buckets(i),
+                                    description=f"Bucket {i + 1} sorted: {result[bounds[i]:bounds[i + 1]].tolist()}")
+
+    comparisons, swaps = _insertion_sort_counts(keys, bucket_ids)
+    sorted_values = result.tolist()
+    if detail >= PASS:
+        yield SortingRecord(array=sorted_values, sorted=highlights.span(0, n - 1), description="Array sorted!")
+
+    return sorted_values, comparisons, swaps
+
+
+VECTORIZED_ITERATORS = {
+    "counting": counting_sort_vectorized,
+    "radix": radix_sort_vectorized,
+    "bucket": bucket_sort_vectorized,
+}
@@ -0,0 +1,191 @@
+"""Vectorized multi-target searching (``POST /api/v1/searching/batch``).
+
+One sorted array is searched for many targets at once. ``batch_positions``
+answers every target with a single ``np.searchsorted`` pass, and
+``BATCH_PROBES`` counts, per algorithm, the positions its step generator
+in ``algorithms/searching.py`` examines for each target on the same sorted
+values, without running it:
+
+    linear         positions scanned up to the first match (n on a miss)
+    binary         midpoints checked
+    jump           block ends checked, including the one that stops the
+                   jumps, then positions scanned in that block
+    interpolation  interpolated positions checked, plus the final check
+                   once the range has narrowed to equal ends
+    exponential    index 0, each doubling index checked, then the binary
+                   search midpoints in the bracketed range
+    eytzinger      layout slots checked (``LAYOUT_PROBES``, over the layout)
+    btree          layout nodes read, one cache line each
+
+Linear and jump are closed forms over the searchsorted positions; binary,
+interpolation and exponential advance every unfinished target together,
+one array operation per step of the longest search. Values are int64, or
+Python ints in object arrays when they do not fit.
+"""
+import math
+from typing import Callable
+
+import numpy as np
+
+from algorithms.layouts import BTREE_KEYS, Layout
+
+
+def search_arrays(values: list[int], targets: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """``values`` and ``targets`` as arrays of one dtype"""
+    try:
+        return np.asarray(values, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+    except OverflowError:
+        return np.asarray(values, dtype=object), np.asarray(targets, dtype=object)
+
+
+def batch_positions(a: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(found, first position of each target in ``a``; meaningless where not found)"""
+    first = np.searchsorted(a, targets, side="left")
+    found = np.zeros(len(targets), dtype=bool)
+    inside = first < len(a)
+    found[inside] = (a[first[inside]] == targets[inside]).astype(bool)
+    return found, first
+
+
+def linear_probes(a: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    found, first = batch_positions(a, targets)
+    return np.where(found, first + 1, len(a))
+
+
+def _binary_probes(a: np.ndarray, targets: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Midpoints the binary search loop checks for each target, starting from [left, right]"""
+    probes = np.zeros(len(targets), dtype=np.int64)
+    active = np.flatnonzero(left <= right)
+    left, right, targets = left[active], right[active], targets[active]
+    while len(active):
+        mid = (left + right) // 2
+        probes[active] += 1
+        values = a[mid]
+        less = (values < targets).astype(bool)
+        greater = (values > targets).astype(bool)
+        left = np.where(less, mid + 1, left)
+        right = np.where(greater, mid - 1, right)
+        keep = (less | greater) & (left <= right)
+        active, left, right, targets = active[keep], left[keep], right[keep], targets[keep]
+    return probes
+
+
+def binary_probes(a: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    count = len(targets)
+    return _binary_probes(a, targets, np.zeros(count, dtype=np.int64), np.full(count, len(a) - 1, dtype=np.int64))
+
+
+def jump_probes(a: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    n = len(a)
+    if n == 0:
+        return np.zeros(len(targets), dtype=np.int64)
+    step = int(math.sqrt(n))
+    blocks = -(-n // step)
+    ends = np.minimum(np.arange(1, blocks + 1) * step, n) - 1
+    # Block ends below the target are jumped over; the first one that is not ends the jumps
+    jumps = np.searchsorted(a[ends], targets, side="left")
+    found, first = batch_positions(a, targets)
+    block_start = jumps * step
+    block_end = np.minimum(block_start + step, n) - 1
+    scanned = np.where(found, first - block_start + 1, block_end - block_start + 1)
+    return np.where(jumps == blocks, blocks, jumps + 1 + scanned)
+
+
+def interpolation_probes(a: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    n = len(a)
+    probes = np.zeros(len(targets), dtype=np.int64)
+    if n == 0:
+        return probes
+    # (target - a[low]) * (high - low) must not overflow int64
+    exact = a.dtype == object or (int(a[-1]) - int(a[0])) * n >= 2 ** 63
+    active = np.arange(len(targets))
+    low, high = np.zeros(len(targets), dtype=np.int64), np.full(len(targets), n - 1, dtype=np.int64)
+    while len(active):
+        in_range = low <= high
+        in_range[in_range] = ((targets[in_range] >= a[low[in_range]]) & (targets[in_range] <= a[high[in_range]])).astype(bool)
+        active, low, high, targets = active[in_range], low[in_range], high[in_range], targets[in_range]
+        a_low, a_high = a[low], a[high]
+        # Equal ends: the target is a[low], checked once
+        settled = (low == high) | (a_low == a_high).astype(bool)
+        probes[active[settled]] += 1
+        moving = ~settled
+        active, low, high, targets = active[moving], low[moving], high[moving], targets[moving]
+        a_low, a_high = a_low[moving], a_high[moving]
+        if exact:
+            offset = (targets - a_low).astype(object) * (high - low).astype(object) // (a_high - a_low).astype(object)
+            pos = low + offset.astype(np.int64)
+        else:
+            pos = low + (targets - a_low) * (high - low) // (a_high - a_low)
+        probes[active] += 1
+        values = a[pos]
+        less = (values < targets).astype(bool)
+        greater = (values > targets).astype(bool)
+        low = np.where(less, pos + 1, low)
+        high = np.where(greater, pos - 1, high)
+        keep = less | greater
+        active, low, high, targets = active[keep], low[keep], high[keep], targets[keep]
+    return probes
+
+
+def exponential_probes(a: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    n = len(a)
+    if n == 0:
+        return np.zeros(len(targets), dtype=np.int64)
+    powers = 1 << np.arange(max(0, (n - 1).bit_length()), dtype=np.int64)
+    # Doubling indices at or below the target are passed; i ends at the first one above it (or past the end)
+    doublings = np.searchsorted(a[powers], targets, side="right")
+    bound = np.left_shift(1, doublings.astype(np.int64))
+    probes = 1 + doublings + (doublings < len(powers))
+    probes += _binary_probes(a, targets, bound // 2, np.minimum(bound, n - 1))
+    # A hit at index 0 returns before the doubling
+    return np.where((a[0] == targets).astype(bool), 1, probes)
+
+
+BATCH_PROBES: dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "linear": linear_probes,
+    "binary": binary_probes,
+    "jump": jump_probes,
+    "interpolation": interpolation_probes,
+    "exponential": exponential_probes,
+}
+
+
+def eytzinger_probes(layout: Layout, targets: np.ndarray) -> np.ndarray:
+    keys, n = layout.keys, len(layout.keys)
+    probes = np.zeros(len(targets), dtype=np.int64)
+    active = np.arange(len(targets))
+    slot = np.zeros(len(targets), dtype=np.int64)
+    while n and len(active):
+        probes[active] += 1
+        values = keys[slot]
+        less = (values < targets).astype(bool)
+        slot = 2 * slot + 1 + less
+        keep = (values != targets).astype(bool) & (slot < n)
+        active, slot, targets = active[keep], slot[keep], targets[keep]
+    return probes
+
+
+def btree_probes(layout: Layout, targets: np.ndarray) -> np.ndarray:
+    nodes = layout.keys.reshape(-1, BTREE_KEYS)
+    probes = np.zeros(len(targets), dtype=np.int64)
+    active = np.arange(len(targets))
+    node = np.zeros(len(targets), dtype=np.int64)
+    while len(nodes) and len(active):
+        probes[active] += 1
+        keys = np.take(nodes, node, axis=0)
+        # Index of the first key not below the target (keys are sorted within a node):
+        # the key to check, or the child to descend to
+        less = (keys < targets[:, None]).astype(bool)
+        below = np.where(less[:, -1], BTREE_KEYS, np.argmin(less, axis=1))
+        checked = np.take_along_axis(keys, np.minimum(below, BTREE_KEYS - 1)[:, None], axis=1)[:, 0]
+        hit = (below < BTREE_KEYS) & (checked == targets).astype(bool)
+        node = node * (BTREE_KEYS + 1) + below + 1
+        keep = ~hit & (node < len(nodes))
+        active, node, targets = active[keep], node[keep], targets[keep]
+    return probes
+
+
+LAYOUT_PROBES: dict[str, Callable[[Layout, np.ndarray], np.ndarray]] = {
+    "eytzinger": eytzinger_probes,
+    "btree": btree_probes,
+}
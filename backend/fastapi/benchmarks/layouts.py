@@ -0,0 +1,122 @@
+"""Binary search against the Eytzinger and B-tree layouts on large arrays.
+
+Run from backend/fastapi:
+
+    python -m benchmarks.layouts
+    python -m benchmarks.layouts --sizes 1000000,16000000 --targets 500000 -o layouts.json
+
+For each size a sorted array of random int64 values is searched for the
+same random targets (half of them present) by:
+
+    searchsorted   ``np.searchsorted``, compiled binary search on the sorted values
+    binary         ``binary_probes``, the binary search loop one array operation per level
+    eytzinger      ``eytzinger_probes`` on the Eytzinger layout
+    btree          ``btree_probes`` on the B-tree layout
+
+and by the step generators (``binary_search_iter`` and the layout ones,
+result only) for ``--traced`` of the targets. Every vectorized level
+gathers one key per target: on the sorted values those reads land on
+unrelated cache lines once the range is smaller than the array, while the
+layouts keep the top levels in a few lines and read one line per level
+(B-tree) or per three levels (Eytzinger) further down. Layout build times
+are reported separately; a dataset pays them once.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+from algorithms.layouts import LAYOUT_BUILDERS
+from algorithms.searching import SEARCHING_ITERATORS
+from algorithms.vectorized_search import LAYOUT_PROBES, binary_probes
+from services.detail import NONE
+
+DEFAULT_SIZES = (1_000_000, 4_000_000, 16_000_000)
+SEED = 1234
+
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_iterators(algorithm: str, values: list[int], targets: list[int], options: dict) -> None:
+    iterator = SEARCHING_ITERATORS[algorithm]
+    for target in targets:
+        for _ in iterator(values, target, NONE, **options):
+            pass
+
+
+def measure(size: int, target_count: int, traced: int, repeat: int) -> dict:
+    rng = np.random.default_rng(SEED)
+    values = np.sort(rng.integers(0, 4 * size, size))
+    targets = np.where(rng.random(target_count) < 0.5, values[rng.integers(0, size, target_count)],
+                       rng.integers(0, 4 * size, target_count))
+
+    builds, layouts = {}, {}
+    for name, build in LAYOUT_BUILDERS.items():
+        builds[name] = best_of(1, lambda: layouts.setdefault(name, build(values)))
+
+    vectorized = {
+        "searchsorted": best_of(repeat, lambda: np.searchsorted(values, targets)),
+        "binary": best_of(repeat, lambda: binary_probes(values, targets)),
+    }
+    for name, layout in layouts.items():
+        vectorized[name] = best_of(repeat, lambda: LAYOUT_PROBES[name](layout, targets))
+
+    value_list, traced_targets = values.tolist(), targets[:traced].tolist()
+    iterators = {"binary": best_of(repeat, lambda: run_iterators("binary", value_list, traced_targets,
+                                                                 {"presorted": True}))}
+    for name, layout in layouts.items():
+        iterators[name] = best_of(repeat, lambda: run_iterators(name, value_list, traced_targets,
+                                                                {"presorted": True, "layout": layout}))
+
+    return {
+        "size": size,
+        "targets": target_count,
+        "traced": traced,
+        "build_seconds": builds,
+        "vectorized_seconds": vectorized,
+        "iterator_seconds": iterators,
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=lambda value: tuple(int(size) for size in value.split(",")),
+                        default=DEFAULT_SIZES, help="comma separated array sizes (default: 1M,4M,16M)")
+    parser.add_argument("--targets", type=int, default=200_000, help="targets per vectorized run (default: 200000)")
+    parser.add_argument("--traced", type=int, default=20_000,
+                        help="targets run through the step generators (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement, the fastest is kept")
+    parser.add_argument("-o", "--output", help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        result = measure(size, args.targets, args.traced, args.repeat)
+        results.append(result)
+        builds = " ".join(f"{name}={seconds:.3f}s" for name, seconds in result["build_seconds"].items())
+        print(f"n={size:,}  layout build: {builds}", file=sys.stderr)
+        base = result["vectorized_seconds"]["binary"]
+        for name, seconds in result["vectorized_seconds"].items():
+            print(f"  vectorized {name:<13} {seconds * 1000:>9.1f} ms  {base / seconds:>5.2f}x binary", file=sys.stderr)
+        base = result["iterator_seconds"]["binary"]
+        for name, seconds in result["iterator_seconds"].items():
+            print(f"  iterator   {name:<13} {seconds * 1000:>9.1f} ms  {base / seconds:>5.2f}x binary", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps({"seed": SEED, "results": results}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Benchmark suite for every registered algorithm.
+
+Run from backend/fastapi:
+
+    python -m benchmarks.suite run -o baseline.json
+    python -m benchmarks.suite compare baseline.json            # re-run and compare
+    python -m benchmarks.suite compare baseline.json new.json   # compare two result files
+
+Each case is (category, algorithm, input shape, size) and records the trace
+generation wall time (best of ``--repeat`` runs), steps per second, peak
+traced memory during generation (tracemalloc, measured in a separate run)
+and the size of the serialized JSON response. Inputs come from a seeded RNG,
+so results from different runs describe the same work. The selection
+algorithms run once for the median (their default k) and once more for
+the ``SELECTION_K`` smallest, as shape ``<shape>-k<SELECTION_K>``, where
+heap top-k's O(n log k) shows against the full sorts.
+
+``compare`` flags a case as a regression when wall time, peak memory or
+response bytes grow by more than ``--threshold`` (a fraction, default 0.2;
+wall time only for cases slower than ``--min-seconds``) and exits with
+status 1 if any were found.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Generator, Iterator, NamedTuple
+
+from pydantic import BaseModel
+
+from algorithms.dp import DP_ALGORITHMS, dp_trace, render_dp
+from algorithms.graph import GRAPH_ALGORITHMS, graph_trace, render_graph
+from algorithms.searching import SEARCHING_ALGORITHMS, render_searching, searching_trace
+from algorithms.sorting import SELECTION_ALGORITHMS, SORTING_ALGORITHMS, render_sorting, sorting_trace
+from algorithms.tree import TREE_ALGORITHMS, render_tree, tree_trace
+from models.schemas import DPRequest, GraphRequest, SearchingRequest, SortingRequest, TreeRequest
+from services.streaming import collect
+
+DEFAULT_SIZES = (16, 64, 256)
+ARRAY_SHAPES = ("random", "sorted", "reversed", "duplicates")
+GRAPH_SHAPES = ("random", "path", "dense", "duplicates")
+SEED = 1234
+SELECTION_K = 8
+
+# Metrics where a larger value is worse; steps_per_second follows wall_seconds
+COMPARED_METRICS = ("wall_seconds", "peak_bytes", "response_bytes")
+
+
+class Case(NamedTuple):
+    category: str
+    algorithm: str
+    shape: str
+    size: int
+    request: BaseModel
+    trace: Callable[[str, BaseModel], Generator[BaseModel, None, dict]]
+    render: Callable[[str, BaseModel], bytes]
+
+    @property
+    def name(self) -> str:
+        return f"{self.category}/{self.algorithm}/{self.shape}/{self.size}"
+
+
+def make_array(shape: str, size: int, rng: random.Random) -> list[int]:
+    if shape == "duplicates":
+        return [rng.randint(0, max(1, size // 8)) for _ in range(size)]
+    values = [rng.randint(0, size * 4) for _ in range(size)]
+    if shape == "sorted":
+        values.sort()
+    elif shape == "reversed":
+        values.sort(reverse=True)
+    return values
+
+
+def make_graph(shape: str, size: int, rng: random.Random) -> tuple[list[dict], list[dict]]:
+    """Connected graph on ``size`` nodes: a spanning path plus shape-dependent extra edges"""
+    ids = [f"N{i}" for i in range(size)]
+    nodes = [{"id": node_id, "x": float(i), "y": 0.0} for i, node_id in enumerate(ids)]
+    pairs = [(i, i + 1) for i in range(size - 1)]
+    if shape == "dense":
+        pairs += [(i, j) for i in range(size) for j in range(i + 2, size) if rng.random() < 0.5]
+    elif shape != "path":
+        pairs += [tuple(sorted(rng.sample(range(size), 2))) for _ in range(size * 2)]
+    edges = [{"source": ids[i], "target": ids[j], "weight": 1 if shape == "duplicates" else rng.randint(1, 20)}
+             for i, j in pairs]
+    return nodes, edges
+
+
+def make_dp_request(algorithm: str, shape: str, size: int, rng: random.Random) -> DPRequest:
+    if algorithm == "fibonacci":
+        return DPRequest(input_data=size)
+    # Every knapsack/LCS step snapshots the whole table, so their inputs are scaled down
+    scaled = max(2, size // 4)
+    if algorithm == "knapsack":
+        weights = make_array(shape, scaled, rng)
+        return DPRequest(input_data={"weights": [w + 1 for w in weights],
+                                     "values": [rng.randint(1, 50) for _ in range(scaled)],
+                                     "capacity": scaled * 2})
+    if algorithm == "lcs":
+        alphabet = "AB" if shape == "duplicates" else "ACGT"
+        return DPRequest(input_data={"s1": "".join(rng.choice(alphabet) for _ in range(scaled)),
+                                     "s2": "".join(rng.choice(alphabet) for _ in range(scaled))})
+    return DPRequest(input_data=make_array(shape, size, rng))
+
+
+def build_cases(sizes: tuple[int, ...]) -> Iterator[Case]:
+    for size in sizes:
+        for shape in ARRAY_SHAPES:
+            rng = random.Random(f"{SEED}/{shape}/{size}")
+            array = make_array(shape, size, rng)
+            target = sorted(array)[size // 2]
+            for algorithm in SORTING_ALGORITHMS:
+                yield Case("sorting", algorithm, shape, size, SortingRequest(array=array),
+                           sorting_trace, render_sorting)
+                if algorithm in SELECTION_ALGORITHMS:
+                    yield Case("sorting", algorithm, f"{shape}-k{SELECTION_K}", size,
+                               SortingRequest(array=array, k=SELECTION_K), sorting_trace, render_sorting)
+            for algorithm in SEARCHING_ALGORITHMS:
+                yield Case("searching", algorithm, shape, size, SearchingRequest(array=array, target=target),
+                           searching_trace, render_searching)
+            for algorithm in TREE_ALGORITHMS:
+                yield Case("tree", algorithm, shape, size, TreeRequest(values=array, value=target),
+                           tree_trace, render_tree)
+            for algorithm in DP_ALGORITHMS:
+                # Fibonacci's only input is the size
+                if algorithm == "fibonacci" and shape != ARRAY_SHAPES[0]:
+                    continue
+                yield Case("dp", algorithm, shape, size, make_dp_request(algorithm, shape, size, rng),
+                           dp_trace, render_dp)
+
+        for shape in GRAPH_SHAPES:
+            rng = random.Random(f"{SEED}/graph/{shape}/{size}")
+            nodes, edges = make_graph(shape, size, rng)
+            request = GraphRequest(nodes=nodes, edges=edges, start_node="N0", end_node=f"N{size - 1}")
+            for algorithm in GRAPH_ALGORITHMS:
+                yield Case("graph", algorithm, shape, size, request, graph_trace, render_graph)
+
+
+def _generate(case: Case) -> int:
+    """Collect the case's steps the way the one-shot routes do and return the step count"""
+    steps, _ = collect(case.trace(case.algorithm, case.request))
+    return len(steps)
+
+
+def measure(case: Case, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        # Like timeit, keep the collector's pauses (which depend on earlier cases) out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            steps = _generate(case)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        _generate(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_seconds": best,
+        "steps": steps,
+        "steps_per_second": steps / best if best > 0 else None,
+        "peak_bytes": peak,
+        "response_bytes": len(case.render(case.algorithm, case.request)),
+    }
+
+
+def run(sizes: tuple[int, ...], repeat: int, match: str) -> dict:
+    results = {}
+    for case in build_cases(sizes):
+        if match and match not in case.name:
+            continue
+        try:
+            results[case.name] = measure(case, repeat)
+        except Exception as exc:  # Report broken cases without losing the rest of the run
+            results[case.name] = {"error": f"{type(exc).__name__}: {exc}"}
+        result = results[case.name]
+        if "error" in result:
+            print(f"{case.name:<40} ERROR {result['error']}", file=sys.stderr)
+        else:
+            print(f"{case.name:<40} {result['wall_seconds'] * 1000:>10.2f} ms {result['steps']:>8} steps "
+                  f"{result['peak_bytes'] / 1024:>10.0f} KiB peak {result['response_bytes']:>10} B", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "seed": SEED,
+        },
+        "cases": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_seconds: float) -> list[str]:
+    """Return a line per regressed metric, printing the full comparison table"""
+    regressions = []
+    for name, base in baseline["cases"].items():
+        now = current["cases"].get(name)
+        if now is None or "error" in base or "error" in now:
+            continue
+        cells = []
+        for metric in COMPARED_METRICS:
+            before, after = base[metric], now[metric]
+            change = (after - before) / before if before else 0.0
+            cells.append(f"{metric}={change:+.1%}")
+            # Timings of very short cases are mostly noise
+            if metric == "wall_seconds" and before < min_seconds:
+                continue
+            if change > threshold:
+                regressions.append(f"{name}: {metric} {before:.6g} -> {after:.6g} ({change:+.1%})")
+        print(f"{name:<40} " + " ".join(cells))
+
+    for name in sorted(set(current["cases"]) - set(baseline["cases"])):
+        print(f"{name:<40} new case")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--sizes", type=lambda value: tuple(int(size) for size in value.split(",")),
+                        default=DEFAULT_SIZES, help="comma separated input sizes (default: 16,64,256)")
+    common.add_argument("--repeat", type=int, default=3, help="timed runs per case, the fastest is kept")
+    common.add_argument("--match", default="", help="only run cases whose name contains this substring")
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", parents=[common], help="run the suite and write the results as JSON")
+    run_parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", parents=[common], help="compare results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", help="results file (default: run the suite now)")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="relative growth counted as a regression (default: 0.2)")
+    compare_parser.add_argument("--min-seconds", type=float, default=0.05,
+                                help="ignore wall time changes of cases faster than this (default: 0.05)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.sizes, args.repeat, args.match)
+        output = json.dumps(results, indent=2)
+        if args.output == "-":
+            print(output)
+        else:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run(tuple(baseline["meta"]["sizes"]), args.repeat, args.match)
+
+    regressions = compare(baseline, current, args.threshold, args.min_seconds)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
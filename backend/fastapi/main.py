@@ -1,12 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from algorithms import sorting, searching, graph, tree, dp
-from models.schemas import AlgorithmInfo
+from models.schemas import AlgorithmInfo, TracePage
+from services.cache import trace_cache
+from services.datasets import dataset_store
+from services.executor import step_executor
+from services.metrics import METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from services.sessions import MAX_PAGE_STEPS, read_page, trace_sessions
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The worker processes would otherwise outlive the server
+    step_executor.shutdown()
+
 
 app = FastAPI(
     title="DSA Visualizer API",
     description="Backend API for Data Structures and Algorithms Visualization",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -18,6 +34,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-phase request metrics (added last so it also times the CORS middleware)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers (with versioned prefix)
 app.include_router(sorting.router, prefix="/api/v1/sorting", tags=["Sorting v1"])
 app.include_router(searching.router, prefix="/api/v1/searching", tags=["Searching v1"])
@@ -47,15 +66,23 @@ async def get_all_algorithms():
         AlgorithmInfo(name="Selection Sort", category="sorting", complexity_time="O(n²)", complexity_space="O(1)"),
         AlgorithmInfo(name="Insertion Sort", category="sorting", complexity_time="O(n²)", complexity_space="O(1)"),
         AlgorithmInfo(name="Merge Sort", category="sorting", complexity_time="O(n log n)", complexity_space="O(n)"),
+        AlgorithmInfo(name="Bottom-up Merge Sort", category="sorting", complexity_time="O(n log n)", complexity_space="O(n)"),
+        AlgorithmInfo(name="Natural Merge Sort", category="sorting", complexity_time="O(n log n)", complexity_space="O(n)"),
         AlgorithmInfo(name="Quick Sort", category="sorting", complexity_time="O(n log n)", complexity_space="O(log n)"),
         AlgorithmInfo(name="Heap Sort", category="sorting", complexity_time="O(n log n)", complexity_space="O(1)"),
         AlgorithmInfo(name="Radix Sort", category="sorting", complexity_time="O(nk)", complexity_space="O(n+k)"),
         AlgorithmInfo(name="Counting Sort", category="sorting", complexity_time="O(n+k)", complexity_space="O(k)"),
+        AlgorithmInfo(name="Bucket Sort", category="sorting", complexity_time="O(n+k)", complexity_space="O(n+k)"),
+        AlgorithmInfo(name="Quickselect", category="sorting", complexity_time="O(n) average", complexity_space="O(1)"),
+        AlgorithmInfo(name="Median of Medians", category="sorting", complexity_time="O(n)", complexity_space="O(log n)"),
+        AlgorithmInfo(name="Heap Top-k", category="sorting", complexity_time="O(n log k)", complexity_space="O(1)"),
         
         # Searching
         AlgorithmInfo(name="Linear Search", category="searching", complexity_time="O(n)", complexity_space="O(1)"),
         AlgorithmInfo(name="Binary Search", category="searching", complexity_time="O(log n)", complexity_space="O(1)"),
         AlgorithmInfo(name="Jump Search", category="searching", complexity_time="O(√n)", complexity_space="O(1)"),
+        AlgorithmInfo(name="Eytzinger Search", category="searching", complexity_time="O(log n)", complexity_space="O(n)"),
+        AlgorithmInfo(name="B-tree Search", category="searching", complexity_time="O(log n)", complexity_space="O(n)"),
         
         # Graph
         AlgorithmInfo(name="BFS", category="graph", complexity_time="O(V+E)", complexity_space="O(V)"),
@@ -85,3 +112,58 @@ async def get_all_algorithms():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request phase latencies, step counts and HTTP counters in Prometheus text format"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/v1/admin/cache")
+async def get_cache_stats():
+    """Trace cache hit/miss/eviction counters and current size"""
+    return trace_cache.stats()
+
+
+@app.delete("/api/v1/admin/cache")
+async def clear_cache():
+    """Drop every cached trace (counters are kept)"""
+    trace_cache.clear()
+    return trace_cache.stats()
+
+
+@app.get("/api/v1/admin/datasets")
+async def get_dataset_stats():
+    """Registered search datasets, their memory use and hit/eviction counters"""
+    return dataset_store.stats()
+
+
+@app.get("/api/v1/admin/executor")
+async def get_executor_stats():
+    """Worker pool settings and the number of jobs running or queued"""
+    return step_executor.stats()
+
+
+@app.get("/api/v1/traces/{session_id}/steps", response_model=TracePage)
+async def get_trace_steps(session_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_STEPS)):
+    """Page through a trace session opened with POST /api/v1/{category}/{algorithm}/session"""
+    session = trace_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Trace session not found or expired")
+    payload = await run_in_threadpool(read_page, session, offset, limit)
+    return Response(content=payload, media_type="application/json")
+
+
+@app.delete("/api/v1/traces/{session_id}")
+async def close_trace_session(session_id: str):
+    """Release a trace session before it expires"""
+    if not trace_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Trace session not found or expired")
+    return {"deleted": session_id}
+
+
+@app.get("/api/v1/admin/traces")
+async def get_trace_session_stats():
+    """Open trace sessions, their memory use and expiry/eviction counters"""
+    return trace_sessions.stats()
@@ -0,0 +1,162 @@
+"""Slotted step records yielded by the algorithm generators.
+
+Building a pydantic step model validates and copies every field of every
+step inside the algorithms' inner loops, although the server built the
+values itself. The generators yield these records instead: a record only
+stores its fields, and a whole trace is turned into the wire format once,
+when the response is encoded (``services.encoding.encode_trace``).
+
+Each record declares the fields of the step model it stands for, in the
+same order, and is serialized through a TypedDict of that model's fields,
+so the bytes are those the model would produce. ``to_model`` builds the
+validated model for callers that want one.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, ClassVar, Optional, get_args
+
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from models.schemas import DecisionStep, DPStep, GraphStep, IndexSet, ProbeStep, SearchingStep, SortingStep, TreeStep
+
+
+# Step model -> TypedDict of its fields, filled in by step_record
+_STEP_DICTS: dict[type[BaseModel], type] = {}
+
+
+def _fields_dict(model: type[BaseModel], overrides: Optional[dict] = None) -> type:
+    """A TypedDict with the fields of ``model``; serializing one matches dumping the model"""
+    overrides = overrides or {}
+    return TypedDict(f"{model.__name__}Dict",
+                     {name: overrides.get(name, info.annotation) for name, info in model.model_fields.items()})
+
+
+class StepRecord:
+    """Base of the step records; subclasses are declared with ``step_record``"""
+
+    __slots__ = ()
+
+    model: ClassVar[type[BaseModel]]
+    _fields: ClassVar[tuple[str, ...]]
+    _values: ClassVar[Callable[["StepRecord"], tuple]]
+    _adapter: ClassVar[TypeAdapter]
+
+    def to_dict(self) -> dict:
+        """The step as plain data, like ``model_dump()`` of the validated model"""
+        return dict(zip(self._fields, self._values(self)))
+
+    def to_json(self) -> str:
+        return self._adapter.dump_json(self.to_dict()).decode()
+
+    def to_model(self) -> BaseModel:
+        return self.model.model_validate(self.to_dict())
+
+
+def step_record(model: type[BaseModel]):
+    """Class decorator turning a field list into a slotted record for ``model``"""
+    def decorate(cls):
+        cls = dataclass(slots=True, kw_only=True)(cls)
+        if cls.__slots__ != tuple(model.model_fields):
+            raise TypeError(f"{cls.__name__} fields must match {model.__name__} in name and order")
+        cls.model = model
+        cls._fields = cls.__slots__
+        cls._values = attrgetter(*cls.__slots__)
+        _STEP_DICTS[model] = _fields_dict(model)
+        cls._adapter = TypeAdapter(_STEP_DICTS[model])
+        return cls
+    return decorate
+
+
+@lru_cache(maxsize=None)
+def response_adapter(response_model: type[BaseModel]) -> TypeAdapter:
+    """Serializer for a ``response_model`` body dumped with its steps as record dicts"""
+    step_model, = get_args(response_model.model_fields["steps"].annotation)
+    overrides = {"steps": list[_STEP_DICTS[step_model]]}
+    # Other nested models are dumped to dicts too (Optional[Model] fields only)
+    for name, info in response_model.model_fields.items():
+        nested = [arg for arg in get_args(info.annotation) if isinstance(arg, type) and issubclass(arg, BaseModel)]
+        if name != "steps" and nested:
+            overrides[name] = Optional[_fields_dict(nested[0])]
+    return TypeAdapter(_fields_dict(response_model, overrides))
+
+
+@step_record(SortingStep)
+class SortingRecord(StepRecord):
+    array: list[int]
+    comparing: Optional[IndexSet] = None
+    swapping: Optional[list[int]] = None
+    sorted: IndexSet = field(default_factory=list)
+    pivot: Optional[int] = None
+    buckets: Optional[list[list[int]]] = None
+    description: str
+
+
+@step_record(SearchingStep)
+class SearchingRecord(StepRecord):
+    array: list[int]
+    current: Optional[int] = None
+    left: Optional[int] = None
+    right: Optional[int] = None
+    mid: Optional[int] = None
+    found: bool = False
+    description: str
+
+
+@step_record(ProbeStep)
+class ProbeRecord(StepRecord):
+    index: Optional[int] = None
+    value: Optional[int] = None
+    left: Optional[int] = None
+    right: Optional[int] = None
+    page: Optional[int] = None
+    pages: int = 0
+    found: bool = False
+    description: str
+
+
+@step_record(DecisionStep)
+class DecisionRecord(StepRecord):
+    index: Optional[int] = None
+    value: Optional[int] = None
+    left: Optional[int] = None
+    right: Optional[int] = None
+    depth: Optional[int] = None
+    found: bool = False
+    description: str
+
+
+@step_record(GraphStep)
+class GraphRecord(StepRecord):
+    visited: list[str]
+    current: Optional[str] = None
+    queue: Optional[list[str]] = None
+    stack: Optional[list[str]] = None
+    distances: Optional[dict[str, float]] = None
+    path: Optional[list[str]] = None
+    mst_edges: Optional[list[dict]] = None
+    description: str
+
+    def to_dict(self) -> dict:
+        values = StepRecord.to_dict(self)
+        if self.distances is not None:
+            # Validating the model would turn the integer distances into floats
+            values["distances"] = {node: float(d) for node, d in self.distances.items()}
+        return values
+
+
+@step_record(TreeStep)
+class TreeRecord(StepRecord):
+    tree: dict
+    current: Optional[int] = None
+    visited: list[int] = field(default_factory=list)
+    comparing: Optional[int] = None
+    description: str
+
+
+@step_record(DPStep)
+class DPRecord(StepRecord):
+    table: list[list[Any]]
+    current_cell: Optional[tuple[int, int]] = None
+    description: str
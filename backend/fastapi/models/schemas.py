@@ -1,5 +1,32 @@
-from pydantic import BaseModel
-from typing import Any, Optional
+import math
+
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Literal, Optional, Union
+
+
+StepDetail = Literal["pass", "operation", "comparison"]
+TraceMode = Literal["full", "none"]  # "none" records no steps and returns only the result
+HighlightMode = Literal["indices", "ranges"]  # How sorted/comparing index sets are written
+SortingEngine = Literal["python", "numpy"]  # "numpy": vectorized large-input mode, pass-level steps only
+PivotStrategy = Literal["last", "median3", "ninther", "random"]
+PartitionScheme = Literal["lomuto", "three_way"]  # "three_way" settles every key equal to the pivot at once
+IndexSet = Union[list[int], list[list[int]]]  # Indices, or [lo, hi] inclusive ranges with highlights="ranges"
+InputGenerator = Literal["random", "sorted", "reversed", "nearly_sorted", "few_unique", "sawtooth", "organ_pipe", "zipf"]
+
+MAX_GENERATED_SIZE = 1_000_000
+# Generated values are int64: range·n and unique are exclusive upper bounds, so at most 2**63
+MAX_GENERATED_BOUND = 2 ** 63
+# Parameters each input generator takes, with their defaults (see services/generators.py)
+GENERATOR_PARAMS: dict[str, dict[str, float]] = {
+    "random": {"range": 1.0},            # Values in [0, range·n)
+    "sorted": {"range": 1.0},
+    "reversed": {"range": 1.0},
+    "nearly_sorted": {"range": 1.0, "swaps": 0.01},  # Fraction of n random swaps applied to sorted values
+    "few_unique": {"unique": 8},
+    "sawtooth": {"teeth": 8},
+    "organ_pipe": {},
+    "zipf": {"a": 1.5},                  # Zipf exponent
+}
 
 
 class AlgorithmInfo(BaseModel):
@@ -10,16 +37,79 @@ class AlgorithmInfo(BaseModel):
     description: Optional[str] = None
 
 
-class SortingRequest(BaseModel):
-    array: list[int]
+class GeneratedInput(BaseModel):
+    array: Optional[list[int]] = None
+    generator: Optional[InputGenerator] = None  # Instead of array: build n values server-side
+    n: Optional[int] = Field(default=None, ge=0, le=MAX_GENERATED_SIZE)
+    seed: int = Field(default=0, ge=0)     # Generator seed
+    params: dict[str, float] = {}          # Generator parameters, see GENERATOR_PARAMS
+
+    def input_sources(self) -> dict[str, Any]:
+        """The fields that can give the request's input; exactly one must be set"""
+        return {"array": self.array, "generator": self.generator}
+
+    @model_validator(mode="after")
+    def check_input(self):
+        sources = self.input_sources()
+        if sum(value is not None for value in sources.values()) != 1:
+            names = list(sources)
+            raise ValueError(f"Provide either {', '.join(names[:-1])} or {names[-1]}")
+        if self.generator is not None:
+            if self.n is None:
+                raise ValueError("n is required with generator")
+            unknown = set(self.params) - set(GENERATOR_PARAMS[self.generator])
+            if unknown:
+                allowed = ", ".join(GENERATOR_PARAMS[self.generator]) or "none"
+                raise ValueError(f"Unknown params for {self.generator}: {', '.join(sorted(unknown))}. Allowed: {allowed}")
+            params = {**GENERATOR_PARAMS[self.generator], **self.params}
+            if any(params.get(name, 1) <= 0 for name in ("range", "unique", "teeth", "a")):
+                raise ValueError("range, unique, teeth and a must be positive")
+            if not 0 <= params.get("swaps", 0) <= 1:
+                raise ValueError("swaps must be within 0-1")
+            if not all(math.isfinite(value) for value in params.values()):
+                raise ValueError("params must be finite")
+            bounds = (params.get("range", 0) * self.n, params.get("unique", 0))
+            if any(int(bound) > MAX_GENERATED_BOUND for bound in bounds):
+                raise ValueError(f"range·n and unique must be at most {MAX_GENERATED_BOUND} (values are int64)")
+        return self
+
+
+class SortingRequest(GeneratedInput):
     speed: Optional[int] = 50  # Animation speed
+    detail: StepDetail = "comparison"  # Step granularity recorded in the trace
+    trace: TraceMode = "full"
+    format: Literal["full", "delta"] = "full"  # Step trace encoding
+    keyframe_interval: int = Field(default=64, ge=1)  # Delta format only
+    highlights: HighlightMode = "indices"
+    engine: SortingEngine = "python"  # "numpy" is offered by counting, radix and bucket sort
+    radix_base: int = Field(default=10, ge=2, le=65536)  # Digit base of radix sort
+    pivot: PivotStrategy = "last"  # Quick sort pivot choice
+    partition: PartitionScheme = "lomuto"  # Quick sort partition scheme
+    pivot_seed: int = 0  # Seed of the "random" pivot strategy
+    gallop: bool = True  # Galloping merges in the bottom-up and natural merge sorts
+    bucket_count: Optional[int] = Field(default=None, ge=1, le=65536)  # Bucket sort; default 5-10 by size
+    bucket_algorithm: str = "insertion"  # Sorting algorithm run on each bucket
+    parallel: bool = False  # Bucket sort: sort the buckets in subtask worker processes
+    k: Optional[int] = Field(default=None, ge=1)  # Selection algorithms: the k smallest / k-th smallest; default the median
+
+    @model_validator(mode="after")
+    def check_highlights(self):
+        if self.highlights == "ranges" and self.format == "delta":
+            raise ValueError('highlights="ranges" is not available with format="delta"')
+        return self
+
+    @model_validator(mode="after")
+    def check_engine(self):
+        if self.engine == "numpy" and self.array and not (-2**63 <= min(self.array) and max(self.array) < 2**63):
+            raise ValueError('engine="numpy" needs values that fit in int64')
+        return self
 
 
 class SortingStep(BaseModel):
     array: list[int]
-    comparing: Optional[list[int]] = None  # Indices being compared
+    comparing: Optional[IndexSet] = None   # Indices being compared
     swapping: Optional[list[int]] = None   # Indices being swapped
-    sorted: list[int] = []                 # Already sorted indices
+    sorted: IndexSet = []                  # Already sorted indices
     pivot: Optional[int] = None            # Pivot index for quick sort
     buckets: Optional[list[list[int]]] = None  # Buckets for bucket sort
     description: str
@@ -32,9 +122,96 @@ class SortingResponse(BaseModel):
     total_swaps: int
 
 
-class SearchingRequest(BaseModel):
-    array: list[int]
+class SortingDeltaStep(BaseModel):
+    keyframe: Optional[list[int]] = None   # Full array snapshot, replaces the running array
+    ops: list[list[Union[str, int]]] = []  # ["c", i, j] compare, ["s", i, j] swap, ["w", i, v] write
+    swapping: Optional[list[int]] = None
+    sorted: Optional[list[int]] = None     # Omitted when unchanged from the previous step
+    pivot: Optional[int] = None
+    buckets: Optional[list[list[int]]] = None
+    description: str
+
+
+class SortingDeltaResponse(BaseModel):
+    algorithm: str
+    format: Literal["delta"] = "delta"
+    keyframe_interval: int
+    steps: list[SortingDeltaStep]
+    total_comparisons: int
+    total_swaps: int
+
+
+class SortingResultResponse(BaseModel):
+    algorithm: str
+    trace: Literal["none"] = "none"
+    result: list[int]  # Final array
+    total_comparisons: int
+    total_swaps: int
+
+
+class SortingRaceRequest(GeneratedInput):
+    algorithms: Optional[list[str]] = None  # Sorting algorithms to race, every registered one when omitted
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "none"              # "full" adds every algorithm's steps
+    highlights: HighlightMode = "indices"
+
+
+class SortingRaceEntry(BaseModel):
+    algorithm: str
+    total_comparisons: int
+    total_swaps: int
+    wall_seconds: float                    # Step generation time in its worker
+    total_steps: int
+    steps: list[SortingStep] = []          # Only with trace="full"
+
+
+class SortingRaceResponse(BaseModel):
+    total_ticks: int                       # Longest trace; at tick t each entry shows step min(t, total_steps - 1)
+    results: list[SortingRaceEntry]        # In the requested order
+
+
+class ComplexityFit(BaseModel):
+    curve: str                             # Best-fitting growth curve, e.g. "O(n log n)"
+    coefficient: float                     # c in value ≈ a + c·f(n)
+    constant: float                        # a, the fixed cost
+    error: float                           # Relative RMS error of the fit
+
+
+class ComplexityMetric(BaseModel):
+    series: dict[str, list[int]]           # Input shape -> value at sizes[i] (cut short past the access budget)
+    fits: dict[str, Optional[ComplexityFit]]  # Input shape -> best fit; None with too few sizes to fit
+    worst_case: Optional[ComplexityFit]    # Fit of the largest value over the shapes at each size
+
+
+class ComplexityProfile(BaseModel):
+    algorithm: str
+    version: str                           # Fingerprint of the algorithm's source; profiles are cached per version
+    sizes: list[int]
+    shapes: list[str]
+    metrics: dict[str, ComplexityMetric]   # comparisons, swaps, reads, writes, aux_bytes
+
+
+class DatasetInput(GeneratedInput):
+    dataset_id: Optional[str] = None       # Instead of array: a dataset registered at /searching/datasets
+
+    def input_sources(self) -> dict[str, Any]:
+        return {**super().input_sources(), "dataset_id": self.dataset_id}
+
+
+class SearchingRequest(DatasetInput):
     target: int
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "full"
+
+
+class DatasetInfo(BaseModel):
+    dataset_id: str                        # Hash of the sorted values
+    size: int
+    min: Optional[int] = None              # None for an empty dataset
+    max: Optional[int] = None
+    unique: int                            # Distinct values
+    presorted: bool                        # The registered array was already in ascending order
+    nbytes: int                            # Memory the sorted copy takes in the dataset store
 
 
 class SearchingStep(BaseModel):
@@ -54,6 +231,117 @@ class SearchingResponse(BaseModel):
     found_at: Optional[int] = None
 
 
+MAX_BATCH_TARGETS = 100_000
+MAX_TRACED_TARGETS = 32
+
+
+class SearchingBatchRequest(DatasetInput):
+    targets: list[int] = Field(min_length=1, max_length=MAX_BATCH_TARGETS)
+    algorithms: Optional[list[str]] = None  # Algorithms whose probes are counted, every registered one when omitted
+    traced: list[int] = Field(default=[], max_length=MAX_TRACED_TARGETS)  # Indices into targets to return steps for
+    detail: StepDetail = "comparison"
+
+    @model_validator(mode="after")
+    def check_traced(self):
+        if any(not 0 <= index < len(self.targets) for index in self.traced):
+            raise ValueError("traced holds indices into targets")
+        return self
+
+
+class SearchingBatchTrace(BaseModel):
+    target_index: int                      # Index into the request's targets
+    algorithm: str
+    steps: list[SearchingStep]
+    found: bool
+    found_at: Optional[int] = None
+
+
+class SearchingBatchResponse(BaseModel):
+    size: int                              # Number of values searched, in ascending order
+    found: list[bool]                      # Per target
+    found_at: list[Optional[int]]          # First position of each target in the sorted values
+    probes: dict[str, list[int]]           # Algorithm -> positions it examines for each target
+    traces: list[SearchingBatchTrace]      # One per traced target and algorithm
+
+
+MAX_DECISION_TREE_NODES = 65_536
+
+
+class DecisionTreeRequest(SearchingRequest):
+    include_tree: bool = False             # Add the whole tree (at most MAX_DECISION_TREE_NODES nodes)
+
+
+class DecisionStep(BaseModel):
+    index: Optional[int] = None            # Node: the sorted position it checks
+    value: Optional[int] = None
+    left: Optional[int] = None             # Range of positions the node decides between
+    right: Optional[int] = None
+    depth: Optional[int] = None            # Root is 0
+    found: bool = False
+    description: str
+
+
+class DecisionTree(BaseModel):
+    # Node i checks sorted position i
+    values: list[int]
+    lower: list[Optional[int]]             # Child taken when the target is below values[i], None past a leaf
+    higher: list[Optional[int]]
+    depth: list[int]
+
+
+class DecisionTreeResponse(BaseModel):
+    algorithm: str
+    tree_id: str                           # Hash of the sorted values (a dataset_id for dataset requests)
+    size: int
+    depth: int                             # Levels: the most midpoints a search checks
+    root: Optional[int] = None
+    steps: list[DecisionStep]
+    found: bool
+    found_at: Optional[int] = None
+    tree: Optional[DecisionTree] = None
+
+
+MappedDtype = Literal["int32", "int64"]
+
+
+class MappedSearchRequest(BaseModel):
+    file: str                              # Sorted file in MAPPED_DATASET_DIR: .npy, or raw little-endian ints
+    dtype: Optional[MappedDtype] = None    # Element type of a raw file (a .npy file records its own)
+    target: int
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "full"
+
+
+class MappedFileInfo(BaseModel):
+    file: str
+    dtype: Optional[MappedDtype] = None    # None for a raw file until a dtype is given
+    size: Optional[int] = None             # Elements, None while the dtype is unknown
+    nbytes: int                            # File size
+    page_size: int
+
+
+class ProbeStep(BaseModel):
+    index: Optional[int] = None            # Position read
+    value: Optional[int] = None            # Value at index
+    left: Optional[int] = None             # Search range
+    right: Optional[int] = None
+    page: Optional[int] = None             # File page holding index
+    pages: int = 0                         # Distinct pages read so far
+    found: bool = False
+    description: str
+
+
+class MappedSearchResponse(BaseModel):
+    algorithm: str
+    file: str
+    size: int
+    steps: list[ProbeStep]
+    found: bool
+    found_at: Optional[int] = None
+    reads: int                             # Elements read, bound checks included
+    pages: int                             # Distinct pages those reads fell in
+
+
 class GraphNode(BaseModel):
     id: str
     x: float
@@ -72,6 +360,8 @@ class GraphRequest(BaseModel):
     edges: list[GraphEdge]
     start_node: Optional[str] = None
     end_node: Optional[str] = None
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "full"
 
 
 class GraphStep(BaseModel):
@@ -104,6 +394,8 @@ class TreeRequest(BaseModel):
     tree: Optional[dict] = None
     values: Optional[list[int]] = None    # For building tree
     value: Optional[int] = None           # For insert/delete
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "full"
 
 
 class TreeStep(BaseModel):
@@ -124,6 +416,8 @@ class DPRequest(BaseModel):
     input_data: Any                        # Flexible input for different DP problems
     n: Optional[int] = None
     capacity: Optional[int] = None         # For knapsack
+    detail: StepDetail = "comparison"
+    trace: TraceMode = "full"
 
 
 class DPStep(BaseModel):
@@ -136,3 +430,19 @@ class DPResponse(BaseModel):
     algorithm: str
     steps: list[DPStep]
     result: Any
+
+
+class TraceSessionInfo(BaseModel):
+    session_id: str
+    category: str
+    algorithm: str
+    total_steps: int
+    expires_in: float                      # Seconds without a read before the session is dropped
+    summary: dict[str, Any]                # Totals / result of the full response
+
+
+class TracePage(BaseModel):
+    session_id: str
+    offset: int
+    total_steps: int
+    steps: list[Any]
@@ -0,0 +1,106 @@
+"""Content-addressed LRU cache for serialized algorithm responses.
+
+Responses are keyed by a hash of (category, algorithm, canonical request
+body) and stored as the exact bytes sent to the client, so a hit skips both
+the algorithm and pydantic serialization. The cache is bounded by the total
+size of the stored payloads and evicts least recently used entries first.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from services.encoding import DEFAULT_MEDIA_TYPES, JSON_MEDIA_TYPE, negotiate
+from services.executor import step_executor
+from services.metrics import label_request
+
+TRACE_CACHE_MAX_BYTES = int(os.getenv("TRACE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Request fields that only affect the client (not the trace) and are left out of the key
+NON_TRACE_FIELDS = {"speed"}
+
+
+class TraceCache:
+    """Byte-bounded LRU map from request key to serialized response body"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        # A payload bigger than the whole budget would only flush everything else
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = payload
+            self.bytes += len(payload)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+trace_cache = TraceCache(TRACE_CACHE_MAX_BYTES)
+
+
+def trace_key(category: str, algorithm: str, request: BaseModel, media_type: str = JSON_MEDIA_TYPE) -> str:
+    """Hash of the category, algorithm, response encoding and canonicalized request body"""
+    body = json.dumps(request.model_dump(mode="json", exclude=NON_TRACE_FIELDS),
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{category}/{algorithm}\n{media_type}\n{body}".encode()).hexdigest()
+
+
+async def cached_response(category: str, algorithm: str, request: BaseModel,
+                          render: Callable[[str, BaseModel, str], bytes], http_request: Request,
+                          media_types: Sequence[str] = DEFAULT_MEDIA_TYPES) -> Response:
+    """Serve the rendered response body from the cache, rendering it in the worker pool on a miss.
+
+    The body is encoded in whichever of ``media_types`` the Accept header prefers.
+    """
+    label_request(http_request, category, algorithm)
+    media_type = negotiate(http_request, media_types)
+    key = trace_key(category, algorithm, request, media_type)
+    payload = trace_cache.get(key)
+    if payload is None:
+        payload = await step_executor.run(http_request, render, algorithm, request, media_type)
+        trace_cache.put(key, payload)
+    return Response(content=payload, media_type=media_type, headers={"Vary": "Accept"})
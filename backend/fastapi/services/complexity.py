@@ -0,0 +1,246 @@
+"""Empirical complexity profiles of the sorting algorithms.
+
+``profile_sorting`` runs an algorithm's step generator (result-only, at
+``detail=NONE``) on the seeded input of every shape (see
+``services/generators.py``), one shape per subtask worker, at sizes
+doubling from ``MIN_SIZE`` up to the requested maximum or the first run
+counting more than ``MAX_RUN_OPERATIONS`` (so the quadratic sorts stop
+around n = 512).
+Each run records:
+
+    comparisons, swaps  the algorithm's own counters
+    reads, writes       element accesses to the array being sorted (its working
+                        copy is a ``CountingList``); an output built in a
+                        separate list counts one write per element
+    aux_bytes           tracemalloc peak beyond the working copy, measured in a
+                        second, uninstrumented run
+
+Each series is fitted as ``a + c·f(n)`` (c >= 0) against
+``GROWTH_CURVES`` by least squares on the relative error, and the curve
+with the smallest error wins. Memory is only fitted from
+``AUX_FIT_MIN_SIZE`` up: Python shares the int objects up to 256, so
+smaller arrays look cheaper per element (and larger ones fit with a
+negative constant). The cutoff is on the counts rather than on wall time,
+so the sizes reached and the measured values are deterministic: profiles
+are cached per algorithm, source version and maximum size and computed
+once.
+"""
+import hashlib
+import inspect
+import math
+import threading
+import tracemalloc
+from functools import lru_cache
+from typing import Callable, Optional
+
+from models.schemas import ComplexityFit, ComplexityMetric, ComplexityProfile
+from services.detail import NONE
+from services.executor import ensure_job_active, subtask_pool
+from services.generators import generate_array
+from services.highlights import INDICES
+
+MIN_SIZE = 16
+# A shape's sizes stop doubling after the first run whose comparisons, swaps, reads and writes
+# add up to more than this (up to about a second of instrumented run time)
+MAX_RUN_OPERATIONS = 200_000
+AUX_FIT_MIN_SIZE = 256
+PROFILE_SHAPES = ("random", "sorted", "reversed", "few_unique")
+PROFILE_METRICS = ("comparisons", "swaps", "reads", "writes", "aux_bytes")
+
+GROWTH_CURVES: dict[str, Callable[[int], float]] = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: float(n),
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n²)": lambda n: float(n * n),
+}
+
+
+class AccessCounts:
+    __slots__ = ("reads", "writes")
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+
+
+class CountingList(list):
+    """A list that counts element reads and writes; its copies share the counts"""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, values, counts: AccessCounts):
+        super().__init__(values)
+        self.counts = counts
+
+    def __getitem__(self, index):
+        value = list.__getitem__(self, index)
+        self.counts.reads += len(value) if type(index) is slice else 1
+        return value
+
+    def __setitem__(self, index, value):
+        if type(index) is slice:
+            value = list(value)
+            self.counts.writes += len(value)
+        else:
+            self.counts.writes += 1
+        list.__setitem__(self, index, value)
+
+    def __iter__(self):
+        self.counts.reads += len(self)
+        return list.__iter__(self)
+
+    def copy(self) -> "CountingList":
+        return CountingList(self, self.counts)
+
+
+def _run(iterator: Callable, values: list[int]) -> tuple[list[int], int, int]:
+    trace = iterator(values, NONE, INDICES)
+    while True:
+        try:
+            next(trace)
+        except StopIteration as stop:
+            return stop.value
+
+
+def measure_case(iterator: Callable, shape: str, size: int) -> dict[str, int]:
+    """Subtask: the metrics of one run of ``iterator`` on the ``shape`` input of ``size``"""
+    values = generate_array(shape, size)
+    counts = AccessCounts()
+    result, comparisons, swaps = _run(iterator, CountingList(values, counts))
+    if not isinstance(result, CountingList):
+        counts.writes += len(result)
+
+    tracemalloc.start()
+    try:
+        working_copy = values.copy()
+        copy_bytes = tracemalloc.get_traced_memory()[1]
+        del working_copy
+        tracemalloc.reset_peak()
+        _run(iterator, values)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"comparisons": comparisons, "swaps": swaps, "reads": counts.reads, "writes": counts.writes,
+            "aux_bytes": max(0, peak - copy_bytes)}
+
+
+def _weighted_fit(f: list[float], y: list[int]) -> tuple[float, float]:
+    """(a, c) minimizing sum(((y - a - c·f) / y)²) with c >= 0 (zeros in y are weighted as ones)"""
+    w = [1 / max(v, 1) ** 2 for v in y]
+    sw, sf, sy = sum(w), sum(wi * fi for wi, fi in zip(w, f)), sum(wi * yi for wi, yi in zip(w, y))
+    sff = sum(wi * fi * fi for wi, fi in zip(w, f))
+    sfy = sum(wi * fi * yi for wi, fi, yi in zip(w, f, y))
+    det = sw * sff - sf * sf
+    if det > 1e-12 * sw * sff:
+        c = (sw * sfy - sf * sy) / det
+        if c >= 0:
+            return (sy * sff - sf * sfy) / det, c
+    # Flat (or shrinking) values: the constant alone
+    return sy / sw, 0.0
+
+
+def _fit_error(f: list[float], y: list[int], a: float, c: float) -> float:
+    return math.sqrt(sum(((yi - a - c * fi) / max(yi, 1)) ** 2 for fi, yi in zip(f, y)) / len(y))
+
+
+def fit_growth(sizes: list[int], values: list[int]) -> ComplexityFit:
+    """Best ``a + c·f(n)`` fit of ``values`` over ``GROWTH_CURVES`` (relative least squares).
+
+    Ties go to the slower-growing curve.
+    """
+    best: Optional[ComplexityFit] = None
+    for curve, growth in GROWTH_CURVES.items():
+        # A constant is the a term alone
+        f = [0.0 if curve == "O(1)" else growth(n) for n in sizes]
+        constant, coefficient = _weighted_fit(f, values)
+        error = _fit_error(f, values, constant, coefficient)
+        if best is None or error < best.error - 1e-9:
+            best = ComplexityFit(curve=curve, coefficient=coefficient, constant=constant, error=error)
+    return best
+
+
+def profile_sizes(max_size: int) -> list[int]:
+    sizes = [MIN_SIZE]
+    while sizes[-1] * 2 <= max_size:
+        sizes.append(sizes[-1] * 2)
+    return sizes
+
+
+def measure_shape(iterator: Callable, shape: str, sizes: list[int]) -> list[dict[str, int]]:
+    """Subtask: ``measure_case`` at each size in turn, up to the first run over ``MAX_RUN_OPERATIONS``"""
+    runs = []
+    for size in sizes:
+        run = measure_case(iterator, shape, size)
+        runs.append(run)
+        if run["comparisons"] + run["swaps"] + run["reads"] + run["writes"] > MAX_RUN_OPERATIONS:
+            break
+    return runs
+
+
+def _fit(metric: str, sizes: list[int], values: list[int]) -> Optional[ComplexityFit]:
+    sizes = sizes[:len(values)]
+    if metric == "aux_bytes":
+        # Python shares the int objects up to 256, so memory per element only settles at larger sizes
+        points = [(n, value) for n, value in zip(sizes, values) if n >= AUX_FIT_MIN_SIZE]
+        if len(points) < 3:
+            return None
+        sizes, values = [n for n, _ in points], [value for _, value in points]
+    return fit_growth(sizes, values)
+
+
+@lru_cache(maxsize=None)
+def source_version(func: Callable) -> str:
+    """Fingerprint of the source of the module ``func`` is defined in"""
+    return hashlib.sha256(inspect.getsource(inspect.getmodule(func)).encode()).hexdigest()[:12]
+
+
+def profile_sorting(algorithm: str, iterator: Callable, max_size: int) -> bytes:
+    """Worker-side: profile ``iterator`` and serialize the ComplexityProfile"""
+    sizes = profile_sizes(max_size)
+    pool = subtask_pool()
+    jobs = {shape: pool.submit(measure_shape, iterator, shape, sizes) for shape in PROFILE_SHAPES}
+    try:
+        runs = {}
+        for shape, job in jobs.items():
+            ensure_job_active()
+            runs[shape] = job.result()
+    finally:
+        for job in jobs.values():
+            job.cancel()
+
+    # Sizes every shape reached, for the worst-case series
+    common = min(len(shape_runs) for shape_runs in runs.values())
+    sizes = sizes[:max(len(shape_runs) for shape_runs in runs.values())]
+    metrics = {}
+    for metric in PROFILE_METRICS:
+        series = {shape: [run[metric] for run in shape_runs] for shape, shape_runs in runs.items()}
+        worst = [max(values) for values in zip(*series.values())]
+        metrics[metric] = ComplexityMetric(
+            series=series,
+            fits={shape: _fit(metric, sizes, values) for shape, values in series.items()},
+            worst_case=_fit(metric, sizes[:common], worst),
+        )
+    profile = ComplexityProfile(algorithm=algorithm, version=source_version(iterator), sizes=sizes,
+                                shapes=list(PROFILE_SHAPES), metrics=metrics)
+    return profile.model_dump_json().encode()
+
+
+class ProfileCache:
+    """Serialized profiles by (algorithm, version, largest requested size)"""
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str, int], bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str, int]) -> Optional[bytes]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: tuple[str, str, int], payload: bytes) -> None:
+        with self._lock:
+            self._entries[key] = payload
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,123 @@
+"""Registered search datasets: sort an array once, search it many times.
+
+``POST /api/v1/searching/datasets`` takes an array (or a generator spec)
+and keeps its sorted copy here; searching requests then name it with
+``"dataset_id"`` instead of sending ``"array"``. The sorted-input searches
+(binary, jump, interpolation, exponential) skip their own sort on a
+dataset, so a search costs its probes rather than an O(n log n) sort plus
+the upload. Linear search scans the sorted copy.
+
+Ids are a hash of the sorted values, so registering the same values again
+(in any order) returns the same id, and a cached trace keyed on the id
+stays valid. The store is an LRU bounded by ``DATASET_STORE_MAX_BYTES``
+(the estimated size of the Python lists it holds): registering past the
+budget drops the least recently searched datasets, whose ids then answer
+404 until registered again.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from models.schemas import DatasetInfo, GeneratedInput
+from services.generators import request_array
+
+DATASET_STORE_MAX_BYTES = int(os.getenv("DATASET_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def _list_bytes(values: list[int]) -> int:
+    """Size of ``values`` with its int objects (each counted once per element, as Python may share them)"""
+    return sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+
+
+class Dataset:
+    """A registered array: its sorted values and their summary"""
+
+    __slots__ = ("values", "info")
+
+    def __init__(self, values: list[int], info: DatasetInfo):
+        self.values = values
+        self.info = info
+
+
+def build_dataset(request: GeneratedInput) -> Dataset:
+    """Worker-side: sort the request's array and summarize it"""
+    values = request_array(request)
+    presorted = all(a <= b for a, b in zip(values, values[1:]))
+    if not presorted:
+        values = sorted(values)
+    digest = hashlib.sha256(",".join(map(str, values)).encode()).hexdigest()
+    unique = sum(1 for a, b in zip(values, values[1:]) if a != b) + 1 if values else 0
+    info = DatasetInfo(
+        dataset_id=digest[:16],
+        size=len(values),
+        min=values[0] if values else None,
+        max=values[-1] if values else None,
+        unique=unique,
+        presorted=presorted,
+        nbytes=_list_bytes(values),
+    )
+    return Dataset(values, info)
+
+
+class DatasetStore:
+    """Byte-bounded LRU map from dataset id to Dataset"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Dataset] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, dataset_id: str) -> Optional[Dataset]:
+        with self._lock:
+            dataset = self._entries.get(dataset_id)
+            if dataset is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(dataset_id)
+            self.hits += 1
+            return dataset
+
+    def put(self, dataset: Dataset) -> Dataset:
+        """Store ``dataset`` (or keep the stored one with the same id) and return what is stored"""
+        with self._lock:
+            dataset_id = dataset.info.dataset_id
+            stored = self._entries.get(dataset_id)
+            if stored is not None:
+                self._entries.move_to_end(dataset_id)
+                return stored
+            self._entries[dataset_id] = dataset
+            self.bytes += dataset.info.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.info.nbytes
+                self.evictions += 1
+            return dataset
+
+    def delete(self, dataset_id: str) -> bool:
+        with self._lock:
+            dataset = self._entries.pop(dataset_id, None)
+            if dataset is None:
+                return False
+            self.bytes -= dataset.info.nbytes
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+dataset_store = DatasetStore(DATASET_STORE_MAX_BYTES)
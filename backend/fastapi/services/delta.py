@@ -0,0 +1,122 @@
+"""Delta encoding for sorting step traces.
+
+A delta trace stores a full array snapshot (keyframe) every
+``keyframe_interval`` steps and, in between, only the operations that turn
+the previous step's array into the current one:
+
+    ["c", i, j, ...]  indices being compared (the step's ``comparing`` field)
+    ["s", i, j]       swap positions i and j
+    ["w", i, v]       write value v at position i
+
+``sorted`` is omitted when it is unchanged from the previous step. Decoding
+replays keyframes and operations and yields exactly the original steps.
+"""
+from typing import Iterable, Optional
+
+from models.records import SortingRecord
+from models.schemas import SortingDeltaStep, SortingStep
+
+COMPARE = "c"
+SWAP = "s"
+WRITE = "w"
+
+
+def patch_shadow(shadow: list[int], array: list[int], hints: Iterable[Optional[int]]) -> dict[int, int]:
+    """Patch ``shadow`` in place until it equals ``array`` and return {index: previous value}"""
+    if shadow == array:
+        return {}
+
+    # Most steps only touch the highlighted indices, so try those first and
+    # fall back to a full scan when they do not explain the change.
+    previous = {}
+    for i in hints:
+        if i is not None and 0 <= i < len(array) and shadow[i] != array[i]:
+            previous[i] = shadow[i]
+            shadow[i] = array[i]
+    if shadow != array:
+        for i in range(len(array)):
+            if shadow[i] != array[i]:
+                previous[i] = shadow[i]
+                shadow[i] = array[i]
+    return previous
+
+
+def _diff_ops(shadow: list[int], array: list[int], hints: Iterable[Optional[int]]) -> list[list]:
+    """Patch ``shadow`` in place until it equals ``array`` and return the ops applied"""
+    previous = patch_shadow(shadow, array, hints)
+    if len(previous) == 2:
+        i, j = previous
+        if previous[i] == array[j] and previous[j] == array[i]:
+            return [[SWAP, i, j]]
+    return [[WRITE, i, array[i]] for i in previous]
+
+
+def encode_sorting_trace(steps: Iterable[SortingRecord], keyframe_interval: int = 64) -> list[SortingDeltaStep]:
+    """Encode full sorting steps as keyframes plus per-step operations"""
+    encoded = []
+    shadow: Optional[list[int]] = None
+    prev_sorted: Optional[list[int]] = None
+
+    for index, step in enumerate(steps):
+        keyframe = None
+        ops = []
+        if step.comparing is not None:
+            ops.append([COMPARE, *step.comparing])
+
+        if shadow is None or index % keyframe_interval == 0 or len(shadow) != len(step.array):
+            keyframe = step.array.copy()
+            shadow = step.array.copy()
+        else:
+            hints = (step.comparing or []) + (step.swapping or []) + [step.pivot]
+            ops.extend(_diff_ops(shadow, step.array, hints))
+
+        encoded.append(SortingDeltaStep(
+            keyframe=keyframe,
+            ops=ops,
+            swapping=step.swapping,
+            sorted=None if step.sorted == prev_sorted else step.sorted,
+            pivot=step.pivot,
+            buckets=step.buckets,
+            description=step.description
+        ))
+        prev_sorted = step.sorted
+
+    return encoded
+
+
+def decode_sorting_trace(steps: Iterable[SortingDeltaStep]) -> list[SortingStep]:
+    """Rebuild full sorting steps from a delta-encoded trace"""
+    decoded = []
+    array: list[int] = []
+    sorted_indices: list[int] = []
+
+    for step in steps:
+        if step.keyframe is not None:
+            array = step.keyframe.copy()
+        if step.sorted is not None:
+            sorted_indices = step.sorted
+
+        comparing = None
+        for op in step.ops:
+            code = op[0]
+            if code == COMPARE:
+                comparing = list(op[1:])
+            elif code == SWAP:
+                i, j = op[1], op[2]
+                array[i], array[j] = array[j], array[i]
+            elif code == WRITE:
+                array[op[1]] = op[2]
+            else:
+                raise ValueError(f"Unknown delta op: {code}")
+
+        decoded.append(SortingStep(
+            array=array.copy(),
+            comparing=comparing,
+            swapping=step.swapping,
+            sorted=sorted_indices.copy(),
+            pivot=step.pivot,
+            buckets=step.buckets,
+            description=step.description
+        ))
+
+    return decoded
@@ -0,0 +1,28 @@
+"""Trace detail levels honoured by the step generators.
+
+Each generator checks the level before it builds a step, so coarser levels
+skip the snapshot work entirely while the counters stay exact:
+
+    pass        phase boundaries only (initial/final state, completed passes)
+    operation   plus every state change (swaps, writes, visits)
+    comparison  plus every comparison/probe (the full trace, the default)
+
+Requests with ``trace="none"`` run at ``NONE``, below every level, so the
+generators build no steps at all and only return their result and counters;
+sharing the traced code path keeps both modes in exact parity.
+
+Some steps only make sense at the coarsest level (e.g. "pass complete"
+summaries for algorithms whose finer steps already show it) and are
+emitted with ``detail == PASS``.
+"""
+NONE = -1
+PASS = 0
+OPERATION = 1
+COMPARISON = 2
+
+DETAIL_LEVELS = {"pass": PASS, "operation": OPERATION, "comparison": COMPARISON}
+
+
+def detail_level(request) -> int:
+    """Level a request's generator runs at: NONE for result-only requests, else its ``detail``"""
+    return NONE if request.trace == "none" else DETAIL_LEVELS[request.detail]
@@ -0,0 +1,88 @@
+"""Response body encodings and Accept header negotiation.
+
+The one-shot algorithm routes answer in JSON unless the client asks for
+something else:
+
+    application/json            default
+    application/x-msgpack       the same document as MessagePack (integers
+                                within int64/uint64)
+    application/x-packed-trace  int32 column layout (sorting / searching only,
+                                values within int32, see ``services/packed.py``)
+"""
+from typing import Sequence
+
+import msgpack
+from fastapi import HTTPException, Request
+from pydantic import BaseModel
+
+from models.records import StepRecord, response_adapter
+from services.metrics import phase
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+PACKED_MEDIA_TYPE = "application/x-packed-trace"
+
+DEFAULT_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+# Offered by the routes whose steps have a packed column layout
+TRACE_MEDIA_TYPES = DEFAULT_MEDIA_TYPES + (PACKED_MEDIA_TYPE,)
+
+MSGPACK_INT_MIN, MSGPACK_INT_MAX = -2 ** 63, 2 ** 64 - 1
+
+
+def negotiate(request: Request, offered: Sequence[str] = DEFAULT_MEDIA_TYPES) -> str:
+    """Pick the offered media type the Accept header prefers, falling back to the first offered"""
+    best, best_q = offered[0], 0.0
+    for part in request.headers.get("accept", "").split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type not in offered:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q <= 0:
+            continue
+        # Ties keep the server's order of preference
+        if q > best_q or (q == best_q and offered.index(media_type) < offered.index(best)):
+            best, best_q = media_type, q
+    return best
+
+
+def pack_msgpack(body) -> bytes:
+    """``body`` as MessagePack (422 if it holds an integer MessagePack cannot)"""
+    try:
+        return msgpack.packb(body)
+    except OverflowError:
+        detail = (f"MessagePack holds integers from {MSGPACK_INT_MIN} to {MSGPACK_INT_MAX}, "
+                  f"request application/json for larger ones")
+        raise HTTPException(status_code=422, detail=detail) from None
+
+
+def encode_model(response: BaseModel, media_type: str, exclude_none: bool = False) -> bytes:
+    """Serialize a response model as JSON or MessagePack"""
+    with phase("encoding"):
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return pack_msgpack(response.model_dump(exclude_none=exclude_none))
+        return response.model_dump_json(exclude_none=exclude_none).encode()
+
+
+def encode_trace(model: type[BaseModel], steps: list[StepRecord], media_type: str, **fields) -> bytes:
+    """Serialize a ``model`` response whose steps are still step records.
+
+    Only the other fields go through the model; the records are dumped into
+    its ``steps`` as they are (see models/records.py), which gives the same
+    body as validating every step first.
+    """
+    with phase("response_validation"):
+        response = model(steps=[], **fields)
+    with phase("encoding"):
+        body = response.model_dump()
+        body["steps"] = [step.to_dict() for step in steps]
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return pack_msgpack(body)
+        return response_adapter(model).dump_json(body)
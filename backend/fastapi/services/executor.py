@@ -0,0 +1,231 @@
+"""Worker pool that keeps CPU-bound step generation off the event loop.
+
+Route handlers hand their ``render_*`` function to ``step_executor.run``,
+which runs it in a process (default) or thread pool, bounded by a queue
+limit, a per-request time limit and the client staying connected:
+
+    STEP_EXECUTOR         "process" or "thread"
+    STEP_WORKERS          pool size (defaults to the CPU count)
+    STEP_QUEUE_LIMIT      jobs allowed to wait once every worker is busy
+    STEP_TIMEOUT_SECONDS  per-request time limit
+
+A full queue is rejected with 503 and an expired job with 504. Jobs that
+have not started are dropped when the client disconnects or times out;
+running jobs stop cooperatively the next time ``collect`` checks
+``ensure_job_active`` (a cancelled thread job also stops early).
+
+A job can itself fan data-parallel work out to ``subtask_pool()``, a
+process pool of ``SUBTASK_WORKERS`` (defaults to the CPU count) created on
+first use in the process running the job.
+"""
+import asyncio
+import multiprocessing.util
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from services import metrics
+
+STEP_EXECUTOR = os.getenv("STEP_EXECUTOR", "process")
+STEP_WORKERS = int(os.getenv("STEP_WORKERS", str(os.cpu_count() or 2)))
+STEP_QUEUE_LIMIT = int(os.getenv("STEP_QUEUE_LIMIT", "32"))
+STEP_TIMEOUT_SECONDS = float(os.getenv("STEP_TIMEOUT_SECONDS", "30"))
+SUBTASK_WORKERS = int(os.getenv("SUBTASK_WORKERS", str(os.cpu_count() or 2)))
+
+# How often a waiting request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.25
+# How often a job waiting on a subtask checks its own deadline and cancellation
+SUBTASK_POLL_SECONDS = 0.1
+
+ResultT = TypeVar("ResultT")
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job ran out of time or was cancelled"""
+
+
+class JobFailed(Exception):
+    """A job's exception, carried back from the worker as (status code, detail).
+
+    Exceptions such as pydantic's ValidationError do not survive pickling,
+    and one that fails to unpickle breaks the whole process pool.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+_job = threading.local()
+
+
+def ensure_job_active() -> None:
+    """Abort the current worker job if its deadline passed or it was cancelled"""
+    deadline = getattr(_job, "deadline", None)
+    if deadline is not None and time.time() > deadline:
+        raise JobCancelled("Step generation exceeded the time limit")
+    cancelled = getattr(_job, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise JobCancelled("Step generation was cancelled")
+
+
+def _run_job(func: Callable[..., ResultT], args: tuple, deadline: float, submitted: float,
+             cancelled: Optional[threading.Event] = None) -> tuple[ResultT, dict]:
+    """Worker-side wrapper that exposes the job's limits to ensure_job_active.
+
+    Returns the result together with the phase timings recorded while it ran.
+    """
+    _job.deadline = deadline
+    _job.cancelled = cancelled
+    metrics.start_job()
+    metrics.record_phase("queue", time.time() - submitted)
+    try:
+        result = func(*args)
+    except JobCancelled:
+        raise
+    except HTTPException as exc:
+        raise JobFailed(exc.status_code, str(exc.detail)) from None
+    except Exception as exc:
+        raise JobFailed(500, f"Step generation failed: {type(exc).__name__}: {exc}") from None
+    finally:
+        phases = metrics.finish_job()
+        _job.deadline = None
+        _job.cancelled = None
+    return result, phases
+
+
+_subtask_pool: Optional[ProcessPoolExecutor] = None
+_subtask_lock = threading.Lock()
+
+
+def subtask_pool() -> ProcessPoolExecutor:
+    """Process pool for the data-parallel parts of a job (one per process that runs jobs)"""
+    global _subtask_pool
+    with _subtask_lock:
+        if _subtask_pool is None:
+            _subtask_pool = ProcessPoolExecutor(max_workers=SUBTASK_WORKERS)
+            # A pool worker process exits without running atexit hooks but joins its children first,
+            # so the pool's own workers are stopped from a multiprocessing finalizer, ahead of the
+            # finalizers (priority 10) that close the pool's call queue
+            multiprocessing.util.Finalize(None, _subtask_pool.shutdown, exitpriority=100)
+        return _subtask_pool
+
+
+def subtask_result(future: Future[ResultT]) -> ResultT:
+    """Wait for a subtask of the current job, aborting (see ensure_job_active) while it runs"""
+    while True:
+        ensure_job_active()
+        try:
+            return future.result(timeout=SUBTASK_POLL_SECONDS)
+        except TimeoutError:
+            pass
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+def _abandon(future: asyncio.Future, cancelled: Optional[threading.Event]) -> None:
+    """Stop waiting for a job: drop it if it has not started, signal it if it is a running thread job"""
+    future.cancel()
+    if cancelled is not None:
+        cancelled.set()
+    # A running job still finishes (or raises JobCancelled); retrieve that so it is not logged as lost
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+class StepExecutor:
+    """Bounded pool for step generation jobs"""
+
+    def __init__(self, kind: str, workers: int, queue_limit: int, timeout: float):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown step executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.inflight = 0
+        self._pool: Optional[Executor] = None
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="steps")
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, request: Request, func: Callable[..., ResultT], *args) -> ResultT:
+        """Run ``func(*args)`` in the pool, honouring the queue limit, time limit and client disconnects"""
+        if self.inflight >= self.workers + self.queue_limit:
+            raise HTTPException(status_code=503, detail="Step generation queue is full, retry shortly")
+
+        cancelled = threading.Event() if self.kind == "thread" else None
+        pool = watcher = None
+        try:
+            self.inflight += 1
+            pool = self.pool
+            now = time.time()
+            future = asyncio.get_running_loop().run_in_executor(
+                pool, _run_job, func, args, now + self.timeout, now, cancelled
+            )
+            watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+            try:
+                done, _ = await asyncio.wait({future, watcher}, timeout=self.timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                # The caller gave up on this job (e.g. a sibling job of the same request failed)
+                _abandon(future, cancelled)
+                raise
+            if future in done:
+                try:
+                    result, phases = future.result()
+                except JobCancelled as exc:
+                    raise HTTPException(status_code=504, detail=str(exc))
+                except JobFailed as exc:
+                    raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+                metrics.attach_phases(request, phases)
+                return result
+
+            _abandon(future, cancelled)
+            if watcher in done:
+                raise HTTPException(status_code=499, detail="Client closed request")
+            raise HTTPException(status_code=504, detail="Step generation exceeded the time limit")
+        except BrokenExecutor:
+            # A worker died (e.g. killed for memory): start a fresh pool for the next jobs
+            self._reset_broken_pool(pool)
+            raise HTTPException(status_code=503, detail="Step generation worker pool restarted, retry shortly")
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.inflight -= 1
+
+    def _reset_broken_pool(self, pool: Optional[Executor]) -> None:
+        """Drop ``pool`` so the next job starts a new one (unless another job already replaced it)"""
+        if pool is not None and self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "timeout_seconds": self.timeout,
+            "inflight": self.inflight,
+        }
+
+
+step_executor = StepExecutor(STEP_EXECUTOR, STEP_WORKERS, STEP_QUEUE_LIMIT, STEP_TIMEOUT_SECONDS)
@@ -0,0 +1,84 @@
+"""Seeded server-side inputs: ``"generator"`` requests instead of ``"array"``.
+
+Sorting and searching requests can name an input generator, a size ``n``,
+a ``seed`` and ``params`` instead of uploading the array, e.g.
+
+    {"generator": "nearly_sorted", "n": 500000, "seed": 7, "params": {"swaps": 0.001}}
+
+The array is built with NumPy in the worker that runs the request, so a
+large input never crosses the wire or goes through per-element request
+validation, and the trace cache key (the canonical request body) is the
+generator spec rather than the values. The same spec always builds the
+same array:
+
+    random         uniform ints in [0, range·n)
+    sorted         random, ascending
+    reversed       random, descending
+    nearly_sorted  sorted, then a ``swaps`` fraction of the elements exchanged
+                   in random disjoint pairs
+    few_unique     uniform ints in [0, unique)
+    sawtooth       ``teeth`` ascending runs 0, 1, 2, ...
+    organ_pipe     0, 1, 2, ... up to the middle and back down
+    zipf           ranks 1..n drawn with probability proportional to rank^-a
+
+Parameter names and defaults are listed in ``models.schemas.GENERATOR_PARAMS``.
+"""
+from typing import Callable, Optional
+
+import numpy as np
+
+from models.schemas import GENERATOR_PARAMS, GeneratedInput
+
+
+def _uniform(rng: np.random.Generator, n: int, params: dict) -> np.ndarray:
+    return rng.integers(0, max(1, int(params["range"] * n)), n)
+
+
+def _nearly_sorted(rng: np.random.Generator, n: int, params: dict) -> np.ndarray:
+    values = np.sort(_uniform(rng, n, params))
+    pairs = int(round(params["swaps"] * n)) // 2
+    positions = rng.choice(n, size=2 * pairs, replace=False)
+    left, right = positions[:pairs], positions[pairs:]
+    values[left], values[right] = values[right], values[left].copy()
+    return values
+
+
+def _zipf(rng: np.random.Generator, n: int, params: dict) -> np.ndarray:
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -params["a"]
+    return 1 + np.searchsorted(np.cumsum(weights), rng.random(n) * weights.sum(), side="right").clip(max=n - 1)
+
+
+def _sawtooth(rng: np.random.Generator, n: int, params: dict) -> np.ndarray:
+    tooth = max(1, -(-n // max(1, int(params["teeth"]))))
+    return np.arange(n) % tooth
+
+
+def _organ_pipe(rng: np.random.Generator, n: int, params: dict) -> np.ndarray:
+    ascending = np.arange(n)
+    return np.minimum(ascending, ascending[::-1])
+
+
+GENERATORS: dict[str, Callable[[np.random.Generator, int, dict], np.ndarray]] = {
+    "random": _uniform,
+    "sorted": lambda rng, n, params: np.sort(_uniform(rng, n, params)),
+    "reversed": lambda rng, n, params: np.sort(_uniform(rng, n, params))[::-1],
+    "nearly_sorted": _nearly_sorted,
+    "few_unique": lambda rng, n, params: rng.integers(0, max(1, int(params["unique"])), n),
+    "sawtooth": _sawtooth,
+    "organ_pipe": _organ_pipe,
+    "zipf": _zipf,
+}
+
+
+def generate_array(generator: str, n: int, seed: int = 0, params: Optional[dict[str, float]] = None) -> list[int]:
+    """The ``n`` values of ``generator`` for ``seed`` (missing params take their defaults)"""
+    rng = np.random.default_rng(seed)
+    values = GENERATORS[generator](rng, n, {**GENERATOR_PARAMS[generator], **(params or {})})
+    return values.astype(np.int64).tolist()
+
+
+def request_array(request: GeneratedInput) -> list[int]:
+    """The request's input array, built from its generator spec when it has one"""
+    if request.generator is None:
+        return request.array
+    return generate_array(request.generator, request.n, request.seed, request.params)
@@ -0,0 +1,117 @@
+"""Encodings of the index sets sorting steps highlight (``sorted``, ``comparing``).
+
+By default a step lists every highlighted index. Requests with
+``"highlights": "ranges"`` get them as sorted, disjoint, inclusive
+``[lo, hi]`` ranges instead, so "the first i elements are sorted" is one
+pair rather than i indices:
+
+    indices   [0, 1, 2, 3, 7]      (in the order the generator added them)
+    ranges    [[0, 3], [7, 7]]
+
+The generators build these values through the request's encoding
+(``highlight_encoding``): ``indices``/``span`` for one-off sets and
+``set()`` for sets that grow over the run. A growing set is updated in
+place and its snapshot is reused by every step until the set changes, so
+steps share one list per state instead of copying it.
+"""
+from bisect import bisect_right
+from typing import Optional
+
+
+class IndexList:
+    """A growing set in the plain form: indices in the order they were added"""
+
+    __slots__ = ("_indices", "_snapshot")
+
+    def __init__(self):
+        self._indices: list[int] = []
+        self._snapshot: Optional[list[int]] = None
+
+    def add(self, index: int) -> None:
+        self._indices.append(index)
+        self._snapshot = None
+
+    def snapshot(self) -> list[int]:
+        if self._snapshot is None:
+            self._snapshot = self._indices.copy()
+        return self._snapshot
+
+
+class IndexRanges:
+    """A growing set kept as sorted, disjoint, inclusive [lo, hi] ranges"""
+
+    __slots__ = ("_starts", "_ends", "_snapshot")
+
+    def __init__(self):
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        self._snapshot: Optional[list[list[int]]] = None
+
+    def add(self, index: int) -> None:
+        starts, ends = self._starts, self._ends
+        # Range that starts at or before index, if any
+        i = bisect_right(starts, index) - 1
+        if i >= 0 and index <= ends[i]:
+            return
+        joins_left = i >= 0 and ends[i] == index - 1
+        joins_right = i + 1 < len(starts) and starts[i + 1] == index + 1
+        if joins_left and joins_right:
+            ends[i] = ends[i + 1]
+            del starts[i + 1], ends[i + 1]
+        elif joins_left:
+            ends[i] = index
+        elif joins_right:
+            starts[i + 1] = index
+        else:
+            starts.insert(i + 1, index)
+            ends.insert(i + 1, index)
+        self._snapshot = None
+
+    def snapshot(self) -> list[list[int]]:
+        if self._snapshot is None:
+            self._snapshot = [[lo, hi] for lo, hi in zip(self._starts, self._ends)]
+        return self._snapshot
+
+
+class IndexEncoding:
+    """The plain index-list form (the default)"""
+
+    def indices(self, *indices: int) -> list:
+        return list(indices)
+
+    def span(self, lo: int, hi: int) -> list:
+        """Every index in lo..hi inclusive (empty when hi < lo)"""
+        return list(range(lo, hi + 1))
+
+    def set(self):
+        return IndexList()
+
+
+class RangeEncoding(IndexEncoding):
+    """The [lo, hi] range form"""
+
+    def indices(self, *indices: int) -> list:
+        ranges = []
+        for index in sorted(set(indices)):
+            if ranges and ranges[-1][1] == index - 1:
+                ranges[-1][1] = index
+            else:
+                ranges.append([index, index])
+        return ranges
+
+    def span(self, lo: int, hi: int) -> list:
+        return [[lo, hi]] if lo <= hi else []
+
+    def set(self):
+        return IndexRanges()
+
+
+INDICES = IndexEncoding()
+RANGES = RangeEncoding()
+
+HIGHLIGHT_ENCODINGS = {"indices": INDICES, "ranges": RANGES}
+
+
+def highlight_encoding(request) -> IndexEncoding:
+    """Encoding of a request's highlighted index sets"""
+    return HIGHLIGHT_ENCODINGS[request.highlights]
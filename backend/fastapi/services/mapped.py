@@ -0,0 +1,91 @@
+"""Server-side sorted files searched through a read-only memory map.
+
+Arrays of 100M+ values cannot be posted or held as Python lists, so
+``POST /api/v1/searching/{algorithm}/mapped`` names a file in
+``MAPPED_DATASET_DIR`` instead: a ``.npy`` file (1-D int32 or int64), or a
+raw file of little-endian int32/int64 values with the request's
+``"dtype"``. The file is mapped, never read whole: a search touches only
+the pages its probes fall in, which the OS reads in on first access.
+
+Files must already be sorted ascending; checking that would read every
+page, so it is left to whoever puts them there. Names are relative to the
+directory and may not leave it.
+"""
+import mmap
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from models.schemas import MappedFileInfo
+
+MAPPED_DATASET_DIR = os.getenv("MAPPED_DATASET_DIR", "datasets")
+PAGE_SIZE = mmap.PAGESIZE
+
+MAPPED_DTYPES = {"int32": np.dtype("<i4"), "int64": np.dtype("<i8")}
+
+
+def mapped_path(file: str) -> Path:
+    """``file`` inside the dataset directory (404 if it is missing or outside it)"""
+    root = Path(MAPPED_DATASET_DIR).resolve()
+    path = (root / file).resolve()
+    if root not in path.parents or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Dataset file not found: {file}")
+    return path
+
+
+def _npy_dtype(array: np.ndarray) -> Optional[str]:
+    for name, dtype in MAPPED_DTYPES.items():
+        if array.dtype.kind == "i" and array.dtype.itemsize == dtype.itemsize:
+            return name
+    return None
+
+
+def open_mapped(file: str, dtype: Optional[str] = None) -> np.ndarray:
+    """Map ``file`` read-only as a 1-D array of int32 or int64 (422 if it is not one)"""
+    path = mapped_path(file)
+    if path.suffix == ".npy":
+        try:
+            array = np.load(path, mmap_mode="r")
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"{file} is not a readable .npy file: {exc}")
+        stored = _npy_dtype(array)
+        if array.ndim != 1 or stored is None:
+            raise HTTPException(status_code=422, detail=f"{file} holds {array.dtype} with shape {array.shape}, "
+                                                        f"expected a 1-D int32 or int64 array")
+        if dtype is not None and dtype != stored:
+            raise HTTPException(status_code=422, detail=f"{file} holds {stored}, not {dtype}")
+        return array
+
+    if dtype is None:
+        raise HTTPException(status_code=422, detail=f"{file} is a raw file: give its dtype (int32 or int64)")
+    nbytes = path.stat().st_size
+    if nbytes % MAPPED_DTYPES[dtype].itemsize:
+        raise HTTPException(status_code=422, detail=f"{file} is {nbytes} bytes, not a whole number of {dtype} values")
+    if nbytes == 0:
+        # mmap cannot map an empty file
+        return np.empty(0, dtype=MAPPED_DTYPES[dtype])
+    return np.memmap(path, dtype=MAPPED_DTYPES[dtype], mode="r")
+
+
+def list_mapped_files() -> list[MappedFileInfo]:
+    """The files in the dataset directory (sizes of raw files are left to their dtype)"""
+    root = Path(MAPPED_DATASET_DIR)
+    if not root.is_dir():
+        return []
+    files = []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        info = MappedFileInfo(file=path.relative_to(root).as_posix(), nbytes=path.stat().st_size, page_size=PAGE_SIZE)
+        if path.suffix == ".npy":
+            try:
+                array = np.load(path, mmap_mode="r")
+            except ValueError:
+                continue
+            if array.ndim == 1 and _npy_dtype(array) is not None:
+                info.dtype, info.size = _npy_dtype(array), len(array)
+        files.append(info)
+    return files
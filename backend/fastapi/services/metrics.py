@@ -0,0 +1,151 @@
+"""Per-phase request instrumentation exposed in Prometheus text format.
+
+Requests for an algorithm are split into phases, each recorded in the
+``dsa_request_phase_seconds`` histogram labeled by category, algorithm and
+phase:
+
+    validation           request parsing and validation, up to the handler
+    queue                waiting for a worker in the step executor
+    generation           running the step generator (for delta / packed
+                         responses this includes encoding, which happens
+                         while the steps are generated)
+    response_validation  building the pydantic response model
+    encoding             serializing the response body
+    total                the whole request, until the response starts
+
+Phases that run in a pool worker are timed there (``phase``) and shipped
+back with the job's result, since a worker process cannot update this
+process's metrics. Recording is a dictionary update per phase; the
+Prometheus text is only built when ``/metrics`` is scraped.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import Request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STEP_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+registry = CollectorRegistry()
+
+request_phase_seconds = Histogram(
+    "dsa_request_phase_seconds", "Time spent in each phase of an algorithm request",
+    ("category", "algorithm", "phase"), buckets=LATENCY_BUCKETS, registry=registry
+)
+request_steps = Histogram(
+    "dsa_request_steps", "Steps generated per algorithm request",
+    ("category", "algorithm"), buckets=STEP_BUCKETS, registry=registry
+)
+http_requests = Counter(
+    "dsa_http_requests", "HTTP requests by route template and status",
+    ("method", "route", "status"), registry=registry
+)
+
+_job = threading.local()
+
+
+def start_job() -> None:
+    """Start collecting phase timings for the job running on this thread"""
+    _job.phases = {}
+
+
+def finish_job() -> dict:
+    """Stop collecting and return {phase: seconds, "steps": count}"""
+    phases = getattr(_job, "phases", None) or {}
+    _job.phases = None
+    return phases
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block as ``name`` if a job is collecting timings, otherwise do nothing"""
+    phases = getattr(_job, "phases", None)
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add time measured outside a ``phase`` block, if a job is collecting timings"""
+    phases = getattr(_job, "phases", None)
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def record_steps(count: int) -> None:
+    """Add to the job's generated step count"""
+    phases = getattr(_job, "phases", None)
+    if phases is not None:
+        phases["steps"] = phases.get("steps", 0) + count
+
+
+def label_request(request: Request, category: str, algorithm: str) -> None:
+    """Mark a request as an algorithm request and record its validation phase"""
+    state = request.scope.setdefault("state", {})
+    state["metrics_labels"] = (category, algorithm)
+    start = state.get("metrics_start")
+    if start is not None:
+        state.setdefault("metrics_phases", {})["validation"] = time.perf_counter() - start
+
+
+def attach_phases(request: Request, phases: dict) -> None:
+    """Add the phases a worker reported for this request"""
+    request.scope.setdefault("state", {}).setdefault("metrics_phases", {}).update(phases)
+
+
+def _observe(labels: tuple[str, str], phases: dict) -> None:
+    category, algorithm = labels
+    for name, value in phases.items():
+        if name == "steps":
+            request_steps.labels(category, algorithm).observe(value)
+        else:
+            request_phase_seconds.labels(category, algorithm, name).observe(value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times every request and records the phases collected for it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["metrics_start"] = start
+        status: Optional[int] = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                labels = state.get("metrics_labels")
+                if labels is not None:
+                    phases = state.get("metrics_phases", {})
+                    phases["total"] = time.perf_counter() - start
+                    _observe(labels, phases)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_requests.labels(scope["method"], route.path if route is not None else "unmatched",
+                                 str(status or 500)).inc()
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
@@ -0,0 +1,352 @@
+"""Packed int32 column layout for sorting and searching traces.
+
+Instead of one object per step, a packed trace stores one int32 column per
+step field, so a trace of any length is a handful of flat buffers:
+
+    b"ATRC" | uint32 version | uint32 header length | JSON header | columns
+
+All integers are little-endian. The JSON header holds the algorithm, its
+category ("sorting" or "searching"), the response totals/result, ``step_count``, the string table (descriptions,
+plus compact JSON for the rare ``buckets`` field) and ``columns``, a list of
+[name, length] pairs giving the order and int32 length of the columns that
+follow it (the header is space-padded so they stay 4-byte aligned).
+
+Per-step columns (one value per step):
+
+    kind             KIND_* code of the step
+    length           array length
+    write_count      entries this step adds to write_index / write_value;
+                     the first step writes every position, later steps only
+                     the positions that changed since the previous step
+    description      index into the string table
+    pivot, current, left, right, mid
+                     index or NONE
+    comparing_count, swapping_count
+                     entries in comparing / swapping, -1 for null
+    sorted_ref       index into the sorted_count / sorted snapshot table
+                     (a snapshot is only stored when the set changes)
+    buckets          string table index of the JSON buckets or -1
+    found            0 or 1
+
+``PackedTraceReader`` rebuilds any range of the original steps exactly
+(``unpack_sorting_steps`` / ``unpack_searching_steps`` rebuild them all).
+Packing a trace whose array holds a value outside int32 fails with a 422
+``PackedRangeError`` at its first step.
+"""
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Generator, Iterable, Optional
+
+from fastapi import HTTPException
+
+from models.records import SearchingRecord, SortingRecord
+from services.delta import patch_shadow
+from services.streaming import with_summary
+
+MAGIC = b"ATRC"
+VERSION = 1
+NONE = -2 ** 31  # Stand-in for a missing index
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+# Steps between the array snapshots PackedTraceReader keeps for seeking
+CHECKPOINT_INTERVAL = 256
+
+KIND_INFO = 0
+KIND_COMPARE = 1
+KIND_SWAP = 2
+KIND_WRITE = 3
+KIND_PIVOT = 4
+KIND_PROBE = 5
+KIND_FOUND = 6
+
+ARRAY_COLUMNS = ("kind", "length", "write_count", "write_index", "write_value", "description")
+SORTING_COLUMNS = ARRAY_COLUMNS + ("comparing_count", "comparing", "swapping_count", "swapping",
+                                   "sorted_ref", "sorted_count", "sorted", "pivot", "buckets")
+SEARCHING_COLUMNS = ARRAY_COLUMNS + ("current", "left", "right", "mid", "found")
+
+
+class PackedRangeError(HTTPException):
+    """A trace value the int32 columns cannot hold"""
+
+    def __init__(self):
+        super().__init__(status_code=422, detail=f"Packed traces hold values from {INT32_MIN} to {INT32_MAX}, "
+                                                 f"request application/json for larger ones")
+
+
+class _PackedTrace:
+    """Column buffers, string table and the running array being diffed"""
+
+    def __init__(self, names: Iterable[str]):
+        self.columns = {name: array("i") for name in names}
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._shadow: Optional[list[int]] = None
+
+    def string(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def write_array(self, values: list[int], hints: Iterable[Optional[int]]) -> int:
+        """Append the writes turning the previous step's array into ``values``"""
+        columns = self.columns
+        if self._shadow is None or len(self._shadow) != len(values):
+            # Checked up front: array("i") would only overflow once the trace is half built
+            if values and (min(values) < INT32_MIN or max(values) > INT32_MAX):
+                raise PackedRangeError()
+            self._shadow = values.copy()
+            columns["write_index"].extend(range(len(values)))
+            columns["write_value"].extend(values)
+            count = len(values)
+        else:
+            changed = patch_shadow(self._shadow, values, hints)
+            columns["write_index"].extend(changed)
+            try:
+                columns["write_value"].extend(values[i] for i in changed)
+            except OverflowError:
+                raise PackedRangeError() from None
+            count = len(changed)
+        columns["length"].append(len(values))
+        columns["write_count"].append(count)
+        return count
+
+    def optional_list(self, name: str, values: Optional[list[int]]) -> None:
+        if values is None:
+            self.columns[f"{name}_count"].append(-1)
+        else:
+            self.columns[f"{name}_count"].append(len(values))
+            self.columns[name].extend(values)
+
+    def to_bytes(self, header: dict) -> bytes:
+        header = {
+            **header,
+            "strings": self.strings,
+            "columns": [[name, len(column)] for name, column in self.columns.items()],
+        }
+        head = json.dumps(header, separators=(",", ":")).encode()
+        head += b" " * (-len(head) % 4)
+        parts = [MAGIC, struct.pack("<II", VERSION, len(head)), head]
+        for column in self.columns.values():
+            if sys.byteorder == "big":
+                column.byteswap()
+            parts.append(memoryview(column).cast("B"))
+        return b"".join(parts)
+
+
+def _optional(value: Optional[int]) -> int:
+    return NONE if value is None else value
+
+
+def pack_sorting_trace(algorithm: str, trace: Generator[SortingRecord, None, dict]) -> bytes:
+    """Run a sorting step generator straight into the packed layout"""
+    packed = _PackedTrace(SORTING_COLUMNS)
+    columns = packed.columns
+    summary = {}
+    prev_sorted: Optional[list[int]] = None
+    sorted_ref = -1
+    step_count = 0
+
+    for step in with_summary(trace, summary):
+        hints = (step.comparing or []) + (step.swapping or []) + [step.pivot]
+        writes = packed.write_array(step.array, hints)
+        packed.optional_list("comparing", step.comparing)
+        packed.optional_list("swapping", step.swapping)
+
+        if step.sorted != prev_sorted:
+            sorted_ref += 1
+            columns["sorted_count"].append(len(step.sorted))
+            columns["sorted"].extend(step.sorted)
+            prev_sorted = step.sorted
+        columns["sorted_ref"].append(sorted_ref)
+
+        columns["pivot"].append(_optional(step.pivot))
+        columns["buckets"].append(-1 if step.buckets is None
+                                  else packed.string(json.dumps(step.buckets, separators=(",", ":"))))
+        columns["description"].append(packed.string(step.description))
+
+        if step.swapping:
+            kind = KIND_SWAP
+        elif writes and step_count:
+            kind = KIND_WRITE
+        elif step.comparing:
+            kind = KIND_COMPARE
+        elif step.pivot is not None:
+            kind = KIND_PIVOT
+        else:
+            kind = KIND_INFO
+        columns["kind"].append(kind)
+        step_count += 1
+
+    return packed.to_bytes({"algorithm": algorithm, "category": "sorting", "format": "packed",
+                            "step_count": step_count, **summary})
+
+
+def pack_searching_trace(algorithm: str, trace: Generator[SearchingRecord, None, dict]) -> bytes:
+    """Run a searching step generator straight into the packed layout"""
+    packed = _PackedTrace(SEARCHING_COLUMNS)
+    columns = packed.columns
+    summary = {}
+    step_count = 0
+
+    for step in with_summary(trace, summary):
+        packed.write_array(step.array, (step.current, step.mid))
+        columns["current"].append(_optional(step.current))
+        columns["left"].append(_optional(step.left))
+        columns["right"].append(_optional(step.right))
+        columns["mid"].append(_optional(step.mid))
+        columns["found"].append(int(step.found))
+        columns["description"].append(packed.string(step.description))
+
+        if step.found:
+            kind = KIND_FOUND
+        elif step.current is not None or step.mid is not None:
+            kind = KIND_PROBE
+        else:
+            kind = KIND_INFO
+        columns["kind"].append(kind)
+        step_count += 1
+
+    return packed.to_bytes({"algorithm": algorithm, "category": "searching", "format": "packed",
+                            "step_count": step_count, **summary})
+
+
+def unpack(payload: bytes) -> tuple[dict, dict[str, array]]:
+    """Split a packed trace into its header and int32 columns"""
+    if payload[:4] != MAGIC:
+        raise ValueError("Not a packed trace")
+    version, header_length = struct.unpack_from("<II", payload, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed trace version: {version}")
+    offset = 12 + header_length
+    header = json.loads(payload[12:offset])
+
+    columns = {}
+    for name, length in header["columns"]:
+        column = array("i")
+        column.frombytes(payload[offset:offset + 4 * length])
+        if sys.byteorder == "big":
+            column.byteswap()
+        columns[name] = column
+        offset += 4 * length
+    return header, columns
+
+
+def _nullable(value: int) -> Optional[int]:
+    return None if value == NONE else value
+
+
+def _starts(counts: Iterable[int]) -> array:
+    """Start offset of every step's entries in a flattened column (plus the end)"""
+    return array("q", accumulate((max(count, 0) for count in counts), initial=0))
+
+
+class PackedTraceReader:
+    """Random access to the steps of a packed trace.
+
+    The array after every ``checkpoint_interval``-th step is kept, so
+    reading step k only replays the writes since the nearest checkpoint
+    instead of the whole trace.
+    """
+
+    def __init__(self, payload: bytes, checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        self.header, self.columns = unpack(payload)
+        self.category = self.header["category"]
+        self.step_count = self.header["step_count"]
+        self.checkpoint_interval = checkpoint_interval
+
+        columns = self.columns
+        self._write_starts = _starts(columns["write_count"])
+        if self.category == "sorting":
+            self._comparing_starts = _starts(columns["comparing_count"])
+            self._swapping_starts = _starts(columns["swapping_count"])
+            self._sorted_starts = _starts(columns["sorted_count"])
+
+        self._checkpoints: list[array] = []
+        current: list[int] = []
+        for index in range(self.step_count):
+            self._apply(current, index)
+            if index % checkpoint_interval == 0:
+                self._checkpoints.append(array("i", current))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns, offsets and checkpoints"""
+        buffers = [*self.columns.values(), *self._checkpoints, self._write_starts]
+        if self.category == "sorting":
+            buffers += [self._comparing_starts, self._swapping_starts, self._sorted_starts]
+        return sum(len(buffer) * buffer.itemsize for buffer in buffers) + sum(map(len, self.header["strings"]))
+
+    def _apply(self, current: list[int], index: int) -> None:
+        """Replay step ``index``'s writes onto ``current`` in place"""
+        length = self.columns["length"][index]
+        if len(current) != length:
+            current[:] = [0] * length
+        start, end = self._write_starts[index], self._write_starts[index + 1]
+        for i, value in zip(self.columns["write_index"][start:end], self.columns["write_value"][start:end]):
+            current[i] = value
+
+    def _list(self, name: str, starts: array, index: int) -> Optional[list[int]]:
+        if self.columns[f"{name}_count"][index] < 0:
+            return None
+        return self.columns[name][starts[index]:starts[index + 1]].tolist()
+
+    def _step(self, index: int, arr: list[int]):
+        columns = self.columns
+        strings = self.header["strings"]
+        if self.category == "searching":
+            return SearchingRecord(
+                array=arr,
+                current=_nullable(columns["current"][index]),
+                left=_nullable(columns["left"][index]),
+                right=_nullable(columns["right"][index]),
+                mid=_nullable(columns["mid"][index]),
+                found=bool(columns["found"][index]),
+                description=strings[columns["description"][index]]
+            )
+
+        sorted_ref = columns["sorted_ref"][index]
+        buckets = columns["buckets"][index]
+        return SortingRecord(
+            array=arr,
+            comparing=self._list("comparing", self._comparing_starts, index),
+            swapping=self._list("swapping", self._swapping_starts, index),
+            sorted=columns["sorted"][self._sorted_starts[sorted_ref]:self._sorted_starts[sorted_ref + 1]].tolist(),
+            pivot=_nullable(columns["pivot"][index]),
+            buckets=None if buckets < 0 else json.loads(strings[buckets]),
+            description=strings[columns["description"][index]]
+        )
+
+    def steps(self, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Rebuild the steps in [offset, offset + limit)"""
+        end = self.step_count if limit is None else min(self.step_count, offset + limit)
+        if offset >= end:
+            return []
+
+        checkpoint = offset // self.checkpoint_interval
+        current = self._checkpoints[checkpoint].tolist()
+        for index in range(checkpoint * self.checkpoint_interval + 1, offset + 1):
+            self._apply(current, index)
+
+        steps = []
+        for index in range(offset, end):
+            if index > offset:
+                self._apply(current, index)
+            steps.append(self._step(index, current.copy()))
+        return steps
+
+
+def unpack_sorting_steps(payload: bytes) -> tuple[dict, list[SortingRecord]]:
+    """Rebuild (header, steps) from a packed sorting trace"""
+    reader = PackedTraceReader(payload)
+    return reader.header, reader.steps()
+
+
+def unpack_searching_steps(payload: bytes) -> tuple[dict, list[SearchingRecord]]:
+    """Rebuild (header, steps) from a packed searching trace"""
+    reader = PackedTraceReader(payload)
+    return reader.header, reader.steps()
@@ -0,0 +1,192 @@
+"""Server-side trace sessions for paged, seekable step access.
+
+``POST /{category}/{algorithm}/session`` generates a trace once (in the
+worker pool) and keeps it here; ``GET /api/v1/traces/{id}/steps`` then
+serves pages of it. Sorting and searching traces are held in the packed
+column layout and pages are rebuilt from the nearest array checkpoint (see
+``PackedTraceReader``); the other categories, and sorting/searching traces
+with values outside int32, keep one serialized JSON document per step.
+
+Sessions expire after ``TRACE_SESSION_TTL_SECONDS`` without being read,
+and the least recently read ones are dropped whenever the sessions
+together hold more than ``TRACE_SESSION_MAX_BYTES``.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Generator, Optional, Union
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+from models.records import StepRecord
+from models.schemas import TraceSessionInfo
+from services.encoding import PACKED_MEDIA_TYPE
+from services.executor import step_executor
+from services.metrics import label_request, phase
+from services.packed import PackedRangeError, PackedTraceReader
+from services.streaming import with_summary
+
+TRACE_SESSION_TTL_SECONDS = float(os.getenv("TRACE_SESSION_TTL_SECONDS", "600"))
+TRACE_SESSION_MAX_BYTES = int(os.getenv("TRACE_SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Largest page a single GET may ask for
+MAX_PAGE_STEPS = 1000
+
+# Header entries of a packed trace that describe the layout rather than the result
+PACKED_LAYOUT_FIELDS = {"algorithm", "category", "format", "step_count", "strings", "columns"}
+
+
+class PackedStepPages:
+    """Pages of a sorting/searching trace kept in the packed column layout"""
+
+    def __init__(self, reader: PackedTraceReader):
+        self.reader = reader
+        self.step_count = reader.step_count
+        self.summary = {key: value for key, value in reader.header.items() if key not in PACKED_LAYOUT_FIELDS}
+        self.nbytes = reader.nbytes
+
+    def page(self, offset: int, limit: int) -> list[str]:
+        return [step.to_json() for step in self.reader.steps(offset, limit)]
+
+
+class JsonStepPages:
+    """Pages of a trace kept as one JSON document per step"""
+
+    def __init__(self, lines: list[str], summary: dict):
+        self.lines = lines
+        self.step_count = len(lines)
+        self.summary = summary
+        self.nbytes = sum(map(len, lines))
+
+    def page(self, offset: int, limit: int) -> list[str]:
+        return self.lines[offset:offset + limit]
+
+
+def build_packed_pages(render: Callable[[str, BaseModel, str], bytes], algorithm: str, request: BaseModel,
+                       trace: Callable[[str, BaseModel], Generator[StepRecord, None, dict]]
+                       ) -> Union[PackedStepPages, JsonStepPages]:
+    """Worker-side: generate a packed trace and index its checkpoints.
+
+    Packing stops at the first step when the array does not fit the int32
+    columns; the steps of ``trace`` are then kept as JSON instead.
+    """
+    try:
+        payload = render(algorithm, request, PACKED_MEDIA_TYPE)
+    except PackedRangeError:
+        return build_json_pages(trace, algorithm, request)
+    return PackedStepPages(PackedTraceReader(payload))
+
+
+def build_json_pages(trace: Callable[[str, BaseModel], Generator[StepRecord, None, dict]], algorithm: str,
+                     request: BaseModel) -> JsonStepPages:
+    """Worker-side: generate a trace and serialize each step"""
+    summary = {}
+    with phase("generation"):
+        lines = [step.to_json() for step in with_summary(trace(algorithm, request), summary)]
+    return JsonStepPages(lines, summary)
+
+
+class TraceSession:
+    def __init__(self, category: str, algorithm: str, steps):
+        self.id = uuid.uuid4().hex
+        self.category = category
+        self.algorithm = algorithm
+        self.steps = steps
+        self.last_access = time.monotonic()
+
+
+class TraceSessionStore:
+    """Sessions by id, in least recently read order, bounded by idle time and total size"""
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, TraceSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self.bytes -= session.steps.nbytes
+
+    def _purge(self, now: float) -> None:
+        # Every read moves a session to the end, so the idle ones are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl:
+                break
+            self._drop(session.id)
+            self.expired += 1
+
+    def add(self, session: TraceSession) -> None:
+        if session.steps.nbytes > self.max_bytes:
+            raise HTTPException(status_code=413, detail="Trace is too large for a session, use the /stream endpoint")
+        with self._lock:
+            self._purge(time.monotonic())
+            self._sessions[session.id] = session
+            self.bytes += session.steps.nbytes
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def get(self, session_id: str) -> Optional[TraceSession]:
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._purge(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+trace_sessions = TraceSessionStore(TRACE_SESSION_TTL_SECONDS, TRACE_SESSION_MAX_BYTES)
+
+
+async def open_session(category: str, algorithm: str, request: BaseModel, http_request: Request,
+                       build: Callable, source: Callable) -> Response:
+    """Generate the trace in the worker pool via ``build(source, algorithm, request)`` and register it"""
+    label_request(http_request, category, algorithm)
+    steps = await step_executor.run(http_request, build, source, algorithm, request)
+    session = TraceSession(category, algorithm, steps)
+    trace_sessions.add(session)
+    info = TraceSessionInfo(
+        session_id=session.id,
+        category=category,
+        algorithm=algorithm,
+        total_steps=steps.step_count,
+        expires_in=trace_sessions.ttl,
+        summary=steps.summary
+    )
+    return Response(content=info.model_dump_json(), media_type="application/json")
+
+
+def read_page(session: TraceSession, offset: int, limit: int) -> bytes:
+    """Serialize steps [offset, offset + limit) of a session as a TracePage body"""
+    steps = ",".join(session.steps.page(offset, limit))
+    return (f'{{"session_id":"{session.id}","offset":{offset},'
+            f'"total_steps":{session.steps.step_count},"steps":[{steps}]}}').encode()
@@ -0,0 +1,119 @@
+"""Helpers for step generators and streamed (NDJSON / SSE) step delivery.
+
+Every algorithm module exposes its step builders as generators that yield
+steps one at a time and *return* their summary. ``collect`` turns such a
+generator back into a list for the classic one-shot responses, while
+``stream_trace`` sends the steps as they are produced and finishes with a
+summary record, so memory stays flat however long the trace is.
+"""
+import json
+from typing import Any, Generator, Iterator, TypeVar
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from models.records import StepRecord
+from services.executor import ensure_job_active
+from services.metrics import phase, record_steps
+
+StepT = TypeVar("StepT")
+SummaryT = TypeVar("SummaryT")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Steps produced between checks of the worker job's time limit / cancellation
+JOB_CHECK_INTERVAL = 1024
+
+# Records are buffered into chunks of roughly this size before they are sent
+STREAM_CHUNK_BYTES = 16 * 1024
+
+
+def collect(trace: Generator[StepT, None, SummaryT]) -> tuple[list[StepT], SummaryT]:
+    """Run a step generator to completion and return (steps, summary)"""
+    steps = []
+    with phase("generation"):
+        while True:
+            try:
+                steps.append(next(trace))
+            except StopIteration as stop:
+                summary = stop.value
+                break
+            if not len(steps) % JOB_CHECK_INTERVAL:
+                ensure_job_active()
+    record_steps(len(steps))
+    return steps, summary
+
+
+def as_step_list(trace: Generator[StepRecord, None, Any]) -> tuple:
+    """Collect a step generator into the (steps, *summary) tuple returned by the *_steps functions.
+
+    The steps are returned as their validated pydantic models.
+    """
+    records, summary = collect(trace)
+    steps = [record.to_model() for record in records]
+    return (steps, *summary) if isinstance(summary, tuple) else (steps, summary)
+
+
+def with_summary(trace: Generator[StepT, None, dict], summary: dict) -> Generator[StepT, None, None]:
+    """Pass the steps of ``trace`` through and store its returned summary in ``summary``"""
+    count = 0
+    while True:
+        try:
+            step = next(trace)
+        except StopIteration as stop:
+            summary.update(stop.value)
+            record_steps(count)
+            return
+        yield step
+        count += 1
+        if not count % JOB_CHECK_INTERVAL:
+            ensure_job_active()
+
+
+def _records(algorithm: str, trace: Generator[StepRecord, None, dict]) -> Iterator[tuple[str, str]]:
+    """Yield (event, json) pairs: one per step, then the closing summary"""
+    index = 0
+    while True:
+        try:
+            step = next(trace)
+        except StopIteration as stop:
+            summary = {"type": "summary", "algorithm": algorithm, "total_steps": index, **(stop.value or {})}
+            yield "summary", json.dumps(summary, separators=(",", ":"))
+            return
+        yield "step", f'{{"type":"step","index":{index},"step":{step.to_json()}}}'
+        index += 1
+
+
+def _chunks(lines: Iterator[str]) -> Iterator[bytes]:
+    """Batch encoded records so each chunk is not a separate write"""
+    buffer = []
+    size = 0
+    first = True
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        # Flush the first record immediately to keep time-to-first-byte low
+        if first or size >= STREAM_CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+            first = False
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def wants_sse(request: Request) -> bool:
+    """Clients opt into Server-Sent Events through the Accept header (EventSource sends it)"""
+    return SSE_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def stream_trace(algorithm: str, trace: Generator[StepRecord, None, dict], sse: bool = False) -> StreamingResponse:
+    """Stream a step generator as NDJSON lines or Server-Sent Events"""
+    records = _records(algorithm, trace)
+    if sse:
+        lines = (f"event: {event}\ndata: {data}\n\n" for event, data in records)
+        return StreamingResponse(_chunks(lines), media_type=SSE_MEDIA_TYPE,
+                                 headers={"Cache-Control": "no-cache"})
+    lines = (f"{data}\n" for _, data in records)
+    return StreamingResponse(_chunks(lines), media_type=NDJSON_MEDIA_TYPE)
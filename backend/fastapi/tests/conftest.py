@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the backend modules the way main.py does, from backend/fastapi
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,112 @@
+import random
+from bisect import bisect_left
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.layouts import search_layout
+from algorithms.searching import SEARCHING_ITERATORS
+from algorithms.vectorized_search import BATCH_PROBES, LAYOUT_PROBES, batch_positions, search_arrays
+from main import app
+from services.detail import COMPARISON, NONE
+from services.streaming import collect
+
+# The ordering check that is a probe of its own (a block end, a doubling index); every
+# other probe of the generators is an equality check against the target
+ORDERING_PROBES = {"jump": "__gt__", "exponential": "__ge__"}
+# Steps the layout generators yield once per slot or node they read
+LAYOUT_PROBE_STEPS = {"eytzinger": "Checking slot", "btree": "Reading block"}
+
+CASES = [
+    [],
+    [7],
+    sorted(random.Random(1).choices(range(-50, 50), k=200)),   # Duplicates
+    [4] * 30,
+    list(range(0, 3000, 3)),
+    sorted(random.Random(2).randrange(-2 ** 63, 2 ** 63) for _ in range(300)),
+    sorted(random.Random(3).sample(range(2 ** 64, 2 ** 64 + 10 ** 6), 150)),  # Past int64
+]
+
+
+class Target(int):
+    """A target that logs the comparisons a search makes with it"""
+
+    def __new__(cls, value: int, log: list[str]):
+        target = super().__new__(cls, value)
+        target.log = log
+        return target
+
+    def _logged(name):
+        def compare(self, other):
+            self.log.append(name)
+            return getattr(int, name)(self, other)
+        return compare
+
+    __eq__ = _logged("__eq__")
+    __lt__ = _logged("__lt__")
+    __gt__ = _logged("__gt__")
+    __le__ = _logged("__le__")
+    __ge__ = _logged("__ge__")
+    __hash__ = int.__hash__
+
+
+def generator_probes(name: str, values: list[int], target: int) -> int:
+    """Probes the step generator of ``name`` makes for ``target``"""
+    if name in LAYOUT_PROBE_STEPS:
+        layout = search_layout(name, values)
+        steps, _ = collect(SEARCHING_ITERATORS[name](values, target, COMPARISON, presorted=True, layout=layout))
+        return sum(step.description.startswith(LAYOUT_PROBE_STEPS[name]) for step in steps)
+    log = []
+    options = {} if name == "linear" else {"presorted": True}
+    collect(SEARCHING_ITERATORS[name](values, Target(target, log), NONE, **options))
+    return log.count("__eq__") + log.count(ORDERING_PROBES.get(name))
+
+
+def targets_for(values: list[int]) -> list[int]:
+    rng = random.Random(len(values))
+    low, high = (values[0], values[-1]) if values else (0, 0)
+    present = rng.choices(values, k=10) if values else []
+    return [low - 1, high + 1, low - 2 ** 70, high + 2 ** 70, *present, *(rng.randint(low, high) for _ in range(10))]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("values", CASES, ids=range(len(CASES)))
+def test_positions_match_bisect(values):
+    targets = targets_for(values)
+    found, first = batch_positions(*search_arrays(values, targets))
+    for target, hit, position in zip(targets, found.tolist(), first.tolist()):
+        expected = bisect_left(values, target)
+        assert hit == (expected < len(values) and values[expected] == target)
+        assert not hit or position == expected
+
+
+@pytest.mark.parametrize("values", CASES, ids=range(len(CASES)))
+@pytest.mark.parametrize("name", [*BATCH_PROBES, *LAYOUT_PROBES])
+def test_probes_match_generators(values, name):
+    targets = targets_for(values)
+    sorted_values, target_array = search_arrays(values, targets)
+    if name in LAYOUT_PROBES:
+        probes = LAYOUT_PROBES[name](search_layout(name, sorted_values), target_array)
+    else:
+        probes = BATCH_PROBES[name](sorted_values, target_array)
+    assert probes.tolist() == [generator_probes(name, values, target) for target in targets]
+
+
+@pytest.mark.parametrize("values", CASES, ids=range(len(CASES)))
+def test_batch_endpoint(client, values):
+    targets = targets_for(values)
+    shuffled = random.Random(4).sample(values, len(values))
+    body = client.post("/api/v1/searching/batch",
+                       json={"array": shuffled, "targets": targets, "traced": [0, len(targets) - 1]}).json()
+    expected = [bisect_left(values, target) for target in targets]
+    found = [position < len(values) and values[position] == target for target, position in zip(targets, expected)]
+    assert body["found"] == found
+    assert body["found_at"] == [position if hit else None for hit, position in zip(found, expected)]
+    assert body["probes"] == {name: [generator_probes(name, values, target) for target in targets]
+                              for name in SEARCHING_ITERATORS}
+    for trace in body["traces"]:
+        assert trace["found"] == found[trace["target_index"]]
@@ -0,0 +1,39 @@
+import math
+
+import pytest
+
+from algorithms.sorting import SORTING_ITERATORS
+from services.complexity import MAX_RUN_OPERATIONS, fit_growth, measure_shape, profile_sizes
+
+SIZES = profile_sizes(8192)
+
+
+@pytest.mark.parametrize("curve, values", [
+    ("O(1)", [40] * len(SIZES)),
+    ("O(log n)", [3 * math.log2(n) + 2 for n in SIZES]),
+    ("O(n)", [5 * n + 7 for n in SIZES]),
+    ("O(n log n)", [n * math.log2(n) for n in SIZES]),
+    ("O(n log n)", [round(1.5 * n * math.log2(n) - n) for n in SIZES]),
+    ("O(n²)", [n * (n - 1) // 2 for n in SIZES]),
+])
+def test_fit_growth_finds_the_curve(curve, values):
+    fit = fit_growth(SIZES, [round(value) for value in values])
+    assert fit.curve == curve
+    assert fit.error < 0.05
+
+
+def test_fit_growth_recovers_the_coefficient():
+    fit = fit_growth(SIZES, [3 * n * n + 100 for n in SIZES])
+    assert (fit.curve, round(fit.coefficient, 6), round(fit.constant)) == ("O(n²)", 3, 100)
+
+
+def operations(runs: list[dict[str, int]]) -> list[int]:
+    return [run["comparisons"] + run["swaps"] + run["reads"] + run["writes"] for run in runs]
+
+
+def test_sizes_stop_at_the_operation_budget():
+    counts = operations(measure_shape(SORTING_ITERATORS["bubble"], "reversed", SIZES))
+    assert len(counts) < len(SIZES)
+    assert counts[-1] > MAX_RUN_OPERATIONS >= max(counts[:-1])
+    # Whatever the machine load
+    assert operations(measure_shape(SORTING_ITERATORS["bubble"], "reversed", SIZES)) == counts
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.searching import SEARCHING_ALGORITHMS
+from main import app
+from services.datasets import dataset_store
+
+ARRAY = random.Random(1).choices(range(-1000, 1000), k=500)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def register(client, body: dict) -> str:
+    response = client.post("/api/v1/searching/datasets", json=body)
+    assert response.status_code == 200
+    return response.json()["dataset_id"]
+
+
+@pytest.mark.parametrize("algorithm", SEARCHING_ALGORITHMS)
+@pytest.mark.parametrize("trace", ["full", "none"])
+def test_search_by_id_matches_array(client, algorithm, trace):
+    dataset_id = register(client, {"array": ARRAY})
+    for target in (ARRAY[0], ARRAY[7], -1001, 1000):
+        body = {"target": target, "trace": trace}
+        by_id = client.post(f"/api/v1/searching/{algorithm}", json={**body, "dataset_id": dataset_id}).json()
+        # A dataset holds the sorted values, which is what linear search scans
+        by_array = client.post(f"/api/v1/searching/{algorithm}", json={**body, "array": sorted(ARRAY)}).json()
+        assert by_id == by_array
+
+
+def test_same_content_same_id(client):
+    dataset_id = register(client, {"array": ARRAY})
+    assert register(client, {"array": random.Random(2).sample(ARRAY, len(ARRAY))}) == dataset_id
+    assert register(client, {"array": ARRAY + [5000]}) != dataset_id
+    generated = {"generator": "random", "n": 300, "seed": 4}
+    assert register(client, generated) == register(client, generated)
+
+
+def test_info(client):
+    dataset_id = register(client, {"array": ARRAY})
+    info = client.get(f"/api/v1/searching/datasets/{dataset_id}").json()
+    assert (info["size"], info["min"], info["max"]) == (len(ARRAY), min(ARRAY), max(ARRAY))
+    assert info["unique"] == len(set(ARRAY))
+
+
+def test_deleted_dataset_is_gone(client):
+    dataset_id = register(client, {"array": [3, 1, 2]})
+    assert client.delete(f"/api/v1/searching/datasets/{dataset_id}").status_code == 200
+    assert client.get(f"/api/v1/searching/datasets/{dataset_id}").status_code == 404
+    assert client.delete(f"/api/v1/searching/datasets/{dataset_id}").status_code == 404
+    response = client.post("/api/v1/searching/binary", json={"dataset_id": dataset_id, "target": 1})
+    assert response.status_code == 404
+
+
+def test_evicted_dataset_is_gone(client, monkeypatch):
+    first = register(client, {"array": list(range(1000))})
+    monkeypatch.setattr(dataset_store, "max_bytes", dataset_store.get(first).info.nbytes + 1)
+    second = register(client, {"array": list(range(1, 1001))})
+    assert client.post("/api/v1/searching/binary", json={"dataset_id": first, "target": 1}).status_code == 404
+    assert client.post("/api/v1/searching/binary", json={"dataset_id": second, "target": 1}).json()["found"]
+
+
+def test_too_large(client, monkeypatch):
+    monkeypatch.setattr(dataset_store, "max_bytes", 1000)
+    response = client.post("/api/v1/searching/datasets", json={"array": list(range(1000))})
+    assert response.status_code == 413
+    assert "1000" in response.json()["detail"]
@@ -0,0 +1,55 @@
+import random
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.decision_tree import build_decision_tree, decision_path_iter
+from algorithms.layouts import layout_cache
+from algorithms.searching import binary_search_iter
+from main import app
+from services.streaming import collect
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("values", [[], [4], list(range(0, 200, 3)), [2 ** 70 + i for i in range(0, 40, 2)]])
+def test_path_matches_binary_search(values):
+    tree = build_decision_tree(values)
+    for target in values[:5] + values[-5:] + [-1, 1, 2 ** 80]:
+        _, (found, found_at) = collect(decision_path_iter(tree, target))
+        _, expected = collect(binary_search_iter(values, target, presorted=True))
+        assert (found, found_at) == expected
+
+
+def test_tree_keeps_its_own_values():
+    values = list(range(1000))
+    tree = build_decision_tree(values)
+    values[:] = [0] * 1000
+    assert tree.export()["values"] == list(range(1000))
+    assert collect(decision_path_iter(tree, 777))[1] == (True, 777)
+
+
+def test_nbytes_counts_the_values():
+    n = 10_000
+    tree = build_decision_tree(list(range(n)))
+    # int64 keys, two int64 child links and an int32 depth per node
+    assert tree.nbytes == n * (8 + 8 + 8 + 4)
+    wide = build_decision_tree([2 ** 70 + i for i in range(n)])
+    assert wide.nbytes >= tree.nbytes + n * sys.getsizeof(2 ** 70)
+
+
+def test_dataset_tree_built_in_worker(client):
+    array = random.Random(5).sample(range(100_000), 5000)
+    dataset_id = client.post("/api/v1/searching/datasets", json={"array": array}).json()["dataset_id"]
+    assert layout_cache.get(("decision_tree", dataset_id)) is None
+    for target in (array[0], array[-1], -1):
+        by_id = client.post("/api/v1/searching/binary/decision-tree", json={"dataset_id": dataset_id, "target": target})
+        by_array = client.post("/api/v1/searching/binary/decision-tree", json={"array": array, "target": target})
+        assert by_id.status_code == by_array.status_code == 200
+        assert by_id.json() == by_array.json()
+        # Built by a worker and handed back to this process's cache
+        assert layout_cache.get(("decision_tree", dataset_id)) is not None
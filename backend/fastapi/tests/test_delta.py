@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from algorithms.sorting import SORTING_ALGORITHMS
+from services.delta import decode_sorting_trace, encode_sorting_trace
+from services.detail import COMPARISON, OPERATION, PASS
+
+ARRAYS = [
+    [5, 1, 4, 2, 8, 0, 2, 9, 3],
+    random.Random(7).choices(range(50), k=40),
+]
+
+
+def _dump(steps) -> list[dict]:
+    return [step.model_dump() for step in steps]
+
+
+@pytest.mark.parametrize("algorithm", SORTING_ALGORITHMS)
+@pytest.mark.parametrize("array", ARRAYS)
+@pytest.mark.parametrize("detail", [PASS, OPERATION, COMPARISON])
+def test_round_trip(algorithm, array, detail):
+    steps, _, _ = SORTING_ALGORITHMS[algorithm](array, detail)
+    # Every step a keyframe, some steps keyframes, only the first one a keyframe
+    for keyframe_interval in (1, 4, len(steps) + 1):
+        encoded = encode_sorting_trace(steps, keyframe_interval)
+        assert [step.keyframe is not None for step in encoded] == [
+            index % keyframe_interval == 0 for index in range(len(steps))
+        ]
+        assert _dump(decode_sorting_trace(encoded)) == _dump(steps)
+
+
+@pytest.mark.parametrize("algorithm", SORTING_ALGORITHMS)
+def test_empty_array(algorithm):
+    steps, _, _ = SORTING_ALGORITHMS[algorithm]([])
+    for keyframe_interval in (1, 64):
+        assert _dump(decode_sorting_trace(encode_sorting_trace(steps, keyframe_interval))) == _dump(steps)
+
+
+def test_empty_trace():
+    assert encode_sorting_trace([]) == []
+    assert decode_sorting_trace([]) == []
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.encoding import MSGPACK_MEDIA_TYPE, PACKED_MEDIA_TYPE
+from services.packed import INT32_MAX, unpack_sorting_steps
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("category, algorithm, body", [
+    ("sorting", "bubble", {"array": [3, 2 ** 31, 1]}),
+    ("sorting", "merge", {"array": [3, -2 ** 31 - 1, 1]}),
+    ("searching", "linear", {"array": [1, 2 ** 40], "target": 1}),
+])
+def test_packed_rejects_values_outside_int32(client, category, algorithm, body):
+    response = client.post(f"/api/v1/{category}/{algorithm}", json=body, headers={"Accept": PACKED_MEDIA_TYPE})
+    assert response.status_code == 422
+    assert str(INT32_MAX) in response.json()["detail"]
+    # JSON still answers the same request
+    assert client.post(f"/api/v1/{category}/{algorithm}", json=body).status_code == 200
+
+
+def test_packed_keeps_int32_bounds(client):
+    array = [2 ** 31 - 1, -2 ** 31, 0]
+    response = client.post("/api/v1/sorting/bubble", json={"array": array}, headers={"Accept": PACKED_MEDIA_TYPE})
+    assert response.status_code == 200
+    _, steps = unpack_sorting_steps(response.content)
+    assert steps[-1].array == sorted(array)
+
+
+def test_msgpack_rejects_integers_wider_than_64_bits(client):
+    body = {"array": [3, 2 ** 70, 1]}
+    response = client.post("/api/v1/sorting/bubble", json=body, headers={"Accept": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == 422
+    assert str(2 ** 64 - 1) in response.json()["detail"]
+    assert client.post("/api/v1/sorting/bubble", json=body).status_code == 200
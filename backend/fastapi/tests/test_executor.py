@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Future
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from algorithms import sorting
+from main import app
+from services import metrics
+from services.executor import JobCancelled, StepExecutor, _job, _run_job, step_executor, subtask_result
+from services.streaming import collect
+
+
+class _Model(BaseModel):
+    value: int
+
+
+class _Request:
+    """Stands in for the route's Request: the client never disconnects"""
+
+    def __init__(self):
+        self.scope = {}
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+def _invalid() -> None:
+    # pydantic's ValidationError does not unpickle: returned as is, it would break the pool
+    _Model(value=None)
+
+
+def _exit_worker() -> None:
+    os._exit(1)
+
+
+def _run(executor: StepExecutor, func, *args):
+    return asyncio.run(executor.run(_Request(), func, *args))
+
+
+@pytest.fixture
+def executor():
+    executor = StepExecutor("process", workers=1, queue_limit=1, timeout=30)
+    yield executor
+    executor.shutdown()
+
+
+def test_worker_exception_is_an_http_error(executor):
+    for _ in range(executor.workers + executor.queue_limit + 1):
+        with pytest.raises(HTTPException) as raised:
+            _run(executor, _invalid)
+        assert raised.value.status_code == 500
+        assert "ValidationError" in raised.value.detail
+    assert executor.inflight == 0
+    assert _run(executor, _square, 7) == 49
+
+
+def test_broken_pool_is_replaced(executor):
+    with pytest.raises(HTTPException) as raised:
+        _run(executor, _exit_worker)
+    assert raised.value.status_code == 503
+    assert executor.inflight == 0
+    assert _run(executor, _square, 3) == 9
+
+
+def _timed_step() -> int:
+    with metrics.phase("generate"):
+        return 1
+
+
+def test_job_returns_its_phases_once():
+    now = time.time()
+    result, phases = _run_job(_timed_step, (), now + 30, now)
+    assert result == 1
+    assert set(phases) >= {"queue", "generate"}
+    # Collection stopped with the job
+    assert metrics.finish_job() == {}
+
+
+def test_failing_route_leaves_service_up():
+    client = TestClient(app)
+    for _ in range(step_executor.workers + step_executor.queue_limit + 1):
+        assert client.post("/api/tree/insert", json={"values": []}).status_code == 500
+    assert step_executor.inflight == 0
+    response = client.post("/api/v1/sorting/bubble", json={"array": [3, 1, 2], "trace": "none"})
+    assert response.status_code == 200
+    assert response.json()["result"] == [1, 2, 3]
+
+
+def test_shutdown_stops_the_pool():
+    with TestClient(app) as client:
+        assert client.post("/api/v1/sorting/bubble", json={"array": [3, 1, 2], "trace": "none"}).status_code == 200
+        assert step_executor._pool is not None
+    assert step_executor._pool is None
+
+
+def test_subtask_wait_stops_at_the_job_deadline():
+    pending = Future()
+    _job.deadline = time.time() - 1
+    try:
+        with pytest.raises(JobCancelled):
+            subtask_result(pending)
+    finally:
+        _job.deadline = None
+    assert not pending.done()
+
+
+def test_parallel_bucket_sort_cancels_its_subtasks_on_timeout(monkeypatch):
+    submitted = []
+
+    class _Pool:
+        def submit(self, *args):
+            submitted.append(Future())
+            return submitted[-1]
+
+    monkeypatch.setattr(sorting, "subtask_pool", _Pool)
+    _job.deadline = time.time() - 1
+    try:
+        with pytest.raises(JobCancelled):
+            collect(sorting.bucket_sort_iter(list(range(40, 0, -1)), parallel=True))
+    finally:
+        _job.deadline = None
+    assert submitted and all(job.cancelled() for job in submitted)
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.schemas import GENERATOR_PARAMS, MAX_GENERATED_BOUND
+from services.generators import generate_array
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("generator, params", [("random", {"range": 1e30}), ("nearly_sorted", {"range": 2e18}),
+                                               ("few_unique", {"unique": 1e30})])
+def test_params_past_int64_are_rejected(client, generator, params):
+    body = {"generator": generator, "n": 10, "params": params, "trace": "none"}
+    response = client.post("/api/v1/sorting/bubble", json=body)
+    assert response.status_code == 422
+    assert str(MAX_GENERATED_BOUND) in response.text
+
+
+@pytest.mark.parametrize("generator, params", [("random", {"range": 2.0 ** 62}), ("few_unique", {"unique": 2.0 ** 63})])
+def test_params_up_to_int64_generate(client, generator, params):
+    body = {"generator": generator, "n": 2, "params": params, "trace": "none"}
+    response = client.post("/api/v1/sorting/bubble", json=body)
+    assert response.status_code == 200
+    assert response.json()["result"] == sorted(generate_array(generator, 2, 0, params))
+
+
+@pytest.mark.parametrize("generator", GENERATOR_PARAMS)
+def test_generators_are_seeded(generator):
+    assert generate_array(generator, 50, 3) == generate_array(generator, 50, 3)
+    assert len(generate_array(generator, 50, 3)) == 50
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.layouts import BTREE_KEYS, LAYOUT_BUILDERS, layout_cache, search_layout
+from algorithms.searching import SEARCHING_ITERATORS, binary_search_iter
+from main import app
+from services.detail import NONE
+from services.streaming import collect
+
+# Around the node size and full trees of it, so the last node or level is partly filled
+SIZES = sorted({0, 1, 2, 3, 100, 1000,
+                *(BTREE_KEYS ** levels + offset for levels in (1, 2, 3) for offset in (-1, 0, 1)),
+                *(BTREE_KEYS * (BTREE_KEYS + 1) + offset for offset in (-1, 0, 1))})
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("algorithm", LAYOUT_BUILDERS)
+def test_dataset_layout_built_in_worker(client, algorithm):
+    array = random.Random(algorithm).sample(range(-5000, 5000), 3000)
+    dataset_id = client.post("/api/v1/searching/datasets", json={"array": array}).json()["dataset_id"]
+    assert layout_cache.get((algorithm, dataset_id)) is None
+    for target in (array[0], array[1], 5001):
+        by_id = client.post(f"/api/v1/searching/{algorithm}",
+                            json={"dataset_id": dataset_id, "target": target, "trace": "none"}).json()
+        by_array = client.post(f"/api/v1/searching/{algorithm}",
+                               json={"array": sorted(array), "target": target, "trace": "none"}).json()
+        assert (by_id["found"], by_id["found_at"]) == (by_array["found"], by_array["found_at"])
+        # Built by a worker and handed back to this process's cache
+        assert layout_cache.get((algorithm, dataset_id)) is not None
+
+
+@pytest.mark.parametrize("algorithm", LAYOUT_BUILDERS)
+@pytest.mark.parametrize("size", SIZES)
+def test_layout_search_matches_binary_search(algorithm, size):
+    rng = random.Random(size)
+    values = sorted(rng.sample(range(-10 * size - 10, 10 * size + 10), size))
+    layout = search_layout(algorithm, values)
+    for target in values + [rng.randint(-10 * size - 20, 10 * size + 20) for _ in range(50)]:
+        expected = collect(binary_search_iter(values, target, NONE, presorted=True))[1]
+        for options in ({}, {"layout": layout}):
+            trace = SEARCHING_ITERATORS[algorithm](values, target, NONE, presorted=True, **options)
+            assert collect(trace)[1] == expected
+
+
+@pytest.mark.parametrize("algorithm", LAYOUT_BUILDERS)
+@pytest.mark.parametrize("size", SIZES)
+def test_layout_search_with_duplicates(algorithm, size):
+    # Any copy of the target may be the one found
+    values = sorted(random.Random(size).choices(range(10), k=size))
+    for target in range(-1, 11):
+        found, found_at = collect(SEARCHING_ITERATORS[algorithm](values, target, NONE, presorted=True))[1]
+        assert found == (target in values)
+        assert not found or values[found_at] == target
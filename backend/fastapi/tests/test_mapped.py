@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms import searching
+from algorithms.mapped_search import MAPPED_SEARCH_ITERATORS
+from main import app
+from services import mapped
+from services.executor import StepExecutor
+
+VALUES = sorted(random.Random(1).sample(range(-10 ** 6, 10 ** 6), 5000))
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    """A MAPPED_DATASET_DIR holding VALUES as .npy and raw files, searched in a thread pool that sees it"""
+    (tmp_path / "sub").mkdir()
+    np.save(tmp_path / "values64.npy", np.array(VALUES, dtype=np.int64))
+    np.save(tmp_path / "sub" / "values32.npy", np.array(VALUES, dtype=np.int32))
+    np.array(VALUES, dtype="<i8").tofile(tmp_path / "values64.bin")
+    np.array(VALUES, dtype="<i4").tofile(tmp_path / "values32.bin")
+    (tmp_path.parent / "outside.npy").write_bytes((tmp_path / "values64.npy").read_bytes())
+    executor = StepExecutor("thread", 2, 4, 30)
+    monkeypatch.setattr(mapped, "MAPPED_DATASET_DIR", str(tmp_path))
+    monkeypatch.setattr(searching, "step_executor", executor)
+    yield tmp_path
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("algorithm", MAPPED_SEARCH_ITERATORS)
+@pytest.mark.parametrize("file, dtype", [("values64.npy", None), ("sub/values32.npy", "int32"),
+                                         ("values64.bin", "int64"), ("values32.bin", "int32")])
+def test_matches_in_memory_search(client, dataset_dir, algorithm, file, dtype):
+    for target in (VALUES[0], VALUES[2500], VALUES[-1], VALUES[100] + 1, -10 ** 7, 10 ** 7):
+        body = {"target": target, "trace": "none"}
+        response = client.post(f"/api/v1/searching/{algorithm}/mapped", json={**body, "file": file, "dtype": dtype})
+        expected = client.post(f"/api/v1/searching/{algorithm}", json={**body, "array": VALUES}).json()
+        assert response.status_code == 200
+        assert (response.json()["found"], response.json()["found_at"]) == (expected["found"], expected["found_at"])
+        assert response.json()["size"] == len(VALUES)
+
+
+@pytest.mark.parametrize("file", ["../outside.npy", "sub/../../outside.npy", "missing.npy", "sub"])
+def test_rejects_names_outside_the_directory(client, dataset_dir, file):
+    response = client.post("/api/v1/searching/binary/mapped", json={"file": file, "dtype": "int64", "target": 1})
+    assert response.status_code == 404
+
+
+def test_lists_files(client, dataset_dir):
+    files = {info["file"]: info for info in client.get("/api/v1/searching/files").json()}
+    assert set(files) == {"values64.npy", "sub/values32.npy", "values64.bin", "values32.bin"}
+    assert (files["sub/values32.npy"]["dtype"], files["sub/values32.npy"]["size"]) == ("int32", len(VALUES))
+    assert files["values64.bin"]["size"] is None
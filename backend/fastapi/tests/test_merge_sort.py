@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.sorting import SORTING_ITERATORS
+from main import app
+from services.detail import COMPARISON, NONE
+from services.highlights import INDICES
+from services.streaming import collect
+
+MERGE_SORTS = ("merge_bottom_up", "merge_natural")
+N = 4096
+ARRAYS = [
+    [],
+    [1],
+    [2, 1],
+    [3, 3, 1, 3, 2, 2],
+    random.Random(1).choices(range(-50, 50), k=257),
+    random.Random(2).choices(range(3), k=100),     # Mostly duplicates
+    [5, 6, 7, 1, 2, 9, 8, 3, 0, 4, 4, 4, 10],      # Mixed ascending and descending runs
+]
+LARGE = {
+    "sorted": list(range(N)),
+    "reversed": list(range(N, 0, -1)),
+    "halves": list(range(N // 2, N)) + list(range(N // 2)),
+    "interleaved": list(range(0, N, 2)) + list(range(1, N, 2)),
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("algorithm", MERGE_SORTS)
+@pytest.mark.parametrize("gallop", [True, False])
+@pytest.mark.parametrize("arr", ARRAYS, ids=range(len(ARRAYS)))
+def test_sorts(algorithm, gallop, arr):
+    steps, (result, _, _) = collect(SORTING_ITERATORS[algorithm](arr, COMPARISON, INDICES, gallop=gallop))
+    assert result == sorted(arr)
+    assert steps[-1].array == sorted(arr)
+
+
+@pytest.mark.parametrize("algorithm", MERGE_SORTS)
+@pytest.mark.parametrize("name", LARGE)
+def test_gallop_never_compares_more(algorithm, name):
+    arr = LARGE[name]
+    _, galloping = collect(SORTING_ITERATORS[algorithm](arr, NONE, INDICES, gallop=True))
+    _, plain = collect(SORTING_ITERATORS[algorithm](arr, NONE, INDICES, gallop=False))
+    assert galloping[0] == plain[0] == sorted(arr)
+    assert galloping[1] <= plain[1]
+    if name == "halves":
+        # Two runs that do not interleave: a gallop skips over most of the second
+        assert galloping[1] < plain[1] * 3 // 4
+
+
+@pytest.mark.parametrize("algorithm", MERGE_SORTS)
+def test_presorted_input_takes_linear_comparisons(algorithm):
+    _, (_, comparisons, swaps) = collect(SORTING_ITERATORS[algorithm](LARGE["sorted"], NONE, INDICES))
+    assert (comparisons, swaps) == (N - 1, 0)
+
+
+def test_natural_reverses_a_descending_run():
+    steps, (result, comparisons, swaps) = collect(SORTING_ITERATORS["merge_natural"](LARGE["reversed"], COMPARISON))
+    assert result == sorted(LARGE["reversed"])
+    assert (comparisons, swaps) == (N - 1, N // 2)
+    assert any(step.description == "Found 1 natural runs" for step in steps)
+
+
+@pytest.mark.parametrize("algorithm", MERGE_SORTS)
+@pytest.mark.parametrize("gallop", [True, False])
+def test_endpoint_passes_gallop(client, algorithm, gallop):
+    arr = LARGE["halves"][::16]
+    response = client.post(f"/api/v1/sorting/{algorithm}", json={"array": arr, "gallop": gallop, "trace": "none"})
+    _, expected = collect(SORTING_ITERATORS[algorithm](arr, NONE, INDICES, gallop=gallop))
+    body = response.json()
+    assert (body["result"], body["total_comparisons"], body["total_swaps"]) == expected
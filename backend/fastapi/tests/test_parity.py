@@ -0,0 +1,114 @@
+import hashlib
+import json
+import random
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms import sorting
+from algorithms.dp import DP_ALGORITHMS
+from algorithms.graph import GRAPH_ALGORITHMS
+from algorithms.searching import SEARCHING_ALGORITHMS
+from algorithms.sorting import SORTING_ALGORITHMS
+from algorithms.tree import TREE_ALGORITHMS
+from main import app
+
+# Digests of the *_steps output of the algorithms that predate the step generators, taken from
+# the original implementations on baseline_cases(). Quick sort now heap sorts ranges past its
+# introsort depth limit; on the inputs listed in "introsort_cases" its trace differs from the
+# original recursion from that point on, so they are checked separately.
+BASELINE = json.loads((Path(__file__).parent / "data" / "sorting_baseline.json").read_text())
+STEPS_FUNCTIONS = {**SORTING_ALGORITHMS, "bucket": sorting.bucket_sort_steps}
+
+
+def baseline_cases() -> list[tuple[int, list[int]]]:
+    cases = []
+    for seed in range(BASELINE["cases"]):
+        rng = random.Random(seed)
+        cases.append((seed, [rng.randint(0, 99) for _ in range(rng.randint(0, 40))]))
+    return cases
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("algorithm", BASELINE["digests"])
+def test_steps_match_baseline(algorithm):
+    digest = hashlib.sha1()
+    for seed, array in baseline_cases():
+        if algorithm == "quick" and seed in BASELINE["introsort_cases"]:
+            continue
+        steps, comparisons, swaps = STEPS_FUNCTIONS[algorithm](array)
+        digest.update(json.dumps([[step.model_dump() for step in steps], comparisons, swaps], sort_keys=True).encode())
+    assert digest.hexdigest() == BASELINE["digests"][algorithm]
+
+
+def test_quick_introsort_cases():
+    introsort = set(BASELINE["introsort_cases"])
+    for seed, array in baseline_cases():
+        steps, _, _ = SORTING_ALGORITHMS["quick"](array)
+        assert any(step.description.startswith("Depth limit reached") for step in steps) == (seed in introsort)
+        assert not steps or steps[-1].array == sorted(array)
+
+
+def _both(client, url: str, body: dict) -> tuple[dict, dict]:
+    full = client.post(url, json=body)
+    none = client.post(url, json={**body, "trace": "none"})
+    assert full.status_code == none.status_code == 200
+    return full.json(), none.json()
+
+
+@pytest.mark.parametrize("algorithm", SORTING_ALGORITHMS)
+@pytest.mark.parametrize("size", [0, 1, 2, 9, 60])
+def test_sorting_result_only(client, algorithm, size):
+    array = [random.Random(size).randint(0, 99) for _ in range(size)]
+    full, none = _both(client, f"/api/v1/sorting/{algorithm}", {"array": array})
+    assert "steps" not in none
+    assert (none["total_comparisons"], none["total_swaps"]) == (full["total_comparisons"], full["total_swaps"])
+    assert none["result"] == full["steps"][-1]["array"]
+
+
+@pytest.mark.parametrize("algorithm", SEARCHING_ALGORITHMS)
+def test_searching_result_only(client, algorithm):
+    array = sorted(random.Random(3).sample(range(500), 50))
+    for target in (array[0], array[25], array[-1], 1000, -3):
+        full, none = _both(client, f"/api/v1/searching/{algorithm}", {"array": array, "target": target})
+        assert none["steps"] == []
+        assert (none["found"], none["found_at"]) == (full["found"], full["found_at"])
+
+
+@pytest.mark.parametrize("algorithm", GRAPH_ALGORITHMS)
+def test_graph_result_only(client, algorithm):
+    nodes = [{"id": node, "label": node, "x": 0, "y": 0} for node in "ABCDEF"]
+    edges = [{"source": source, "target": target, "weight": weight} for source, target, weight in
+             [("A", "B", 4), ("A", "C", 2), ("B", "C", 1), ("B", "D", 5), ("C", "D", 8), ("D", "E", 3),
+              ("E", "F", 1), ("C", "F", 9)]]
+    full, none = _both(client, f"/api/v1/graph/{algorithm}",
+                       {"nodes": nodes, "edges": edges, "start_node": "A", "end_node": "F"})
+    assert none["steps"] == []
+    assert (none["result"], none["total_cost"]) == (full["result"], full["total_cost"])
+
+
+@pytest.mark.parametrize("algorithm", TREE_ALGORITHMS)
+def test_tree_result_only(client, algorithm):
+    full, none = _both(client, f"/api/v1/tree/{algorithm}", {"values": [50, 30, 70, 20, 40, 60, 80], "value": 60})
+    assert none["steps"] == []
+    assert none["result"] == full["result"]
+
+
+DP_INPUTS = {
+    "fibonacci": 15,
+    "knapsack": {"weights": [1, 3, 4, 5], "values": [1, 4, 5, 7], "capacity": 7},
+    "lcs": {"s1": "ABCBDAB", "s2": "BDCABA"},
+    "lis": [10, 9, 2, 5, 3, 7, 101, 18],
+}
+
+
+@pytest.mark.parametrize("algorithm", DP_ALGORITHMS)
+def test_dp_result_only(client, algorithm):
+    full, none = _both(client, f"/api/v1/dp/{algorithm}", {"input_data": DP_INPUTS[algorithm]})
+    assert none["steps"] == []
+    assert none["result"] == full["result"]
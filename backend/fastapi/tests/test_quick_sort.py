@@ -0,0 +1,71 @@
+import math
+import random
+from typing import get_args
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.sorting import quick_sort_iter
+from main import app
+from models.schemas import PartitionScheme, PivotStrategy
+from services.detail import COMPARISON, NONE
+from services.highlights import INDICES
+from services.streaming import collect
+
+ARRAYS = [
+    [],
+    [1],
+    [2, 1],
+    [3, 3, 1, 3],
+    random.Random(1).choices(range(-50, 50), k=200),
+    random.Random(2).choices(range(4), k=150),   # Mostly duplicates
+]
+# Past the recursion limit, and quadratic for a last-element pivot without the introsort fallback
+LARGE = {
+    "sorted": list(range(5000)),
+    "reversed": list(range(5000, 0, -1)),
+    "equal": [7] * 5000,
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("pivot", get_args(PivotStrategy))
+@pytest.mark.parametrize("partition", get_args(PartitionScheme))
+@pytest.mark.parametrize("arr", ARRAYS, ids=range(len(ARRAYS)))
+def test_sorts(pivot, partition, arr):
+    steps, (result, _, _) = collect(quick_sort_iter(arr, COMPARISON, INDICES, pivot=pivot, partition=partition))
+    assert result == sorted(arr)
+    assert not steps or steps[-1].array == sorted(arr)
+
+
+@pytest.mark.parametrize("pivot", get_args(PivotStrategy))
+@pytest.mark.parametrize("partition", get_args(PartitionScheme))
+@pytest.mark.parametrize("name", LARGE)
+def test_large_adversarial_inputs(pivot, partition, name):
+    arr = LARGE[name]
+    n = len(arr)
+    _, (result, comparisons, _) = collect(quick_sort_iter(arr, NONE, INDICES, pivot=pivot, partition=partition))
+    assert result == sorted(arr)
+    assert comparisons < 6 * n * math.log2(n)
+
+
+def test_random_pivot_follows_the_seed():
+    arr = random.Random(3).choices(range(100), k=100)
+    runs = [collect(quick_sort_iter(arr, NONE, INDICES, pivot="random", seed=seed))[1] for seed in (1, 1, 2)]
+    assert runs[0] == runs[1]
+    assert runs[0][0] == runs[2][0] == sorted(arr)
+
+
+@pytest.mark.parametrize("pivot", get_args(PivotStrategy))
+@pytest.mark.parametrize("partition", get_args(PartitionScheme))
+def test_endpoint_options(client, pivot, partition):
+    arr = random.Random(4).choices(range(30), k=60)
+    body = {"array": arr, "pivot": pivot, "partition": partition, "pivot_seed": 5, "detail": "pass"}
+    response = client.post("/api/v1/sorting/quick", json={**body, "trace": "none"}).json()
+    _, (result, comparisons, swaps) = collect(quick_sort_iter(arr, NONE, INDICES, pivot=pivot, partition=partition,
+                                                              seed=5))
+    assert (response["result"], response["total_comparisons"], response["total_swaps"]) == (result, comparisons, swaps)
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.sorting import SORTING_ALGORITHMS
+from main import app
+
+ALGORITHMS = list(SORTING_ALGORITHMS)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("source", [{"array": random.Random(1).choices(range(-40, 40), k=60)},
+                                    {"generator": "few_unique", "n": 80, "seed": 3}])
+def test_entries_match_single_algorithm_endpoint(client, source):
+    race = client.post("/api/v1/sorting/race", json={**source, "detail": "pass", "trace": "full"})
+    assert race.status_code == 200
+    results = race.json()["results"]
+    assert [entry["algorithm"] for entry in results] == ALGORITHMS
+    for entry in results:
+        single = client.post(f"/api/v1/sorting/{entry['algorithm']}", json={**source, "detail": "pass"}).json()
+        counters = ("total_comparisons", "total_swaps")
+        assert [entry[name] for name in counters] == [single[name] for name in counters]
+        assert entry["steps"] == single["steps"]
+        assert entry["total_steps"] == len(single["steps"])
+    assert race.json()["total_ticks"] == max(entry["total_steps"] for entry in results)
+
+
+def test_runs_the_requested_algorithms_in_order(client):
+    body = {"array": [3, 1, 2], "algorithms": ["quick", "bubble", "merge"]}
+    results = client.post("/api/v1/sorting/race", json=body).json()["results"]
+    assert [entry["algorithm"] for entry in results] == ["quick", "bubble", "merge"]
+    assert all(entry["steps"] == [] for entry in results)
+
+
+@pytest.mark.parametrize("body", [{"array": [3, 1, 2], "algorithms": ["quick", "bogo"]},
+                                  {"array": [3, 1, 2], "generator": "random", "n": 3},
+                                  {"algorithms": ["quick"]}])
+def test_rejects_bad_requests(client, body):
+    assert client.post("/api/v1/sorting/race", json=body).status_code == 422
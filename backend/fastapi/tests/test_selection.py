@@ -0,0 +1,86 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.sorting import SELECTION_ALGORITHMS, SORTING_ITERATORS
+from main import app
+from services.detail import NONE, PASS
+from services.highlights import INDICES
+from services.streaming import collect
+
+
+def median_of_three_killer(n: int) -> list[int]:
+    """Musser's input driving median-of-three pivots to their worst case"""
+    half = n // 2
+    arr = [0] * n
+    for i in range(1, half + 1):
+        if i % 2:
+            arr[i - 1], arr[i] = i, half + i
+        arr[half + i - 1] = 2 * i
+    return arr
+
+
+ARRAYS = [
+    [4],
+    [2, 1],
+    [5, -3, 9, 1, 7, 3, 3, 0, -8],
+    random.Random(1).choices(range(-100, 100), k=301),
+    random.Random(2).choices(range(3), k=200),   # Mostly duplicates
+    [6] * 50,
+]
+# Already sorted, reversed, organ pipe and median-of-three killer: the worst cases of plain quickselect
+ADVERSARIAL = [
+    list(range(4000)),
+    list(range(4000, 0, -1)),
+    list(range(2000)) + list(range(2000, 0, -1)),
+    median_of_three_killer(4000),
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def check_selection(algorithm: str, arr: list[int], k: int, result: list[int]) -> None:
+    expected = sorted(arr)
+    assert sorted(result) == expected
+    if algorithm == "heap_top_k":
+        assert result[:k] == expected[:k]
+    else:
+        assert result[k - 1] == expected[k - 1]
+        assert sorted(result[:k]) == expected[:k]
+
+
+@pytest.mark.parametrize("algorithm", SELECTION_ALGORITHMS)
+@pytest.mark.parametrize("arr", ARRAYS, ids=range(len(ARRAYS)))
+def test_selects_the_k_smallest(algorithm, arr):
+    for k in sorted({1, 2, len(arr) // 2, len(arr) - 1, len(arr)} & set(range(1, len(arr) + 1))):
+        _, (result, _, _) = collect(SORTING_ITERATORS[algorithm](arr, PASS, INDICES, k=k))
+        check_selection(algorithm, arr, k, result)
+
+
+@pytest.mark.parametrize("algorithm", SELECTION_ALGORITHMS)
+@pytest.mark.parametrize("arr", ADVERSARIAL, ids=["sorted", "reversed", "organ-pipe", "killer"])
+def test_adversarial_inputs_stay_linear(algorithm, arr):
+    n = len(arr)
+    for k in (1, n // 3, n // 2, n):
+        _, (result, comparisons, _) = collect(SORTING_ITERATORS[algorithm](arr, NONE, INDICES, k=k))
+        check_selection(algorithm, arr, k, result)
+        if algorithm != "heap_top_k":
+            assert comparisons < 30 * n
+
+
+@pytest.mark.parametrize("algorithm", SELECTION_ALGORITHMS)
+def test_default_k_is_the_lower_median(client, algorithm):
+    arr = [9, 4, 7, 1, 8, 2]
+    result = client.post(f"/api/v1/sorting/{algorithm}", json={"array": arr, "trace": "none"}).json()["result"]
+    check_selection(algorithm, arr, 3, result)
+
+
+@pytest.mark.parametrize("algorithm", SELECTION_ALGORITHMS)
+@pytest.mark.parametrize("body", [{"array": [3, 1, 2], "k": 4}, {"array": [3, 1, 2], "k": 0},
+                                  {"generator": "random", "n": 10, "k": 11}])
+def test_rejects_k_out_of_range(client, algorithm, body):
+    assert client.post(f"/api/v1/sorting/{algorithm}", json=body).status_code == 422
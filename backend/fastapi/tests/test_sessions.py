@@ -0,0 +1,31 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _session_steps(client, category: str, algorithm: str, body: dict) -> tuple[dict, list[dict]]:
+    response = client.post(f"/api/v1/{category}/{algorithm}/session", json=body)
+    assert response.status_code == 200
+    info = response.json()
+    page = client.get(f"/api/v1/traces/{info['session_id']}/steps", params={"limit": 1000})
+    assert page.status_code == 200
+    return info, page.json()["steps"]
+
+
+@pytest.mark.parametrize("category, algorithm, body", [
+    ("sorting", "bubble", {"array": [3, 2 ** 31 - 1, -2 ** 31, 1]}),
+    ("sorting", "bubble", {"array": [3, 2 ** 31, 1]}),
+    ("sorting", "merge", {"array": [3, -2 ** 63, 2 ** 70, 1]}),
+    ("searching", "binary", {"array": [1, 5, 2 ** 40], "target": 2 ** 40}),
+])
+def test_session_pages_match_the_one_shot_steps(client, category, algorithm, body):
+    info, steps = _session_steps(client, category, algorithm, body)
+    assert info["total_steps"] == len(steps)
+    one_shot = client.post(f"/api/v1/{category}/{algorithm}", json=body).json()
+    assert steps == one_shot["steps"]
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from algorithms.sorting import MAX_COUNTING_RANGE, SORTING_ITERATORS
+from algorithms.vectorized import VECTORIZED_ITERATORS
+from main import app
+from services.detail import PASS
+from services.streaming import collect
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+@pytest.mark.parametrize("array", [[-2 ** 63, 2 ** 63 - 1, 5], [0, 2 ** 62, 5], [0, 2 ** 40], [0, MAX_COUNTING_RANGE]])
+def test_counting_rejects_wide_ranges(client, engine, array):
+    response = client.post("/api/v1/sorting/counting", json={"array": array, "engine": engine, "trace": "none"})
+    assert response.status_code == 422
+    assert str(MAX_COUNTING_RANGE) in response.json()["detail"]
+
+
+def test_counting_rejects_wide_generated_ranges(client):
+    body = {"generator": "random", "n": 100, "params": {"range": 1e6}, "engine": "numpy", "trace": "none"}
+    assert client.post("/api/v1/sorting/counting", json=body).status_code == 422
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+@pytest.mark.parametrize("array", [[-2 ** 63 + 3, -2 ** 63, -2 ** 63], [2 ** 63 - 1, 2 ** 63 - 2],
+                                   [0, MAX_COUNTING_RANGE - 1]])
+def test_counting_sorts_narrow_ranges_at_the_int64_extremes(client, engine, array):
+    response = client.post("/api/v1/sorting/counting", json={"array": array, "engine": engine, "trace": "none"})
+    assert response.status_code == 200
+    assert response.json()["result"] == sorted(array)
+
+
+PARITY_ARRAYS = [
+    [],
+    [3],
+    [5, -1, 4, -1, 0, 9, -7, 3, 3, 12],
+    random.Random(1).choices(range(-500, 500), k=300),
+    [7] * 20,
+    [2 ** 63 - 1, -2 ** 63, 0, -1, 2 ** 63 - 1, 1, -2 ** 63 + 1],
+    [-2 ** 63 + 2, -2 ** 63, -2 ** 63 + 1, -2 ** 63],
+]
+PARITY_OPTIONS = [
+    ("counting", {}),
+    *(("radix", {"base": base}) for base in (2, 10, 256, 65536)),
+    *(("bucket", {"count": count}) for count in (None, 1, 3, 64)),
+]
+
+
+@pytest.mark.parametrize("array", PARITY_ARRAYS, ids=range(len(PARITY_ARRAYS)))
+@pytest.mark.parametrize("algorithm, options", PARITY_OPTIONS)
+def test_matches_step_generators(algorithm, options, array):
+    if algorithm == "counting" and array and max(array) - min(array) >= MAX_COUNTING_RANGE:
+        pytest.skip("counting sort rejects the range")
+    expected_steps, expected = collect(SORTING_ITERATORS[algorithm](array, PASS, **options))
+    steps, result = collect(VECTORIZED_ITERATORS[algorithm](array, PASS, **options))
+    assert [step.to_dict() for step in steps] == [step.to_dict() for step in expected_steps]
+    assert result == expected